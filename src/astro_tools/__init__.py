@@ -4,38 +4,116 @@
 #  Licensed under MIT License.
 from __future__ import annotations
 
+from pathlib import Path
+
 import click
 
-from astro_tools.cli.blob.blob_upload import blob_upload
-from astro_tools.cli.dirs.create_dirs import create_dirs
-from astro_tools.cli.zips.check_zips import check_zips
-from astro_tools.cli.zips.rename_zips import rename_zips
+from astro_tools.cli.lazy import LazyGroup
+from astro_tools.utils import profiling
 
 
-@click.group()  # type: ignore[misc]
-def cli() -> None:
+@click.group(  # type: ignore[misc]
+    cls=LazyGroup,
+    lazy_subcommands={
+        "watch": "astro_tools.cli.watch.watch_folder:watch",
+    },
+    lazy_help={
+        "watch": "Checks, renames and uploads zip archives as they arrive in the drop folder.",
+    },
+)
+@click.option(  # type: ignore[misc]
+    "--trace_file",
+    type=click.Path(file_okay=True, dir_okay=False, path_type=Path),
+    help="Enable profiling and save recorded spans and metrics to this JSON file",
+)
+@click.option(  # type: ignore[misc]
+    "--trace_mlflow",
+    default=False,
+    is_flag=True,
+    help="Enable profiling and log recorded metrics to MLflow",
+)
+@click.pass_context  # type: ignore[misc]
+def cli(ctx: click.Context, trace_file: Path | None = None, *, trace_mlflow: bool = False) -> None:
     """Main entrypoint for CLI."""
+    if trace_file is None and not trace_mlflow:
+        return
+    profiling.enable()
+    # Callbacks run in reverse order - the command span is closed before the export
+    ctx.call_on_close(lambda: _export_trace(trace_file, trace_mlflow=trace_mlflow))
+    ctx.with_resource(profiling.span(f"astro-tools {ctx.invoked_subcommand}"))
+
+
+def _export_trace(trace_file: Path | None, *, trace_mlflow: bool) -> None:
+    if trace_file is not None:
+        profiling.export_json(trace_file)
+    if trace_mlflow:
+        profiling.log_to_mlflow()
 
 
-@cli.group("dir")  # type: ignore[misc]
+@cli.group(  # type: ignore[misc]
+    "dir",
+    cls=LazyGroup,
+    lazy_subcommands={
+        "create": "astro_tools.cli.dirs.create_dirs:create_dirs",
+    },
+    lazy_help={
+        "create": "Creates directories based on file with dir names or a catalog expanded with a path template.",
+    },
+)
 def cli_dir() -> None:
     """Astro directory related operations."""
 
 
-@cli.group("zip")  # type: ignore[misc]
+@cli.group(  # type: ignore[misc]
+    "zip",
+    cls=LazyGroup,
+    lazy_subcommands={
+        "check": "astro_tools.cli.zips.check_zips:check_zips",
+        "rename": "astro_tools.cli.zips.rename_zips:rename_zips",
+        "repack": "astro_tools.cli.zips.repack_zips:repack_zips",
+    },
+    lazy_help={
+        "check": "Runs corruption check against zip archives in specified directory.",
+        "rename": "Rename telescope-live zip archives.",
+        "repack": "Recompresses zip archives in specified directory and replaces the originals.",
+    },
+)
 def cli_zip() -> None:
     """Zip archive related operations."""
 
 
-@cli.group("blob")  # type: ignore[misc]
+@cli.group(  # type: ignore[misc]
+    "blob",
+    cls=LazyGroup,
+    lazy_subcommands={
+        "download": "astro_tools.cli.blob.blob_download:blob_download",
+        "extract": "astro_tools.cli.blob.blob_extract:blob_extract",
+        "upload": "astro_tools.cli.blob.blob_upload:blob_upload",
+    },
+    lazy_help={
+        "download": "Downloads (or verifies) blobs under the prefix, decompressing blobs uploaded with compression.",
+        "extract": "Extracts selected members of zip archives in Blob Storage without downloading whole archives.",
+        "upload": "Uploads files from source directory to specified Blob Storage container.",
+    },
+)
 def cli_blob() -> None:
     """Blob storage related operations."""
 
 
-cli_dir.add_command(create_dirs)
-cli_zip.add_command(rename_zips)
-cli_zip.add_command(check_zips)
-cli_blob.add_command(blob_upload)
+@cli.group(  # type: ignore[misc]
+    "frames",
+    cls=LazyGroup,
+    lazy_subcommands={
+        "preview": "astro_tools.cli.frames.preview_frames:preview_frames",
+        "score": "astro_tools.cli.frames.score_frames:score_frames",
+    },
+    lazy_help={
+        "preview": "Generates stretched PNG previews for frames on disk and inside zip archives.",
+        "score": "Scores frame quality (background, noise, star count, FWHM) for frames on disk and in zip archives.",
+    },
+)
+def cli_frames() -> None:
+    """Light frame related operations."""
 
 
 if __name__ == "__main__":
@@ -0,0 +1,224 @@
+"""Parallel blob storage data download and verification functions."""
+
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+from __future__ import annotations
+
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import click
+from tqdm import tqdm
+
+from astro_tools.core.clients import get_container_client
+from astro_tools.utils import profiling
+from astro_tools.utils.compression import CODEC_METADATA_KEY, CRC_METADATA_KEY, SIZE_METADATA_KEY, iter_decompressed
+from astro_tools.utils.logging import add_file_handler, get_logger, queue_logging
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from azure.storage.blob import ContainerClient
+
+_logger = get_logger(__name__)
+
+
+@click.command("download")  # type: ignore[misc]
+@click.option("--prefix", help="The prefix of the blobs to download.", required=True)  # type: ignore[misc]
+@click.option(  # type: ignore[misc]
+    "--output_dir",
+    type=click.Path(file_okay=False, dir_okay=True, path_type=Path),
+    required=True,
+    help="The directory to download the blobs to - blob names relative to the prefix are kept.",
+)
+@click.option(  # type: ignore[misc]
+    "--log_dir",
+    required=True,
+    type=click.Path(file_okay=False, dir_okay=True, path_type=Path),
+    help="The path to the log directory.",
+)
+@click.option(  # type: ignore[misc]
+    "--container",
+    default="datasets",
+    help="The name of the  blob container.",
+)
+@click.option(  # type: ignore[misc]
+    "--workers",
+    default=4,
+    help="The number of worker threads to use for downloading.",
+)
+@click.option(  # type: ignore[misc]
+    "--verify_only",
+    default=False,
+    is_flag=True,
+    help="Do not download anything - compare files in the output directory with the blobs instead.",
+)
+def blob_download(
+    prefix: str,
+    output_dir: Path,
+    log_dir: Path,
+    container: str = "datasets",
+    workers: int = 4,
+    *,
+    verify_only: bool = False,
+) -> None:
+    """Downloads (or verifies) blobs under the prefix, decompressing blobs uploaded with compression."""
+    log_dir.mkdir(parents=True, exist_ok=True)
+
+    add_file_handler(_logger, log_dir / "blob_download.log")
+    with queue_logging(_logger):
+        _blob_download(prefix, output_dir, log_dir, container, workers, verify_only=verify_only)
+
+
+def _blob_download(
+    prefix: str,
+    output_dir: Path,
+    log_dir: Path,
+    container: str,
+    workers: int,
+    *,
+    verify_only: bool,
+) -> None:
+    """Lists blobs under the prefix and downloads or verifies them in parallel."""
+    container_client = get_container_client(container, concurrency=workers)
+    prefix = prefix.strip("/")
+
+    with profiling.span("blob.download.list_blobs", container=container, prefix=prefix):
+        blob_names = sorted(blob.name for blob in container_client.list_blobs(name_starts_with=f"{prefix}/"))
+
+    if not blob_names:
+        _logger.warning("No blobs found under '%s'.", prefix)
+        return
+
+    func = verify_file if verify_only else download_file
+    failed: list[str] = []
+    total_size = 0
+    start_time = time.time()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(func, container_client, blob_name, output_dir / blob_name[len(prefix) + 1 :]): blob_name
+            for blob_name in blob_names
+        }
+        with tqdm(total=len(futures), unit="file") as pbar:
+            for future in as_completed(futures):
+                blob_name = futures[future]
+                try:
+                    total_size += future.result()
+                except Exception as ex:  # noqa: BLE001
+                    _logger.error("Blob %s failed: %s", blob_name, ex)  # noqa: TRY400
+                    failed.append(blob_name)
+                pbar.update(1)
+
+    (log_dir / "failed_blobs.txt").write_text("\n".join(sorted(failed)))
+
+    elapsed_time = time.time() - start_time
+    _logger.info(
+        "%s %d blobs (%s MB) in %s seconds, %d failed.",
+        "Verified" if verify_only else "Downloaded",
+        len(blob_names) - len(failed),
+        f"{total_size / (1024 * 1024):.2f}",
+        f"{elapsed_time:.2f}",
+        len(failed),
+    )
+
+
+def iter_blob_content(container_client: ContainerClient, blob_name: str) -> Iterator[bytes]:
+    """Streams the original content of the blob.
+
+    Blobs uploaded with compression are decompressed transparently, and the content is checked against the
+    original size and CRC-32 stored in blob metadata once the stream is exhausted.
+
+    Args:
+        container_client: The container client.
+        blob_name: The blob name.
+
+    Yields:
+        Consecutive chunks of the original content.
+
+    Raises:
+        ValueError: If the blob was compressed with an unknown codec, or the content does not match the metadata.
+
+    """
+    downloader = container_client.get_blob_client(blob_name).download_blob(max_concurrency=1)
+    metadata = downloader.properties.metadata or {}
+    codec = metadata.get(CODEC_METADATA_KEY, "none")
+    if codec not in {"none", "gzip"}:
+        msg = f"Blob {blob_name} was compressed with an unsupported codec: {codec}"
+        raise ValueError(msg)
+
+    chunks = downloader.chunks() if codec == "none" else iter_decompressed(downloader.chunks())
+    size = 0
+    crc = 0
+    for chunk in chunks:
+        size += len(chunk)
+        crc = zlib.crc32(chunk, crc)
+        yield chunk
+
+    if (expected_size := metadata.get(SIZE_METADATA_KEY)) is not None and int(expected_size) != size:
+        msg = f"Blob {blob_name} size mismatch: expected {expected_size} bytes, got {size}"
+        raise ValueError(msg)
+    if (expected_crc := metadata.get(CRC_METADATA_KEY)) is not None and int(expected_crc, 16) != crc:
+        msg = f"Blob {blob_name} CRC-32 mismatch: expected {expected_crc}, got {crc:08x}"
+        raise ValueError(msg)
+    profiling.increment("blob.download.bytes", size)
+
+
+def download_file(container_client: ContainerClient, blob_name: str, path: Path) -> int:
+    """Downloads the blob to a file, restoring the original content of compressed blobs.
+
+    The content is written to a temporary file next to the target, which replaces the target only after the
+    whole blob was downloaded and verified.
+
+    Args:
+        container_client: The container client.
+        blob_name: The blob name.
+        path: The output file path.
+
+    Returns:
+        The number of written bytes.
+
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.part")
+    size = 0
+    try:
+        with tmp_path.open("wb") as fh:
+            for chunk in iter_blob_content(container_client, blob_name):
+                fh.write(chunk)
+                size += len(chunk)
+        tmp_path.replace(path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return size
+
+
+def verify_file(container_client: ContainerClient, blob_name: str, path: Path) -> int:
+    """Compares a local file with the original content of the blob.
+
+    Args:
+        container_client: The container client.
+        blob_name: The blob name.
+        path: The local file path.
+
+    Returns:
+        The number of compared bytes.
+
+    Raises:
+        ValueError: If the file differs from the blob.
+
+    """
+    size = 0
+    with path.open("rb") as fh:
+        for chunk in iter_blob_content(container_client, blob_name):
+            if fh.read(len(chunk)) != chunk:
+                msg = f"File {path} differs from blob {blob_name} after {size} bytes"
+                raise ValueError(msg)
+            size += len(chunk)
+        if fh.read(1):
+            msg = f"File {path} is longer than blob {blob_name} ({size} bytes)"
+            raise ValueError(msg)
+    return size
@@ -0,0 +1,113 @@
+"""Selective extraction of members from zip archives stored in Blob Storage."""
+
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+from __future__ import annotations
+
+import fnmatch
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import click
+
+from astro_tools.core import consts
+from astro_tools.core.clients import get_container_client
+from astro_tools.utils.logging import get_logger
+from astro_tools.utils.remote_zip import extract_members
+
+if TYPE_CHECKING:
+    import zipfile
+    from collections.abc import Callable, Sequence
+
+_logger = get_logger(__name__)
+
+CHANNELS = tuple(dict.fromkeys(consts.channels.CHANNEL_LOOKUP.values()))
+"""Channel letters accepted by `--channel`."""
+
+
+@click.command("extract")  # type: ignore[misc]
+@click.option(  # type: ignore[misc]
+    "--blob",
+    "blobs",
+    multiple=True,
+    required=True,
+    help="The blob name of the zip archive. Can be used multiple times.",
+)
+@click.option(  # type: ignore[misc]
+    "--output_dir",
+    type=click.Path(file_okay=False, dir_okay=True, path_type=Path),
+    required=True,
+    help="The directory to extract the members to - member paths are preserved.",
+)
+@click.option(  # type: ignore[misc]
+    "--pattern",
+    multiple=True,
+    help="Glob pattern matched against member paths and names, e.g. '*_300s_*.fits'. Can be used multiple times.",
+)
+@click.option(  # type: ignore[misc]
+    "--channel",
+    type=click.Choice(CHANNELS, case_sensitive=False),
+    multiple=True,
+    help="Extract only frames of the channel (see `CHANNEL_LOOKUP`). Can be used multiple times.",
+)
+@click.option(  # type: ignore[misc]
+    "--container",
+    default="datasets",
+    help="The name of the  blob container.",
+)
+@click.option(  # type: ignore[misc]
+    "--workers",
+    default=8,
+    help="The number of concurrent range requests.",
+)
+@click.option(  # type: ignore[misc]
+    "--password",
+    envvar="ZIP_PASSWORD",
+    show_envvar=True,
+    prompt="Archive password",
+    prompt_required=False,
+    hide_input=True,
+    default=None,
+    help="The password of encrypted archives. Pass the flag without a value to be prompted for it.",
+)
+def blob_extract(
+    blobs: Sequence[str],
+    output_dir: Path,
+    pattern: Sequence[str] = (),
+    channel: Sequence[str] = (),
+    container: str = "datasets",
+    workers: int = 8,
+    password: str | None = None,
+) -> None:
+    """Extracts selected members of zip archives in Blob Storage without downloading whole archives."""
+    container_client = get_container_client(container, concurrency=workers)
+    select = member_filter(pattern, channel)
+    for blob_name in blobs:
+        extracted = extract_members(
+            container_client.get_blob_client(blob_name), output_dir, select, workers=workers, password=password
+        )
+        _logger.info("Extracted %d files from %s", len(extracted), blob_name)
+
+
+def member_filter(patterns: Sequence[str] = (), channels: Sequence[str] = ()) -> Callable[[zipfile.ZipInfo], bool]:
+    """Builds the predicate selecting archive members.
+
+    Args:
+        patterns: Glob patterns matched against member paths and file names - any pattern has to match.
+        channels: Channel letters - the channel detected from the member name has to be one of them.
+
+    Returns:
+        A predicate accepting members that pass both filters - empty filters accept all members.
+
+    """
+    channel_set = {c.upper() for c in channels}
+
+    def select(info: zipfile.ZipInfo) -> bool:
+        name = info.filename
+        if patterns and not any(
+            fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(Path(name).name, pattern) for pattern in patterns
+        ):
+            return False
+        return not channel_set or consts.channels.detect_channel(Path(name).name) in channel_set
+
+    return select
@@ -4,23 +4,47 @@
 #  Licensed under MIT License.
 from __future__ import annotations
 
-import logging
+import contextlib
+import fnmatch
+import os
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
 from pathlib import Path
+from typing import TYPE_CHECKING, get_args
 
 import click
-from azure.storage.blob import BlobServiceClient, ContainerClient
-from tqdm import tqdm
+from azure.core import MatchConditions
+from azure.storage.blob import BlobBlock
+
+from astro_tools.core.clients import get_container_client
+from astro_tools.utils import profiling
+from astro_tools.utils.compression import (
+    CHUNK_SIZE,
+    CODEC_METADATA_KEY,
+    CRC_METADATA_KEY,
+    SIZE_METADATA_KEY,
+    Codec,
+    iter_compressed_chunks,
+)
+from astro_tools.utils.logging import add_file_handler, get_logger, queue_logging
+from astro_tools.utils.processes import process_pool
+from astro_tools.utils.progress import ByteProgress, ProgressReader, TokenBucket
+from astro_tools.utils.scanning import incremental_scan
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+    from concurrent.futures import Executor
 
-from astro_tools.core.settings import current_settings
-from astro_tools.utils.logging import get_logger
+    from azure.storage.blob import ContainerClient
 
 _logger = get_logger(__name__)
 
 # CONFIG
 PREFIX = "whwang/gdrive-export"
 LOCAL_DIRECTORY = "/content/drive/MyDrive/Other/Astrophoto_Release/"
+COMPRESS_PATTERNS = ("*.fits", "*.fit", "*.fts")
+"""File name patterns compressed by default when compression is enabled."""
 
 
 @click.command("upload")  # type: ignore[misc]
@@ -33,7 +57,8 @@ LOCAL_DIRECTORY = "/content/drive/MyDrive/Other/Astrophoto_Release/"
 @click.option(  # type: ignore[misc]
     "--lookup_file",
     type=click.Path(file_okay=True, dir_okay=False, path_type=Path),
-    help="The lookup file path to be used instead of listing the contents of the source directory.",
+    help="The lookup file path to be used instead of listing the contents of the source directory. "
+    "If not provided, the source directory is scanned incrementally using a manifest saved in the log directory.",
 )
 @click.option(  # type: ignore[misc]
     "--log_dir",
@@ -52,39 +77,131 @@ LOCAL_DIRECTORY = "/content/drive/MyDrive/Other/Astrophoto_Release/"
     default=4,
     help="The number of worker threads to use for uploading.",
 )
-def blob_upload(
+@click.option(  # type: ignore[misc]
+    "--compress",
+    type=click.Choice(get_args(Codec)),
+    default="none",
+    help="Codec used to compress matching files before upload. Compressed blobs keep their names, "
+    "the codec and the original size are stored in blob metadata.",
+)
+@click.option(  # type: ignore[misc]
+    "--compress_level",
+    type=click.IntRange(1, 9),
+    default=6,
+    help="The compression level - 1 is the fastest, 9 compresses best.",
+)
+@click.option(  # type: ignore[misc]
+    "--compress_pattern",
+    multiple=True,
+    default=COMPRESS_PATTERNS,
+    help="File name pattern of files to compress. Can be used multiple times. Defaults to FITS files.",
+)
+@click.option(  # type: ignore[misc]
+    "--compress_workers",
+    type=int,
+    default=None,
+    help="The number of processes used for compression. Defaults to the number of CPUs.",
+)
+@click.option(  # type: ignore[misc]
+    "--max_mbps",
+    type=click.FloatRange(min=0, min_open=True),
+    default=None,
+    help="Upload bandwidth cap in MB/s shared by all workers. Unlimited if not provided.",
+)
+@click.option(  # type: ignore[misc]
+    "--progress_file",
+    type=click.Path(file_okay=True, dir_okay=False, path_type=Path),
+    default=None,
+    help="JSON file updated every few seconds with uploaded bytes, throughput and ETA for external monitoring.",
+)
+def blob_upload(  # noqa: PLR0913, PLR0917
     source_dir: Path,
     log_dir: Path,
     prefix: str,
     lookup_file: Path | None = None,
     container: str = "datasets",
     workers: int = 4,
+    compress: Codec = "none",
+    compress_level: int = 6,
+    compress_pattern: Sequence[str] = COMPRESS_PATTERNS,
+    compress_workers: int | None = None,
+    max_mbps: float | None = None,
+    progress_file: Path | None = None,
 ) -> None:
     """Uploads files from source directory to specified Blob Storage container."""
-    settings = current_settings()
     source_dir = source_dir.resolve().absolute()
     log_dir.mkdir(parents=True, exist_ok=True)
 
-    _logger.addHandler(logging.FileHandler(log_dir / "blob_upload.log"))
-
-    blob_service_client = BlobServiceClient.from_connection_string(settings.blob.connection_string)
-    container_client = blob_service_client.get_container_client(container)
-
-    if lookup_file is None:
-        lookup_file = log_dir / "file_lookup.txt"
+    add_file_handler(_logger, log_dir / "blob_upload.log")
+    with queue_logging(_logger):
+        _blob_upload(
+            source_dir,
+            log_dir,
+            prefix,
+            lookup_file,
+            container,
+            workers,
+            compression=UploadCompression(
+                codec=compress,
+                level=compress_level,
+                patterns=tuple(compress_pattern),
+                workers=compress_workers or os.cpu_count() or 1,
+            ),
+            max_mbps=max_mbps,
+            progress_file=progress_file,
+        )
+
+
+@dataclass(frozen=True)
+class UploadCompression:
+    """Compression applied to uploaded files."""
+
+    codec: Codec = "none"
+    """The codec - `none` disables compression."""
+    level: int = 6
+    """The compression level (1-9)."""
+    patterns: tuple[str, ...] = COMPRESS_PATTERNS
+    """File name patterns of files to compress."""
+    workers: int = 1
+    """Number of compression processes."""
+
+    def matches(self, path: Path) -> bool:
+        """Checks if the file should be compressed.
+
+        Args:
+            path: The file path.
+
+        Returns:
+            `True` if compression is enabled and the file name matches any of the patterns.
+
+        """
+        return self.codec != "none" and any(fnmatch.fnmatch(path.name.lower(), pattern) for pattern in self.patterns)
+
+
+def _blob_upload(
+    source_dir: Path,
+    log_dir: Path,
+    prefix: str,
+    lookup_file: Path | None,
+    container: str,
+    workers: int,
+    compression: UploadCompression | None = None,
+    max_mbps: float | None = None,
+    progress_file: Path | None = None,
+) -> None:
+    """Lists local and already uploaded files and uploads the missing ones."""
+    container_client = get_container_client(container, concurrency=workers)
 
     prefix = prefix.strip("/")
 
-    # Load lookup files
-    if lookup_file.exists():
-        all_files = {Path(line) for line in lookup_file.read_text().splitlines()}
-    else:
-        all_files = {
-            Path(fp)
-            for fp in tqdm(source_dir.rglob("*"), desc=f"Listing files under: {source_dir.name}")
-            if fp.is_file()
-        }
-        lookup_file.write_text("\n".join([fp.as_posix() for fp in sorted(all_files)]))
+    # Explicit lookup file is trusted as is, otherwise the source directory is scanned incrementally
+    with profiling.span("blob.upload.list_files", source_dir=source_dir.as_posix()):
+        if lookup_file is not None and lookup_file.exists():
+            all_files = {Path(line) for line in lookup_file.read_text().splitlines()}
+        else:
+            all_files = set(incremental_scan(source_dir, log_dir / "scan-manifest.json.gz", workers=workers).paths())
+            lookup_file = lookup_file or log_dir / "file_lookup.txt"
+            lookup_file.write_text("\n".join([fp.as_posix() for fp in sorted(all_files)]))
 
     all_files = {path.relative_to(source_dir) for path in all_files}
 
@@ -96,7 +213,8 @@ def blob_upload(
     _logger.info("File count before deduplication: %d", len(all_files))
     _logger.info("Scanning Azure Blob Storage for existing blobs under '%s'...", prefix)
 
-    existing_blobs = _list_existing_blobs(container_client, prefix)
+    with profiling.span("blob.upload.list_existing_blobs", container=container, prefix=prefix):
+        existing_blobs = _list_existing_blobs(container_client, prefix)
     existing_relative_paths = {
         Path(blob_name[len(prefix) + 1 :]) for blob_name in existing_blobs
     }  # remove prefix from paths
@@ -120,6 +238,9 @@ def blob_upload(
         container_client=container_client,
         max_workers=workers,
         prefix=prefix,
+        compression=compression,
+        bucket=TokenBucket.from_mbps(max_mbps),
+        progress_file=progress_file,
     )
 
 
@@ -146,13 +267,137 @@ def _upload_single_file(
     base_path: Path,
     container_client: ContainerClient,
     prefix: str,
+    parent: profiling.Span | None = None,
+    compression: UploadCompression | None = None,
+    executor: Executor | None = None,
+    progress: ByteProgress | None = None,
+    bucket: TokenBucket | None = None,
 ) -> tuple[str, int]:
     """Upload one file if it doesn't exist."""
     blob_name = f"{prefix}/" + str(path.relative_to(base_path)).replace("\\", "/")
+    with profiling.span("blob.upload.file", parent=parent, blob=blob_name):
+        if compression is not None and executor is not None and compression.matches(path):
+            size = upload_compressed_file(
+                container_client,
+                path,
+                blob_name,
+                executor,
+                level=compression.level,
+                progress=progress,
+                bucket=bucket,
+            )
+        else:
+            size = upload_file(container_client, path, blob_name, progress=progress, bucket=bucket)
+    return blob_name, size  # Return size of uploaded file
+
+
+def upload_file(
+    container_client: ContainerClient,
+    path: Path,
+    blob_name: str,
+    *,
+    overwrite: bool = False,
+    max_concurrency: int = 1,
+    progress: ByteProgress | None = None,
+    bucket: TokenBucket | None = None,
+) -> int:
+    """Uploads a file by streaming it from an open file handle - the file is never loaded into memory at once.
+
+    Args:
+        container_client: The container client.
+        path: The file path.
+        blob_name: The blob name.
+        overwrite: Whether to replace an existing blob.
+        max_concurrency: Number of parallel connections used to upload blocks of a large file.
+        progress: Progress fed with the bytes read from the file while they are uploaded.
+        bucket: Token bucket limiting the upload rate.
+
+    Returns:
+        The number of uploaded bytes.
+
+    """
+    size = path.stat().st_size
+    with path.open("rb") as fh:
+        reader = ProgressReader(fh, progress, bucket)
+        try:
+            container_client.get_blob_client(blob_name).upload_blob(
+                reader, length=size, overwrite=overwrite, max_concurrency=max_concurrency
+            )
+        finally:
+            if progress is not None:
+                # Bytes of failed uploads are counted as done, so the ETA stays consistent with the remaining files
+                progress.file_done(max(size - reader.bytes_read, 0))
+    return size
+
+
+def upload_compressed_file(
+    container_client: ContainerClient,
+    path: Path,
+    blob_name: str,
+    executor: Executor,
+    *,
+    level: int = 6,
+    overwrite: bool = False,
+    chunk_size: int = CHUNK_SIZE,
+    progress: ByteProgress | None = None,
+    bucket: TokenBucket | None = None,
+) -> int:
+    """Uploads a gzip compressed file, compressing chunks in the executor while earlier chunks are uploaded.
+
+    Every compressed chunk is staged as a separate block and the blob is written by committing the block list.
+    The codec, the original size and the CRC-32 of the original content are stored in blob metadata, so
+    downloads can restore and verify the original file.
+
+    Args:
+        container_client: The container client.
+        path: The file path.
+        blob_name: The blob name.
+        executor: The executor used for compression - a process pool to use multiple cores.
+        level: The compression level (1-9).
+        overwrite: Whether to replace an existing blob.
+        chunk_size: The uncompressed chunk size - determines the block size.
+        progress: Progress fed with the original (uncompressed) bytes of staged blocks.
+        bucket: Token bucket limiting the upload rate - applied to compressed bytes.
+
+    Returns:
+        The number of uploaded (compressed) bytes.
+
+    """
     blob_client = container_client.get_blob_client(blob_name)
-    file_data = path.read_bytes()
-    blob_client.upload_blob(file_data)
-    return blob_name, len(file_data)  # Return size of uploaded file
+    block_list = []
+    original_size = 0
+    crc = 0
+    uploaded = 0
+    try:
+        for index, (chunk, size, running_crc) in enumerate(
+            iter_compressed_chunks(path, executor, level=level, chunk_size=chunk_size)
+        ):
+            if bucket is not None:
+                bucket.acquire(len(chunk))
+            # Block IDs must have the same length within a blob
+            block_id = f"{index:08d}"
+            blob_client.stage_block(block_id, chunk, length=len(chunk))
+            block_list.append(BlobBlock(block_id=block_id))
+            original_size += size
+            crc = running_crc
+            uploaded += len(chunk)
+            if progress is not None:
+                progress.update(size)
+        blob_client.commit_block_list(
+            block_list,
+            metadata={
+                CODEC_METADATA_KEY: "gzip",
+                SIZE_METADATA_KEY: str(original_size),
+                CRC_METADATA_KEY: f"{crc:08x}",
+            },
+            match_condition=None if overwrite else MatchConditions.IfMissing,
+        )
+    finally:
+        if progress is not None:
+            progress.file_done(max(path.stat().st_size - original_size, 0))
+    profiling.increment("blob.upload.compressed_files")
+    profiling.increment("blob.upload.original_bytes", original_size)
+    return uploaded
 
 
 def _upload_files_parallel(
@@ -161,12 +406,24 @@ def _upload_files_parallel(
     container_client: ContainerClient,
     prefix: str,
     max_workers: int = 2,
+    compression: UploadCompression | None = None,
+    bucket: TokenBucket | None = None,
+    progress_file: Path | None = None,
 ) -> None:
     """Uploads selected files to Blob Storage in parallel."""
     total_size_uploaded = 0
     start_time = time.time()
-
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+    parent = profiling.current_span()
+    total_bytes = sum(path.stat().st_size for path in files_to_upload)
+
+    with contextlib.ExitStack() as stack:
+        compression_executor = None
+        if compression is not None and compression.codec != "none":
+            compression_executor = stack.enter_context(process_pool(max_workers=compression.workers))
+        executor = stack.enter_context(ThreadPoolExecutor(max_workers=max_workers))
+        progress = stack.enter_context(
+            ByteProgress(total_bytes, files=len(files_to_upload), desc="Uploading", snapshot_file=progress_file)
+        )
         futures = [
             executor.submit(
                 _upload_single_file,
@@ -174,17 +431,23 @@ def _upload_files_parallel(
                 base_path,
                 container_client,
                 prefix,
+                parent,
+                compression,
+                compression_executor,
+                progress,
+                bucket,
             )
             for path in files_to_upload
         ]
 
-        with tqdm(total=len(futures), unit="file") as pbar:
-            for future in as_completed(futures):
-                blob_name, size_uploaded = future.result()
-                if size_uploaded > 0:
-                    total_size_uploaded += size_uploaded
-                pbar.set_description(f"Last: {blob_name} ({size_uploaded / 1024 / 1024:.2f} MB)")
-                pbar.update(1)
+        for future in as_completed(futures):
+            blob_name, size_uploaded = future.result()
+            if size_uploaded > 0:
+                total_size_uploaded += size_uploaded
+            profiling.increment("blob.upload.files")
+            profiling.increment("blob.upload.bytes", size_uploaded)
+            profiling.observe("blob.upload.file_size_bytes", size_uploaded)
+            _logger.debug("Uploaded %s (%s MB)", blob_name, f"{size_uploaded / 1024 / 1024:.2f}")
 
     elapsed_time = time.time() - start_time
     throughput = (total_size_uploaded / (1024 * 1024)) / elapsed_time  # MB/sec
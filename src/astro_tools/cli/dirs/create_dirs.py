@@ -4,26 +4,232 @@
 
 from __future__ import annotations
 
-from pathlib import Path
+import csv
+import itertools
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path, PurePosixPath
+from typing import TYPE_CHECKING
 
 import click
 from tqdm import tqdm
 
+from astro_tools.utils import profiling
+from astro_tools.utils.logging import get_logger
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping, Sequence
+
+_logger = get_logger(__name__)
+
+DEFAULT_TEMPLATE = "{name}"
+"""Default path template - one directory per line of the names file."""
+
 
 @click.command("create")  # type: ignore[misc]
 @click.option(  # type: ignore[misc]
     "--names_fp",
     type=click.Path(exists=True, file_okay=True, dir_okay=False, resolve_path=True, path_type=Path),
-    help="Names file - one dir name per line",
+    help="Names file - one dir name per line, available as `{name}` in the template",
+)
+@click.option(  # type: ignore[misc]
+    "--catalog_fp",
+    type=click.Path(exists=True, file_okay=True, dir_okay=False, resolve_path=True, path_type=Path),
+    help="CSV catalog with a header row - every column is available in the template, e.g. `{target}`",
 )
 @click.option(  # type: ignore[misc]
     "--target_dir",
     type=click.Path(exists=True, file_okay=False, dir_okay=True, resolve_path=True, path_type=Path),
     help="Target directory where new sub-directories will be created",
 )
-def create_dirs(names_fp: Path, target_dir: Path) -> None:
-    """Creates directories based on file with dir names."""
-    names = names_fp.read_text().splitlines()
+@click.option(  # type: ignore[misc]
+    "--template",
+    default=DEFAULT_TEMPLATE,
+    show_default=True,
+    help="Path template relative to the target directory, e.g. `{target}/{telescope}/{channel}`",
+)
+@click.option(  # type: ignore[misc]
+    "--values",
+    "values",
+    multiple=True,
+    help="Template variable with a comma separated list of values, e.g. `channel=L,R,G,B`. "
+    "Every names file line or catalog row is combined with every value. Can be used multiple times.",
+)
+@click.option(  # type: ignore[misc]
+    "--workers",
+    default=16,
+    show_default=True,
+    help="Number of threads creating directories concurrently",
+)
+def create_dirs(
+    target_dir: Path,
+    names_fp: Path | None = None,
+    catalog_fp: Path | None = None,
+    template: str = DEFAULT_TEMPLATE,
+    values: Sequence[str] = (),
+    workers: int = 16,
+) -> None:
+    """Creates directories based on file with dir names or a catalog expanded with a path template."""
+    if names_fp is None and catalog_fp is None and not values:
+        msg = "Provide --names_fp, --catalog_fp or --values"
+        raise click.UsageError(msg)
+
+    rows: list[dict[str, str]] = [{}]
+    if names_fp is not None:
+        rows = [{"name": line.strip()} for line in names_fp.read_text().splitlines() if line.strip()]
+    if catalog_fp is not None:
+        catalog = read_catalog(catalog_fp)
+        rows = [{**row, **entry} for row in rows for entry in catalog] if names_fp is not None else catalog
+
+    try:
+        paths = expand_template(template, rows, parse_values(values))
+    except (KeyError, ValueError) as ex:
+        msg = f"Cannot expand template {template!r}: {ex}"
+        raise click.BadParameter(msg, param_hint="--template") from ex
+
     target_dir.mkdir(parents=True, exist_ok=True)
-    for name in tqdm(names, desc="Creating dirs"):
-        (target_dir / name).mkdir(parents=True, exist_ok=True)
+    created = create_tree(target_dir, paths, workers=workers)
+    _logger.info("Created %d of %d directories under %s", created, len(paths), target_dir.as_posix())
+
+
+def read_catalog(path: Path) -> list[dict[str, str]]:
+    """Reads a CSV catalog.
+
+    Args:
+        path: The CSV file path - the first row holds column names.
+
+    Returns:
+        Catalog rows with stripped values.
+
+    """
+    with path.open(newline="") as fh:
+        return [{key.strip(): (value or "").strip() for key, value in row.items() if key} for row in csv.DictReader(fh)]
+
+
+def parse_values(items: Iterable[str]) -> dict[str, list[str]]:
+    """Parses `key=a,b,c` template variable definitions.
+
+    Args:
+        items: The definitions.
+
+    Returns:
+        A mapping between variable names and their values.
+
+    Raises:
+        ValueError: If a definition is malformed.
+
+    """
+    values: dict[str, list[str]] = {}
+    for item in items:
+        key, sep, raw = item.partition("=")
+        if not sep or not key.strip():
+            msg = f"Expected key=value[,value...], got {item!r}"
+            raise ValueError(msg)
+        values[key.strip()] = [value.strip() for value in raw.split(",") if value.strip()]
+    return values
+
+
+def expand_template(
+    template: str,
+    rows: Iterable[Mapping[str, str]],
+    values: Mapping[str, Sequence[str]] | None = None,
+) -> list[str]:
+    """Expands the path template for every row and every combination of values.
+
+    Args:
+        template: The path template, e.g. `{target}/{telescope}/{channel}`.
+        rows: Template variables per row, e.g. names file lines or catalog rows.
+        values: Variables combined with every row, e.g. `{"channel": ["L", "R", "G", "B"]}`.
+
+    Returns:
+        Unique relative POSIX paths, sorted.
+
+    Raises:
+        KeyError: If the template uses an undefined variable.
+        ValueError: If an expanded path is empty, absolute or points outside the target directory.
+
+    """
+    values = values or {}
+    keys = list(values)
+    paths = set()
+    for row in rows:
+        for combination in itertools.product(*(values[key] for key in keys)):
+            raw = template.format_map({**row, **dict(zip(keys, combination, strict=True))})
+            path = PurePosixPath(raw.replace("\\", "/"))
+            if not path.parts or path.is_absolute() or ".." in path.parts:
+                msg = f"Invalid directory path: {raw!r}"
+                raise ValueError(msg)
+            paths.add(path.as_posix())
+    return sorted(paths)
+
+
+def create_tree(target_dir: Path, paths: Iterable[str], workers: int = 16) -> int:
+    """Creates the directories level by level.
+
+    Paths are expanded with their parents and deduplicated, so every directory is created at most once and never
+    with `parents=True`. Existing directories are found with a single listing of each parent that existed before -
+    directories created in this run are known to be empty. Missing directories of a level are created
+    concurrently.
+
+    Args:
+        target_dir: The existing target directory.
+        paths: Relative POSIX paths of the directories.
+        workers: Number of threads.
+
+    Returns:
+        Number of created directories.
+
+    """
+    levels: dict[int, set[PurePosixPath]] = defaultdict(set)
+    for raw in paths:
+        path = PurePosixPath(raw)
+        for depth in range(1, len(path.parts) + 1):
+            levels[depth].add(PurePosixPath(*path.parts[:depth]))
+
+    new_dirs: set[PurePosixPath] = set()
+    total = sum(len(level) for level in levels.values())
+    with (
+        ThreadPoolExecutor(max_workers=workers) as executor,
+        tqdm(total=total, desc="Creating dirs", unit="dir") as pbar,
+        profiling.span("dirs.create", target_dir=target_dir.as_posix(), dirs=total),
+    ):
+        for depth in sorted(levels):
+            children: dict[PurePosixPath, list[PurePosixPath]] = defaultdict(list)
+            for path in sorted(levels[depth]):
+                children[path.parent].append(path)
+
+            existing_parents = [parent for parent in children if parent not in new_dirs]
+            listings = dict(
+                zip(existing_parents, executor.map(lambda p: _list_dirs(target_dir / p), existing_parents), strict=True)
+            )
+
+            missing = [
+                path
+                for parent, level_paths in children.items()
+                for path in level_paths
+                if path.name not in listings.get(parent, set())
+            ]
+            for path, created in zip(missing, executor.map(lambda p: _mkdir(target_dir / p), missing), strict=True):
+                pbar.update(1)
+                if created:
+                    new_dirs.add(path)
+                    profiling.increment("dirs.created")
+            pbar.update(len(levels[depth]) - len(missing))
+
+    return len(new_dirs)
+
+
+def _list_dirs(path: Path) -> set[str]:
+    """Lists names of sub-directories."""
+    with os.scandir(path) as entries:
+        return {entry.name for entry in entries if entry.is_dir()}
+
+
+def _mkdir(path: Path) -> bool:
+    """Creates a single directory, tolerating concurrent creation."""
+    try:
+        path.mkdir()
+    except FileExistsError:
+        return False
+    return True
@@ -0,0 +1,4 @@
+"""Light frame related CLI functions and classes."""
+
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
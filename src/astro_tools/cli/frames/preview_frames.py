@@ -0,0 +1,108 @@
+"""Fast FITS frame preview generation."""
+
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+from __future__ import annotations
+
+import shutil
+from concurrent.futures import as_completed
+from pathlib import Path
+
+import click
+from tqdm import tqdm
+
+from astro_tools.imaging.preview import PreviewCache, cached_preview
+from astro_tools.imaging.sources import FrameSource, iter_frame_sources
+from astro_tools.utils import profiling
+from astro_tools.utils.logging import get_logger
+from astro_tools.utils.processes import process_pool
+
+_logger = get_logger(__name__)
+
+
+@click.command("preview")  # type: ignore[misc]
+@click.option(  # type: ignore[misc]
+    "--source",
+    type=click.Path(exists=True, file_okay=True, dir_okay=True, path_type=Path, resolve_path=True),
+    required=True,
+    help="Directory with FITS files and/or zip archives, a single zip archive or a single FITS file",
+)
+@click.option(  # type: ignore[misc]
+    "--output_dir",
+    type=click.Path(file_okay=False, dir_okay=True, path_type=Path, resolve_path=True),
+    required=True,
+    help="Directory where PNG previews will be saved",
+)
+@click.option(  # type: ignore[misc]
+    "--cache_dir",
+    type=click.Path(file_okay=False, dir_okay=True, path_type=Path, resolve_path=True),
+    help="Preview cache directory - defaults to `.cache` inside the output directory",
+)
+@click.option(  # type: ignore[misc]
+    "--size",
+    default=512,
+    show_default=True,
+    help="Maximum preview size in pixels",
+)
+@click.option(  # type: ignore[misc]
+    "--workers",
+    default=4,
+    show_default=True,
+    help="Number of worker processes",
+)
+def preview_frames(source: Path, output_dir: Path, size: int, workers: int, cache_dir: Path | None = None) -> None:
+    """Generates stretched PNG previews for frames on disk and inside zip archives."""
+    cache_dir = cache_dir or output_dir / ".cache"
+    cache = PreviewCache(cache_dir)
+    index = cache.load_index()
+    sources = list(iter_frame_sources(source))
+    _logger.info("Found %d FITS frame(s) under %s", len(sources), source.as_posix())
+
+    rendered = failed = 0
+    with process_pool(max_workers=workers) as executor:
+        future_to_source = {
+            profiling.submit(executor, cached_preview, frame, cache_dir, size, _known_hash(frame, index)): frame
+            for frame in sources
+        }
+        for future in tqdm(as_completed(future_to_source), total=len(sources), desc="Rendering previews", unit="frame"):
+            frame = future_to_source[future]
+            try:
+                cached_path, file_hash, was_rendered = future.result()
+            except Exception:
+                _logger.exception("Failed to render preview for %s", frame)
+                failed += 1
+                continue
+            rendered += was_rendered
+            if file_hash is not None:
+                stat = frame.path.stat()
+                index[frame.path.as_posix()] = (stat.st_size, stat.st_mtime_ns, file_hash)
+            destination = output_dir / _preview_name(frame, source)
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(cached_path, destination)
+
+    cache.save_index(index)
+    _logger.info(
+        "Previews for %d frame(s) saved to %s - %d rendered, %d reused from cache, %d failed",
+        len(sources) - failed,
+        output_dir.as_posix(),
+        rendered,
+        len(sources) - failed - rendered,
+        failed,
+    )
+
+
+def _known_hash(frame: FrameSource, index: dict[str, tuple[int, int, str]]) -> str | None:
+    """Returns the content hash of an unchanged file on disk from the index."""
+    if frame.member is not None or (entry := index.get(frame.path.as_posix())) is None:
+        return None
+    stat = frame.path.stat()
+    size, mtime_ns, file_hash = entry
+    return file_hash if (stat.st_size, stat.st_mtime_ns) == (size, mtime_ns) else None
+
+
+def _preview_name(frame: FrameSource, root: Path) -> Path:
+    """Output path of the preview relative to the output directory - mirrors the source layout."""
+    relative = frame.path.relative_to(root) if root.is_dir() else Path(frame.path.name)
+    if frame.member is None:
+        return relative.with_suffix(".png")
+    return relative.with_suffix("") / Path(frame.member).with_suffix(".png")
@@ -0,0 +1,96 @@
+"""Batch frame quality scoring."""
+
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+from __future__ import annotations
+
+import functools
+from pathlib import Path
+from typing import Any
+
+import click
+import pandas as pd
+from tqdm import tqdm
+
+from astro_tools.imaging.quality import score_frame
+from astro_tools.imaging.sources import iter_frame_sources
+from astro_tools.utils import profiling
+from astro_tools.utils.logging import get_logger
+from astro_tools.utils.processes import process_pool
+
+_logger = get_logger(__name__)
+
+
+@click.command("score")  # type: ignore[misc]
+@click.option(  # type: ignore[misc]
+    "--source",
+    type=click.Path(exists=True, file_okay=True, dir_okay=True, path_type=Path, resolve_path=True),
+    required=True,
+    help="Directory with FITS files and/or zip archives, a single zip archive or a single FITS file",
+)
+@click.option(  # type: ignore[misc]
+    "--output",
+    type=click.Path(file_okay=True, dir_okay=False, path_type=Path),
+    default="./frame-scores.parquet",
+    show_default=True,
+    help="Output table path - `.parquet` or `.csv`",
+)
+@click.option(  # type: ignore[misc]
+    "--downsample",
+    default=2,
+    show_default=True,
+    help="Binning factor applied to frames before computing the metrics",
+)
+@click.option(  # type: ignore[misc]
+    "--detection_sigma",
+    default=5.0,
+    show_default=True,
+    help="Star detection threshold in background standard deviations",
+)
+@click.option(  # type: ignore[misc]
+    "--workers",
+    default=4,
+    show_default=True,
+    help="Number of worker processes",
+)
+def score_frames(source: Path, output: Path, downsample: int, detection_sigma: float, workers: int) -> None:
+    """Scores frame quality (background, noise, star count, FWHM) for frames on disk and in zip archives."""
+    sources = list(iter_frame_sources(source))
+    _logger.info("Found %d FITS frame(s) under %s", len(sources), source.as_posix())
+    if not sources:
+        return
+
+    func = functools.partial(score_frame, downsample=downsample, detection_sigma=detection_sigma)
+    # Sources are sorted by archive, chunks keep workers reading members of the same (cached) archive
+    chunksize = max(1, min(32, len(sources) // (workers * 4)))
+    with process_pool(max_workers=workers) as executor:
+        rows = list(
+            tqdm(
+                profiling.map_tasks(executor, func, sources, chunksize=chunksize),
+                total=len(sources),
+                desc="Scoring frames",
+                unit="frame",
+            )
+        )
+
+    write_table(rows, output)
+    failed = [row for row in rows if row["error"]]
+    for row in failed:
+        _logger.error("Failed to score %s::%s - %s", row["path"], row["member"], row["error"])
+    _logger.info("Scored %d frame(s), %d failed. Results saved to %s", len(rows), len(failed), output.as_posix())
+
+
+def write_table(rows: list[dict[str, Any]], output: Path) -> None:
+    """Writes table rows to a Parquet or CSV file depending on the output suffix.
+
+    Args:
+        rows: The table rows.
+        output: The output path.
+
+    """
+    output.parent.mkdir(parents=True, exist_ok=True)
+    table = pd.DataFrame(rows)
+    if output.suffix.lower() == ".csv":
+        table.to_csv(output, index=False)
+    else:
+        table.to_parquet(output, index=False)
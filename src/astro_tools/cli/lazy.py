@@ -0,0 +1,106 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+"""Lazy loading of CLI subcommands.
+
+Command modules pull in heavy dependencies (Azure SDK, numpy, pandas...). Registering them through
+`LazyGroup` defers the import of a command module until the command is actually resolved, so that
+e.g. `astro-tools dir create --help` does not pay for importing the Azure SDK. Group help lists lazy commands
+with static short help strings, so `astro-tools --help` does not import any command module either.
+
+"""
+
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
+import click
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+
+class LazyGroup(click.Group):  # type: ignore[misc]
+    """Click group that imports its subcommands only when they are resolved."""
+
+    def __init__(
+        self,
+        *args: Any,
+        lazy_subcommands: Mapping[str, str] | None = None,
+        lazy_help: Mapping[str, str] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        """Initializes the group.
+
+        Args:
+            *args: Positional arguments passed to `click.Group`.
+            lazy_subcommands: A mapping between command names and import paths
+                in `"package.module:command"` format.
+            lazy_help: A mapping between lazy command names and help strings shown in the group help
+                instead of importing the command - commands without one are imported to get their help.
+            **kwargs: Keyword arguments passed to `click.Group`.
+
+        """
+        super().__init__(*args, **kwargs)
+        self.lazy_subcommands = dict(lazy_subcommands or {})
+        self.lazy_help = dict(lazy_help or {})
+
+    def list_commands(self, ctx: click.Context) -> list[str]:
+        """Lists both eagerly registered and lazy command names.
+
+        Args:
+            ctx: The click context.
+
+        Returns:
+            Sorted command names.
+
+        """
+        return sorted({*super().list_commands(ctx), *self.lazy_subcommands})
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> click.Command | None:
+        """Resolves a command, importing its module if the command is lazy.
+
+        Args:
+            ctx: The click context.
+            cmd_name: The command name.
+
+        Returns:
+            The command or `None` if there is no command with that name.
+
+        """
+        if cmd_name in self.lazy_subcommands:
+            return self._load(cmd_name)
+        return super().get_command(ctx, cmd_name)  # type: ignore[no-any-return]
+
+    def format_commands(self, ctx: click.Context, formatter: click.HelpFormatter) -> None:
+        """Writes the command list to the help, using static help strings of lazy commands.
+
+        Args:
+            ctx: The click context.
+            formatter: The help formatter.
+
+        """
+        names = self.list_commands(ctx)
+        if not names:
+            return
+        limit = formatter.width - 6 - max(len(name) for name in names)
+        rows = []
+        for name in names:
+            if name in self.lazy_help and name not in self.commands:
+                rows.append((name, click.Command(name, help=self.lazy_help[name]).get_short_help_str(limit)))
+                continue
+            command = self.get_command(ctx, name)
+            if command is None or command.hidden:
+                continue
+            rows.append((name, command.get_short_help_str(limit)))
+        if rows:
+            with formatter.section("Commands"):
+                formatter.write_dl(rows)
+
+    def _load(self, cmd_name: str) -> click.Command:
+        module_name, attr_name = self.lazy_subcommands[cmd_name].split(":", 1)
+        command = getattr(importlib.import_module(module_name), attr_name)
+        if not isinstance(command, click.Command):
+            msg = f"Lazy loading of '{self.lazy_subcommands[cmd_name]}' did not return a click command"
+            raise TypeError(msg)
+        return command
@@ -0,0 +1,4 @@
+"""Drop folder watching related CLI functions and classes."""
+
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
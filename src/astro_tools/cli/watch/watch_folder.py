@@ -0,0 +1,456 @@
+"""Watching a drop folder and pushing new archives through check, rename and upload."""
+
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Literal
+
+import click
+from azure.core.exceptions import ResourceExistsError
+
+from astro_tools.cli.blob.blob_upload import upload_file
+from astro_tools.cli.zips.check_zips import check_zip_fast, check_zip_full
+from astro_tools.cli.zips.rename_zips import renamed_path
+from astro_tools.core.clients import get_container_client
+from astro_tools.utils import profiling
+from astro_tools.utils.logging import add_file_handler, get_logger, queue_logging
+from astro_tools.utils.scanning import DirRecord, scan_tree
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from azure.storage.blob import ContainerClient
+
+_logger = get_logger(__name__)
+
+ArchiveStatus = Literal["checking", "renaming", "uploading", "uploaded", "exists", "corrupted", "failed"]
+"""Pipeline status of an archive."""
+_TERMINAL_STATUSES = {"uploaded", "exists", "corrupted"}
+MAX_RETRY_DELAY = 3600.0
+"""Upper bound of the delay in seconds before a failed archive is retried."""
+
+
+@dataclass
+class ArchiveRecord:
+    """Pipeline state of a single archive."""
+
+    path: str
+    """Current path relative to the watched directory - changes after renaming."""
+    size: int
+    """Archive size in bytes."""
+    status: ArchiveStatus
+    """Pipeline status."""
+    renamed: bool = False
+    """Whether the archive was already renamed."""
+    blob: str | None = None
+    """Name of the uploaded blob."""
+    error: str | None = None
+    """Error message of the failed stage."""
+    attempts: int = 0
+    """Number of failed attempts to process the archive."""
+
+
+@dataclass
+class _Candidate:
+    size: int
+    mtime_ns: int
+    since: float
+
+
+class ArchiveWatcher:
+    """Polls a directory for complete zip archives and processes them in a staged pipeline.
+
+    A new archive is considered complete once its size and modification time did not change for `settle` seconds.
+    Complete archives go through three stages, each with its own bounded thread pool:
+
+    1. structural check (`check_zip_fast`, or `check_zip_full` with `full_check=True`),
+    2. rename based on the channels of the member frames - a single worker, so that free names are picked safely,
+    3. upload streamed from an open file handle.
+
+    Pipeline state is saved to the state file after every transition, so a restarted watcher skips processed
+    archives and resumes interrupted ones from the stage they were in. Failed archives are retried from the stage
+    they failed in, after a delay that doubles with every failed attempt. Archives removed from the directory
+    are forgotten once they are processed, so the state does not grow with every archive ever seen.
+
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        container_client: ContainerClient,
+        prefix: str,
+        state_file: Path,
+        *,
+        settle: float = 30.0,
+        full_check: bool = False,
+        rename: bool = True,
+        check_workers: int = 2,
+        upload_workers: int = 4,
+        retry_delay: float = 60.0,
+    ) -> None:
+        """Initializes the watcher.
+
+        Args:
+            directory: The watched directory.
+            container_client: The blob container client.
+            prefix: The prefix for the blob names.
+            state_file: The pipeline state file path.
+            settle: Seconds without size or modification time change after which an archive is complete.
+            full_check: Whether to run the full (CRC) check instead of the fast (structural) one.
+            rename: Whether to rename archives based on their channels.
+            check_workers: Number of threads checking archives.
+            upload_workers: Number of threads uploading archives.
+            retry_delay: Seconds before the first retry of a failed archive - doubled after every failed attempt,
+                up to `MAX_RETRY_DELAY`.
+
+        """
+        self.directory = directory
+        self.container_client = container_client
+        self.prefix = prefix.strip("/")
+        self.state_file = state_file
+        self.settle = settle
+        self.full_check = full_check
+        self.rename = rename
+        self.retry_delay = retry_delay
+        self.records: dict[str, ArchiveRecord] = {}
+        self._known: set[str] = set()
+        self._candidates: dict[str, _Candidate] = {}
+        self._dirs: dict[str, DirRecord] = {}
+        self._retry_at: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._in_flight = 0
+        self._span = profiling.current_span()
+        self._check_executor = ThreadPoolExecutor(max_workers=check_workers, thread_name_prefix="watch-check")
+        self._rename_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="watch-rename")
+        self._upload_executor = ThreadPoolExecutor(max_workers=upload_workers, thread_name_prefix="watch-upload")
+        self._load_state()
+
+    def _load_state(self) -> None:
+        if not self.state_file.exists():
+            return
+        for key, record in json.loads(self.state_file.read_text()).items():
+            self.records[key] = ArchiveRecord(**record)
+            self._known.update({key, record["path"]})
+
+    def _save_state(self) -> None:
+        """Saves the state atomically - must be called with the lock held."""
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_file.with_name(f"{self.state_file.name}.tmp")
+        tmp_path.write_text(json.dumps({key: asdict(record) for key, record in self.records.items()}, indent=2))
+        tmp_path.replace(self.state_file)
+
+    def _update(self, key: str, **changes: object) -> None:
+        with self._lock:
+            record = self.records[key]
+            for name, value in changes.items():
+                setattr(record, name, value)
+            self._known.add(record.path)
+            self._save_state()
+
+    def _finish(self, key: str, **changes: object) -> None:
+        self._update(key, **changes)
+        with self._lock:
+            self._in_flight -= 1
+            self._idle.notify_all()
+
+    def _resubmit(self, key: str) -> None:
+        record = self.records[key]
+        with self._lock:
+            self._in_flight += 1
+        if record.renamed or record.status == "uploading":
+            self._submit(self._upload_executor, self._upload, key)
+        else:
+            self._submit(self._check_executor, self._check, key)
+
+    def resume(self) -> None:
+        """Resubmits archives interrupted by a previous run at the stage they were in."""
+        for key, record in list(self.records.items()):
+            if record.status not in _TERMINAL_STATUSES:
+                self._resubmit(key)
+
+    def retry_failed(self) -> None:
+        """Resubmits failed archives whose retry delay has passed."""
+        now = time.monotonic()
+        with self._lock:
+            due = [key for key, retry_at in self._retry_at.items() if retry_at <= now]
+            for key in due:
+                del self._retry_at[key]
+        for key in due:
+            _logger.info("Retrying %s (attempt %d)", key, self.records[key].attempts + 1)
+            self._resubmit(key)
+
+    def _forget(self, present: set[str]) -> None:
+        """Drops processed archives whose files are no longer in the directory."""
+        with self._lock:
+            gone = [
+                key
+                for key, record in self.records.items()
+                # Failed archives waiting for a retry are not in the pipeline and can be dropped as well
+                if (record.status in _TERMINAL_STATUSES or key in self._retry_at)
+                and record.path not in present
+                # The scan may have listed the directory before the archive was renamed
+                and not (self.directory / record.path).exists()
+            ]
+            stale = set()
+            for key in gone:
+                stale.update({key, self.records.pop(key).path})
+                self._retry_at.pop(key, None)
+            live = {path for key, record in self.records.items() for path in (key, record.path)}
+            self._known -= stale - live
+            if gone:
+                self._save_state()
+        if gone:
+            _logger.info("Forgot %d archive(s) removed from the directory", len(gone))
+
+    def poll(self) -> list[str]:
+        """Discovers new archives and returns the ones that became complete.
+
+        Returns:
+            Relative paths of complete archives that were not processed yet.
+
+        """
+        result = scan_tree(self.directory, self._dirs)
+        self._dirs = result.dirs
+        now = time.monotonic()
+        complete = []
+        for rel_path in result.removed & self._candidates.keys():
+            del self._candidates[rel_path]
+        present = set()
+        for rel_path, _, _ in result.iter_files():
+            present.add(rel_path)
+            if not rel_path.lower().endswith(".zip") or rel_path in self._known:
+                continue
+            try:
+                stat = (self.directory / rel_path).stat()
+            except FileNotFoundError:
+                self._candidates.pop(rel_path, None)
+                continue
+            candidate = self._candidates.get(rel_path)
+            if candidate is None or (candidate.size, candidate.mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+                self._candidates[rel_path] = _Candidate(size=stat.st_size, mtime_ns=stat.st_mtime_ns, since=now)
+            elif now - candidate.since >= self.settle:
+                complete.append(rel_path)
+        self._forget(present)
+        return complete
+
+    def submit(self, rel_path: str) -> None:
+        """Pushes a complete archive into the pipeline.
+
+        Args:
+            rel_path: The archive path relative to the watched directory.
+
+        """
+        candidate = self._candidates.pop(rel_path)
+        with self._lock:
+            self.records[rel_path] = ArchiveRecord(path=rel_path, size=candidate.size, status="checking")
+            self._known.add(rel_path)
+            self._in_flight += 1
+            self._save_state()
+        _logger.info("New archive %s (%.2f MB)", rel_path, candidate.size / 1024 / 1024)
+        self._submit(self._check_executor, self._check, rel_path)
+
+    def _submit(self, executor: ThreadPoolExecutor, stage: Callable[[str], None], key: str) -> None:
+        def on_done(future: Future[None]) -> None:
+            if (error := future.exception()) is not None:
+                attempts = self.records[key].attempts + 1
+                delay = min(self.retry_delay * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+                _logger.error("Processing of %s failed - retrying in %.0f s: %s", key, delay, error)
+                with self._lock:
+                    self._retry_at[key] = time.monotonic() + delay
+                self._finish(key, status="failed", error=f"{type(error).__name__}: {error}", attempts=attempts)
+
+        executor.submit(stage, key).add_done_callback(on_done)
+
+    def _check(self, key: str) -> None:
+        path = self.directory / self.records[key].path
+        with profiling.span("watch.check", parent=self._span, path=key):
+            _, error = (check_zip_full if self.full_check else check_zip_fast)(path)
+        if error:
+            _logger.error("Archive %s is corrupted - it will not be uploaded", key)
+            self._finish(key, status="corrupted", error=error)
+            return
+        if not self.rename:
+            self._update(key, status="uploading")
+            self._submit(self._upload_executor, self._upload, key)
+            return
+        self._update(key, status="renaming")
+        self._submit(self._rename_executor, self._rename, key)
+
+    def _rename(self, key: str) -> None:
+        path = self.directory / self.records[key].path
+        with profiling.span("watch.rename", parent=self._span, path=key):
+            new_path = renamed_path(path)
+            if new_path is not None:
+                # Mark the new path as known before it appears, so that polling does not pick it up
+                with self._lock:
+                    self._known.add(new_path.relative_to(self.directory).as_posix())
+                path = path.replace(new_path)
+                _logger.info("Renamed %s to %s", key, path.name)
+        self._update(key, status="uploading", renamed=True, path=path.relative_to(self.directory).as_posix())
+        self._submit(self._upload_executor, self._upload, key)
+
+    def _upload(self, key: str) -> None:
+        rel_path = self.records[key].path
+        blob_name = f"{self.prefix}/{rel_path}" if self.prefix else rel_path
+        with profiling.span("watch.upload", parent=self._span, blob=blob_name):
+            try:
+                size = upload_file(self.container_client, self.directory / rel_path, blob_name)
+            except ResourceExistsError:
+                _logger.warning("Blob %s already exists - skipping", blob_name)
+                self._finish(key, status="exists", blob=blob_name, error=None)
+                return
+        profiling.increment("watch.uploaded.archives")
+        profiling.increment("watch.uploaded.bytes", size)
+        _logger.info("Uploaded %s to %s", rel_path, blob_name)
+        self._finish(key, status="uploaded", blob=blob_name, error=None)
+
+    @property
+    def idle(self) -> bool:
+        """Whether there are no archives in the pipeline and no archives waiting to become complete."""
+        with self._lock:
+            return self._in_flight == 0 and not self._candidates
+
+    def wait(self) -> None:
+        """Blocks until all archives in the pipeline are processed."""
+        with self._idle:
+            self._idle.wait_for(lambda: self._in_flight == 0)
+
+    def close(self) -> None:
+        """Waits for the archives in the pipeline and stops the worker threads."""
+        self.wait()
+        for executor in (self._check_executor, self._rename_executor, self._upload_executor):
+            executor.shutdown(wait=True)
+
+    def run(self, interval: float = 10.0, *, once: bool = False) -> None:
+        """Polls the directory and processes complete archives until interrupted.
+
+        Args:
+            interval: Seconds between polls.
+            once: Whether to exit once all archives currently in the directory are processed - failed archives
+                are not retried, they are resumed by the next run.
+
+        """
+        self.resume()
+        try:
+            while True:
+                self.retry_failed()
+                for rel_path in self.poll():
+                    self.submit(rel_path)
+                if once and self.idle:
+                    break
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            _logger.info("Interrupted - waiting for archives in the pipeline")
+        finally:
+            self.close()
+
+
+@click.command("watch")  # type: ignore[misc]
+@click.option(  # type: ignore[misc]
+    "--directory",
+    type=click.Path(exists=True, file_okay=False, path_type=Path, resolve_path=True),
+    required=True,
+    help="The drop folder to watch for new zip archives",
+)
+@click.option("--prefix", help="The prefix for the blob files.", required=True)  # type: ignore[misc]
+@click.option(  # type: ignore[misc]
+    "--container",
+    default="datasets",
+    help="The name of the blob container.",
+)
+@click.option(  # type: ignore[misc]
+    "--log_dir",
+    required=True,
+    type=click.Path(file_okay=False, dir_okay=True, path_type=Path),
+    help="The path to the log directory - will be used to save logs and the pipeline state.",
+)
+@click.option(  # type: ignore[misc]
+    "--interval",
+    default=10.0,
+    show_default=True,
+    help="Seconds between polls of the drop folder",
+)
+@click.option(  # type: ignore[misc]
+    "--settle",
+    default=30.0,
+    show_default=True,
+    help="Seconds without size change after which an archive is considered completely downloaded",
+)
+@click.option(  # type: ignore[misc]
+    "--check_workers",
+    default=2,
+    show_default=True,
+    help="Number of threads checking archives",
+)
+@click.option(  # type: ignore[misc]
+    "--upload_workers",
+    default=4,
+    show_default=True,
+    help="Number of threads uploading archives",
+)
+@click.option(  # type: ignore[misc]
+    "--retry_delay",
+    default=60.0,
+    show_default=True,
+    help="Seconds before a failed archive is retried - doubled after every failed attempt, up to an hour",
+)
+@click.option(  # type: ignore[misc]
+    "--full",
+    default=False,
+    is_flag=True,
+    help="Run full check by running zip test instead of the fast structural check",
+)
+@click.option(  # type: ignore[misc]
+    "--no_rename",
+    default=False,
+    is_flag=True,
+    help="Upload archives under their original names",
+)
+@click.option(  # type: ignore[misc]
+    "--once",
+    default=False,
+    is_flag=True,
+    help="Exit once all archives currently in the drop folder are processed",
+)
+def watch(  # noqa: PLR0913
+    directory: Path,
+    prefix: str,
+    log_dir: Path,
+    container: str = "datasets",
+    interval: float = 10.0,
+    settle: float = 30.0,
+    check_workers: int = 2,
+    upload_workers: int = 4,
+    retry_delay: float = 60.0,
+    *,
+    full: bool = False,
+    no_rename: bool = False,
+    once: bool = False,
+) -> None:
+    """Checks, renames and uploads zip archives as they arrive in the drop folder."""
+    log_dir.mkdir(parents=True, exist_ok=True)
+    add_file_handler(_logger, log_dir / "watch.log")
+    watcher = ArchiveWatcher(
+        directory=directory,
+        container_client=get_container_client(container, concurrency=upload_workers),
+        prefix=prefix,
+        state_file=log_dir / "watch-state.json",
+        settle=settle,
+        full_check=full,
+        rename=not no_rename,
+        check_workers=check_workers,
+        upload_workers=upload_workers,
+        retry_delay=retry_delay,
+    )
+    _logger.info("Watching %s (pid %d)", directory.as_posix(), os.getpid())
+    with queue_logging(_logger):
+        watcher.run(interval, once=once)
@@ -4,19 +4,28 @@
 #  Licensed under MIT License.
 from __future__ import annotations
 
-import logging
+import functools
 import zipfile
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 import click
 import pyzipper
-from tqdm import tqdm
 
-from astro_tools.utils.logging import get_logger
+from astro_tools.utils import profiling
+from astro_tools.utils.logging import add_file_handler, get_logger, queue_logging
+from astro_tools.utils.progress import ByteProgress, ProgressReader
+from astro_tools.utils.scanning import incremental_scan
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
 
 _logger = get_logger(__name__)
 
+READ_CHUNK_SIZE = 1024 * 1024
+"""Size of chunks read from archive members during the full check."""
+
 
 @click.command("check")  # type: ignore[misc]
 @click.option(  # type: ignore[misc]
@@ -49,6 +58,23 @@ _logger = get_logger(__name__)
     is_flag=True,
     help="Run full check by running zip test",
 )
+@click.option(  # type: ignore[misc]
+    "--verbose",
+    default=False,
+    is_flag=True,
+    help="Log every archive that passed the check, not only the corrupted ones",
+)
+@click.option(  # type: ignore[misc]
+    "--manifest",
+    type=click.Path(file_okay=True, dir_okay=False, path_type=Path),
+    help="Path to the scan manifest - only directories changed since the previous run are listed again",
+)
+@click.option(  # type: ignore[misc]
+    "--progress_file",
+    type=click.Path(file_okay=True, dir_okay=False, path_type=Path),
+    default=None,
+    help="JSON file updated every few seconds with checked bytes, throughput and ETA for external monitoring",
+)
 def check_zips(
     directory: Path,
     log_file: Path,
@@ -56,27 +82,54 @@ def check_zips(
     *,
     fast: bool = False,
     full: bool = False,
+    verbose: bool = False,
+    manifest: Path | None = None,
+    progress_file: Path | None = None,
 ) -> None:
     """Runs corruption check against zip archives in specified directory."""
     zip_log_file = Path(f"zip_check-{directory.stem}.log")
     if zip_log_file.exists():
         zip_log_file.unlink()
 
-    _logger.addHandler(logging.FileHandler(log_file))
+    add_file_handler(_logger, log_file)
+    _logger.setLevel("DEBUG" if verbose else "INFO")
+    with queue_logging(_logger):
+        _check_zips(directory, workers, manifest, fast=fast, full=full, progress_file=progress_file)
 
+
+def _check_zips(
+    directory: Path,
+    workers: int,
+    manifest: Path | None,
+    *,
+    fast: bool,
+    full: bool,
+    progress_file: Path | None = None,
+) -> None:
+    """Checks all zip archives under the directory in parallel and logs a summary."""
     if not fast and not full:
         _logger.warning("No zip check mode specified - running fast check only.")
 
-    zip_files = list(directory.rglob("*.zip"))
+    if manifest is None:
+        zip_files = list(directory.rglob("*.zip"))
+    else:
+        zip_files = incremental_scan(directory, manifest, workers=workers).paths(suffix=".zip")
     _logger.info("Found %d ZIP files in %s", len(zip_files), directory.as_posix())
 
     corrupted = []
 
-    func = check_zip_fast if fast else check_zip_full
+    parent = profiling.current_span()
+    total_bytes = sum(zip_path.stat().st_size for zip_path in zip_files)
 
-    with ThreadPoolExecutor(max_workers=workers) as executor:
-        future_to_path = {executor.submit(func, zip_path): zip_path for zip_path in zip_files}
-        for future in tqdm(as_completed(future_to_path), total=len(zip_files), desc="Checking ZIP files", unit="file"):
+    with (
+        ByteProgress(
+            total_bytes, files=len(zip_files), desc="Checking ZIP files", snapshot_file=progress_file
+        ) as progress,
+        ThreadPoolExecutor(max_workers=workers) as executor,
+    ):
+        func = functools.partial(check_zip_fast if fast else check_zip_full, progress=progress)
+        future_to_path = {executor.submit(_profiled_check, func, zip_path, parent): zip_path for zip_path in zip_files}
+        for future in as_completed(future_to_path):
             zip_path, error_msg = future.result()
             if error_msg:
                 _logger.error(error_msg)
@@ -91,16 +144,42 @@ def check_zips(
         _logger.info("No corrupted ZIP files found.")
 
 
-def check_zip_fast(zip_path: Path) -> tuple[Path, str | None]:
+def _profiled_check(
+    func: Callable[[Path], tuple[Path, str | None]],
+    zip_path: Path,
+    parent: profiling.Span | None,
+) -> tuple[Path, str | None]:
+    """Runs the check function inside a profiling span and records archive size and check time."""
+    with profiling.span("zip.check.archive", parent=parent, path=zip_path.as_posix()) as span:
+        result = func(zip_path)
+    if span is not None:
+        profiling.increment("zip.check.archives")
+        profiling.observe("zip.check.archive_seconds", span.duration or 0.0, profiling.SECONDS_BUCKETS)
+        profiling.observe("zip.check.archive_bytes", zip_path.stat().st_size)
+    return result
+
+
+def check_zip_fast(zip_path: Path, progress: ByteProgress | None = None) -> tuple[Path, str | None]:
     """Runs fast zip archive check by trying to list compressed file metadata.
 
     Args:
         zip_path: The path to the zip file.
+        progress: Progress that the archive is reported to once checked.
 
     Returns:
         A tuple containing a zip file path and a string summary of errors.
 
     """
+    size = zip_path.stat().st_size
+    try:
+        return _check_zip_fast(zip_path)
+    finally:
+        if progress is not None:
+            # Only the central directory is read, the whole archive counts as checked
+            progress.file_done(size)
+
+
+def _check_zip_fast(zip_path: Path) -> tuple[Path, str | None]:
     errors = []
     try:
         with zipfile.ZipFile(zip_path, "r") as zf:
@@ -109,7 +188,7 @@ def check_zip_fast(zip_path: Path) -> tuple[Path, str | None]:
                 f"{info.filename} - {info.file_size} bytes (compressed: {info.compress_size} bytes)"
                 for info in zf.infolist()
             ]
-            _logger.info("File %s is OK", zip_path.as_posix())
+            _logger.debug("File %s is OK", zip_path.as_posix())
             return zip_path, None
 
     except zipfile.BadZipFile:
@@ -122,7 +201,7 @@ def check_zip_fast(zip_path: Path) -> tuple[Path, str | None]:
             _logger.warning("Unsupported compression for file %s - fallback to pyzipper", zip_path.as_posix())
             with pyzipper.AESZipFile(zip_path) as zf:
                 _ = zf.namelist()
-                _logger.info("File %s is OK", zip_path.as_posix())
+                _logger.debug("File %s is OK", zip_path.as_posix())
 
         except Exception:
             msg = f"Error checking {zip_path.as_posix()}"
@@ -137,24 +216,33 @@ def check_zip_fast(zip_path: Path) -> tuple[Path, str | None]:
     return zip_path, "\n".join(errors)
 
 
-def check_zip_full(zip_path: Path) -> tuple[Path, str | None]:
-    """Runs full zip archive check by running zip test.
+def check_zip_full(zip_path: Path, progress: ByteProgress | None = None) -> tuple[Path, str | None]:
+    """Runs full zip archive check by reading every member and verifying its CRC.
+
+    Members are read in chunks, so the bytes read from the archive can be reported to the progress as the check
+    goes, also for archives with a few huge members.
 
     Args:
         zip_path: A path to the zip file.
+        progress: Progress fed with the bytes read from the archive.
 
     Returns:
         A tuple containing a zip file path and a string summary of errors.
 
     """
+    size = zip_path.stat().st_size
+    reader = None
     try:
-        with zipfile.ZipFile(zip_path, "r") as zip_ref:
-            bad_file = zip_ref.testzip()
+        with zip_path.open("rb") as fh, zipfile.ZipFile(reader := ProgressReader(fh), "r") as zip_ref:
+            # Central directory reads are reported with the rest of the archive once the members are read
+            reader.progress = progress
+            reader.bytes_read = 0
+            bad_file = _find_bad_member(zip_ref)
             if bad_file:
                 msg = f"Corrupted file '{bad_file}' in archive: {zip_path.as_posix()}"
                 _logger.warning(msg)
                 return zip_path, msg
-            _logger.info("File %s is OK", zip_path.as_posix())
+            _logger.debug("File %s is OK", zip_path.as_posix())
             return zip_path, None
     except zipfile.BadZipFile:
         msg = f"Bad ZIP file: {zip_path.as_posix()}"
@@ -164,3 +252,22 @@ def check_zip_full(zip_path: Path) -> tuple[Path, str | None]:
         msg = f"Error checking {zip_path.as_posix()}"
         _logger.exception(msg)
         return zip_path, msg
+    finally:
+        if progress is not None:
+            # Unread bytes of a corrupted archive count as checked
+            progress.file_done(max(size - (reader.bytes_read if reader is not None else 0), 0))
+
+
+def _find_bad_member(zf: zipfile.ZipFile) -> str | None:
+    """Reads every member in chunks - like `ZipFile.testzip`, returns the name of the first corrupted one."""
+    for info in zf.infolist():
+        if info.is_dir():
+            continue
+        try:
+            with zf.open(info) as member:
+                # `ZipExtFile` checks the CRC once the member is read to the end
+                while member.read(READ_CHUNK_SIZE):
+                    pass
+        except zipfile.BadZipFile:
+            return info.filename
+    return None
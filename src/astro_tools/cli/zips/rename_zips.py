@@ -4,31 +4,28 @@
 #  Licensed under MIT License.
 from __future__ import annotations
 
+import re
 import shutil
 import zipfile
-from collections import defaultdict
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 import click
 
+from astro_tools.core import consts
 from astro_tools.utils.logging import get_logger
+from astro_tools.utils.scanning import incremental_scan
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
 
 _logger = get_logger(__name__)
 
-CHANNEL_LOOKUP = {
-    "_ha_": "H",
-    "_halpha_": "H",
-    "_sii_": "S",
-    "_oiii_": "O",
-    "_luminance_": "L",
-    "_lum_": "L",
-    "_red_": "R",
-    "_green_": "G",
-    "_blue_": "B",
-}
+CHANNEL_LOOKUP = consts.channels.CHANNEL_LOOKUP
 """Channel lookup dictionary."""
-CHANNEL_PATTERNS = ("_ha_", "_halpha_", "_sii_", "_oiii_", "_blue_", "_red_", "_green_", "_lum_", "_luminance_")
+CHANNEL_PATTERNS = consts.channels.CHANNEL_PATTERNS
 """Channel pattern mapping."""
+_RENAMED_STEM = re.compile(rf"[^_]+_[^_]+_[{''.join(sorted(set(CHANNEL_LOOKUP.values())))}]*_\d+(-\d+)?")
 
 
 @click.command("rename")  # type: ignore[misc]
@@ -37,36 +34,94 @@ CHANNEL_PATTERNS = ("_ha_", "_halpha_", "_sii_", "_oiii_", "_blue_", "_red_", "_
     type=click.Path(exists=True, dir_okay=True, file_okay=False, path_type=Path),
     help="Path to the directory containing telescope-live data",
 )
-def rename_zips(data_dir: Path) -> None:  # noqa: C901
+@click.option(  # type: ignore[misc]
+    "--manifest",
+    type=click.Path(file_okay=True, dir_okay=False, path_type=Path),
+    help="Path to the scan manifest - only directories changed since the previous run are listed again",
+)
+def rename_zips(data_dir: Path, manifest: Path | None = None) -> None:
     """Rename telescope-live zip archives."""
-    fps = sorted(data_dir.rglob("*.zip"))
-
-    name_lookup: dict[str, list[Path]] = defaultdict(list)
-    for zip_fp in fps:
-        with zipfile.ZipFile(zip_fp, "r") as zf:
-            channels = set()
-            for info in zf.infolist():
-                for f in CHANNEL_PATTERNS:
-                    if f in info.filename.lower():
-                        channels.add(f)
-            channel_combination = ""
-            for c, v in CHANNEL_LOOKUP.items():
-                if c in channels:
-                    channel_combination += v
-            try:
-                target, telescope, frames, _ = zip_fp.stem.split("_")
-            except ValueError:
-                _logger.exception("File name does not match the pattern, skipping...  %s", zip_fp.as_posix())
-                continue
-            new_zip_archive_name = f"{target}_{telescope}_{channel_combination}_{frames}"
-            name_lookup[new_zip_archive_name].append(zip_fp)
-
-    for new_name, files in name_lookup.items():
-        if len(files) > 1:
-            for idx, fp in enumerate(files, start=1):
-                click.echo(f"Renaming {fp.name} to {new_name}-{idx}.zip")
-                shutil.move(fp, fp.parent / f"{new_name}-{idx}.zip")
+    fps = data_dir.rglob("*.zip") if manifest is None else incremental_scan(data_dir, manifest).paths(".zip")
+
+    for zip_fp in sorted(fps):
+        new_path = renamed_path(zip_fp)
+        if new_path is None:
             continue
-        fp = files[0]
-        click.echo(f"Renaming {fp.name} to {new_name}.zip")
-        shutil.move(fp, fp.parent / f"{new_name}.zip")
+        click.echo(f"Renaming {zip_fp.name} to {new_path.name}")
+        shutil.move(zip_fp, new_path)
+
+
+def channel_combination(names: Iterable[str]) -> str:
+    """Builds the channel letters for the archive member names, e.g. `"HO"` for H-alpha and OIII frames.
+
+    Args:
+        names: Archive member names.
+
+    Returns:
+        Channel letters in `CHANNEL_LOOKUP` order.
+
+    """
+    channels = {pattern for name in names for pattern in CHANNEL_PATTERNS if pattern in name.lower()}
+    return "".join(letter for pattern, letter in CHANNEL_LOOKUP.items() if pattern in channels)
+
+
+def new_archive_name(zip_fp: Path) -> str | None:
+    """Builds the new name (without suffix and observation number) of a telescope-live archive.
+
+    Args:
+        zip_fp: The path to the zip archive named `<TARGET>_<TELESCOPE>_<FRAMES>_<ID>.zip`.
+
+    Returns:
+        The new name `<TARGET>_<TELESCOPE>_<FILTERS>_<FRAMES>` or `None` if the file name does not match
+        the pattern - also for archives that were already renamed.
+
+    """
+    if _RENAMED_STEM.fullmatch(zip_fp.stem):
+        _logger.debug("Archive %s is already renamed, skipping...", zip_fp.as_posix())
+        return None
+    try:
+        target, telescope, frames, _ = zip_fp.stem.split("_")
+    except ValueError:
+        _logger.exception("File name does not match the pattern, skipping...  %s", zip_fp.as_posix())
+        return None
+    with zipfile.ZipFile(zip_fp, "r") as zf:
+        channels = channel_combination(zf.namelist())
+    return f"{target}_{telescope}_{channels}_{frames}"
+
+
+def next_free_path(directory: Path, name: str) -> Path:
+    """Finds a free archive path for the name, adding the lowest free observation number if needed.
+
+    Args:
+        directory: The target directory.
+        name: The archive name without suffix.
+
+    Returns:
+        `<name>.zip` if it does not exist, otherwise `<name>-<N>.zip` with the lowest free `N` starting from 2.
+
+    """
+    path = directory / f"{name}.zip"
+    idx = 2
+    while path.exists():
+        path = directory / f"{name}-{idx}.zip"
+        idx += 1
+    return path
+
+
+def renamed_path(zip_fp: Path) -> Path | None:
+    """Picks the path a telescope-live archive should be renamed to.
+
+    Shared by `zip rename` and `watch`, so that the same archives end up with the same names regardless of
+    the command that renamed them. The observation number is only added if the name is already taken.
+
+    Args:
+        zip_fp: The path to the zip archive.
+
+    Returns:
+        The free path in the archive's directory or `None` if the archive should keep its current name.
+
+    """
+    new_name = new_archive_name(zip_fp)
+    if new_name is None or new_name == zip_fp.stem:
+        return None
+    return next_free_path(zip_fp.parent, new_name)
@@ -0,0 +1,312 @@
+"""Recompressing zip archives to reduce storage and transfer size."""
+
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+from __future__ import annotations
+
+import csv
+import os
+import sys
+import zipfile
+import zlib
+from concurrent.futures import as_completed
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import Literal, get_args
+
+import click
+import pyzipper
+from tqdm import tqdm
+
+from astro_tools.utils import profiling
+from astro_tools.utils.logging import add_file_handler, get_logger, queue_logging
+from astro_tools.utils.processes import process_pool
+from astro_tools.utils.scanning import incremental_scan
+
+_logger = get_logger(__name__)
+
+RepackCodec = Literal["stored", "deflated", "bzip2", "lzma"]
+"""Compression methods of repacked archives."""
+COMPRESSION_METHODS: dict[RepackCodec, int] = {
+    "stored": zipfile.ZIP_STORED,
+    "deflated": zipfile.ZIP_DEFLATED,
+    "bzip2": zipfile.ZIP_BZIP2,
+    "lzma": zipfile.ZIP_LZMA,
+}
+"""Mapping between codecs and `zipfile` compression methods."""
+COPY_CHUNK_SIZE = 1024 * 1024
+"""Size of chunks streamed from the old archive to the new one."""
+_ENCRYPTED_FLAG = 0x1
+
+
+@dataclass(frozen=True)
+class RepackResult:
+    """Outcome of repacking a single archive."""
+
+    path: Path
+    """The archive path."""
+    members: int
+    """Number of archive members."""
+    original_size: int
+    """Archive size before repacking in bytes."""
+    new_size: int
+    """Archive size after repacking in bytes - equal to `original_size` if the archive was kept."""
+    replaced: bool
+    """Whether the archive was replaced with the repacked one."""
+    error: str | None = None
+    """Error message if repacking failed."""
+
+    @property
+    def saved(self) -> int:
+        """Number of saved bytes."""
+        return self.original_size - self.new_size
+
+
+@click.command("repack")  # type: ignore[misc]
+@click.option(  # type: ignore[misc]
+    "--directory",
+    type=click.Path(exists=True, file_okay=False, path_type=Path, resolve_path=True),
+    default=".",
+    help="Directory with zip archives to repack",
+)
+@click.option(  # type: ignore[misc]
+    "--codec",
+    type=click.Choice(get_args(RepackCodec)),
+    default="deflated",
+    show_default=True,
+    help="Compression method of the repacked archives",
+)
+@click.option(  # type: ignore[misc]
+    "--level",
+    type=click.IntRange(0, 9),
+    default=None,
+    help="Compression level - defaults to the codec default, ignored for 'stored' and 'lzma', 1-9 for 'bzip2'",
+)
+@click.option(  # type: ignore[misc]
+    "--password",
+    envvar="ZIP_PASSWORD",
+    show_envvar=True,
+    prompt="Archive password",
+    prompt_required=False,
+    hide_input=True,
+    default=None,
+    help="Password of AES encrypted archives - repacked archives are not encrypted. "
+    "Pass the flag without a value to be prompted for it",
+)
+@click.option(  # type: ignore[misc]
+    "--workers",
+    type=int,
+    default=None,
+    help="Number of processes for parallel repacking. Defaults to the number of CPUs.",
+)
+@click.option(  # type: ignore[misc]
+    "--force",
+    default=False,
+    is_flag=True,
+    help="Replace archives even if the repacked archive is not smaller",
+)
+@click.option(  # type: ignore[misc]
+    "--report",
+    type=click.Path(writable=True, file_okay=True, dir_okay=False, path_type=Path),
+    default="./zip-repack-report.csv",
+    help="Path to the CSV report with sizes before and after repacking",
+)
+@click.option(  # type: ignore[misc]
+    "--log_file",
+    type=click.Path(writable=True, file_okay=True, dir_okay=False, path_type=Path),
+    default="./zip-repack.log",
+    help="Path to the log file (will create one in the current working directory if not specified)",
+)
+@click.option(  # type: ignore[misc]
+    "--manifest",
+    type=click.Path(file_okay=True, dir_okay=False, path_type=Path),
+    help="Path to the scan manifest - only directories changed since the previous run are listed again",
+)
+def repack_zips(
+    directory: Path,
+    codec: RepackCodec,
+    level: int | None,
+    password: str | None,
+    workers: int | None,
+    report: Path,
+    log_file: Path,
+    *,
+    force: bool = False,
+    manifest: Path | None = None,
+) -> None:
+    """Recompresses zip archives in specified directory and replaces the originals."""
+    if codec == "bzip2" and level == 0:
+        msg = "Level 0 is not supported by 'bzip2' - use 1-9 or the 'stored' codec"
+        raise click.BadParameter(msg, param_hint="--level")
+    workers = workers or os.cpu_count() or 1
+    add_file_handler(_logger, log_file)
+    with queue_logging(_logger):
+        if manifest is None:
+            zip_files = sorted(directory.rglob("*.zip"))
+        else:
+            zip_files = incremental_scan(directory, manifest).paths(suffix=".zip")
+        _logger.info("Found %d ZIP files in %s", len(zip_files), directory.as_posix())
+        results = repack_zips_parallel(zip_files, codec, level, password, workers, force=force)
+        write_report(report, results)
+
+
+def repack_zips_parallel(
+    zip_files: list[Path],
+    codec: RepackCodec = "deflated",
+    level: int | None = None,
+    password: str | None = None,
+    workers: int = 1,
+    *,
+    force: bool = False,
+) -> list[RepackResult]:
+    """Repacks archives in a process pool and logs the bytes saved.
+
+    Args:
+        zip_files: The archive paths.
+        codec: Compression method of the repacked archives.
+        level: Compression level - codec default if `None`.
+        password: Password of AES encrypted archives.
+        workers: Number of processes.
+        force: Whether to replace archives even if the repacked archive is not smaller.
+
+    Returns:
+        Results in the order of completion.
+
+    """
+    results = []
+    with process_pool(max_workers=workers) as executor:
+        futures = [
+            profiling.submit(executor, repack_zip, path, codec, level, password, force=force) for path in zip_files
+        ]
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Repacking ZIP files", unit="file"):
+            result = future.result()
+            results.append(result)
+            if result.error is not None:
+                _logger.error("Failed to repack %s: %s", result.path.as_posix(), result.error)
+                continue
+            _logger.info(
+                "%s %s: %s MB -> %s MB",
+                "Repacked" if result.replaced else "Kept",
+                result.path.as_posix(),
+                f"{result.original_size / 1024 / 1024:.2f}",
+                f"{result.new_size / 1024 / 1024:.2f}",
+            )
+            profiling.increment("zip.repack.archives")
+            profiling.increment("zip.repack.saved_bytes", result.saved)
+
+    original = sum(result.original_size for result in results)
+    saved = sum(result.saved for result in results)
+    _logger.info(
+        "Saved %s MB of %s MB (%s%%), %d archives failed.",
+        f"{saved / 1024 / 1024:.2f}",
+        f"{original / 1024 / 1024:.2f}",
+        f"{100 * saved / original if original else 0.0:.1f}",
+        sum(result.error is not None for result in results),
+    )
+    return results
+
+
+def repack_zip(
+    zip_path: Path,
+    codec: RepackCodec = "deflated",
+    level: int | None = None,
+    password: str | None = None,
+    *,
+    force: bool = False,
+) -> RepackResult:
+    """Recompresses an archive, streaming members from the old archive to the new one.
+
+    Members are never extracted to disk - every member is decompressed and recompressed in chunks of
+    `COPY_CHUNK_SIZE`, so memory use does not depend on member sizes, and its CRC is verified against the central
+    directory during the copy. The repacked archive is written next to the original, which is atomically replaced
+    only if the repacked archive is smaller (or `force` is set).
+
+    Args:
+        zip_path: The archive path.
+        codec: Compression method of the repacked archive.
+        level: Compression level - codec default if `None`.
+        password: Password of an AES encrypted archive - the repacked archive is not encrypted.
+        force: Whether to replace the archive even if the repacked archive is not smaller.
+
+    Returns:
+        The repack result - errors are reported in the result, the original archive is kept intact.
+
+    """
+    original_size = zip_path.stat().st_size
+    tmp_path = zip_path.with_name(f".{zip_path.name}.repack")
+    members = 0
+    try:
+        with (
+            profiling.span("zip.repack.archive", path=zip_path.as_posix()),
+            _open_source(zip_path, password) as src,
+            zipfile.ZipFile(tmp_path, "w", compression=COMPRESSION_METHODS[codec], compresslevel=level) as dst,
+        ):
+            for info in src.infolist():
+                _copy_member(src, dst, info)
+                members += 1
+        new_size = tmp_path.stat().st_size
+        replaced = force or new_size < original_size
+        if replaced:
+            tmp_path.replace(zip_path)
+    except Exception as ex:  # noqa: BLE001
+        return RepackResult(zip_path, members, original_size, original_size, replaced=False, error=str(ex))
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return RepackResult(zip_path, members, original_size, new_size if replaced else original_size, replaced=replaced)
+
+
+def _open_source(zip_path: Path, password: str | None) -> zipfile.ZipFile:
+    """Opens the archive - AES encrypted archives only open through `pyzipper`."""
+    if password is None:
+        return zipfile.ZipFile(zip_path, "r")
+    zf: zipfile.ZipFile = pyzipper.AESZipFile(zip_path, "r")
+    zf.setpassword(password.encode())
+    return zf
+
+
+def _set_compress_level(info: zipfile.ZipInfo, level: int | None) -> None:
+    # `ZipFile.open(info, "w")` takes the level from the ZipInfo - public since Python 3.13, private before
+    if sys.version_info >= (3, 13):
+        info.compress_level = level
+    else:
+        info._compresslevel = level  # type: ignore[attr-defined]  # noqa: SLF001
+
+
+def _copy_member(src: zipfile.ZipFile, dst: zipfile.ZipFile, info: zipfile.ZipInfo) -> None:
+    """Streams a member between archives, verifying its CRC."""
+    new_info = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+    new_info.external_attr = info.external_attr
+    new_info.comment = info.comment
+    new_info.compress_type = dst.compression
+    _set_compress_level(new_info, dst.compresslevel)
+    # Lets zipfile decide up front whether the member needs zip64 extensions
+    new_info.file_size = info.file_size
+    if info.is_dir():
+        dst.writestr(new_info, b"")
+        return
+
+    crc = 0
+    with src.open(info) as fin, dst.open(new_info, "w") as fout:
+        while chunk := fin.read(COPY_CHUNK_SIZE):
+            crc = zlib.crc32(chunk, crc)
+            fout.write(chunk)
+    # AE-2 encrypted members store no CRC - pyzipper verifies their authentication code instead
+    if crc != info.CRC and not (info.flag_bits & _ENCRYPTED_FLAG and info.CRC == 0):
+        msg = f"CRC mismatch for member {info.filename}: expected {info.CRC:08x}, got {crc:08x}"
+        raise zipfile.BadZipFile(msg)
+
+
+def write_report(path: Path, results: list[RepackResult]) -> None:
+    """Writes the repack report as CSV with a row per archive.
+
+    Args:
+        path: The report path.
+        results: The repack results.
+
+    """
+    names = [field.name for field in fields(RepackResult)]
+    with path.open("w", newline="") as fh:
+        writer = csv.DictWriter(fh, fieldnames=[*names, "saved"])
+        writer.writeheader()
+        for result in sorted(results, key=lambda r: r.path):
+            writer.writerow({**asdict(result), "path": result.path.as_posix(), "saved": result.saved})
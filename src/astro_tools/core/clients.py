@@ -0,0 +1,136 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+"""Process-wide registry of Azure Blob Storage clients.
+
+Building a `BlobServiceClient` is cheap, but every client owns its own HTTP session - a new client per command
+(or per worker) throws away keep-alive connections and TLS sessions. The registry hands out one client per
+storage account and process. Its transport uses a `requests` session whose connection pool is sized to the
+requested concurrency - the default pool of 10 connections makes additional worker threads wait for a socket.
+
+Account keys from settings are used if present, otherwise credentials are resolved with
+`azure.identity.DefaultAzureCredential` (environment variables, managed identity, Azure CLI login...).
+
+Examples:
+    ```python
+    from astro_tools.core.clients import get_container_client
+
+    container_client = get_container_client("datasets", concurrency=32)
+    ```
+
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+import requests
+from azure.core.credentials import AzureNamedKeyCredential
+from azure.core.pipeline.transport import RequestsTransport
+from azure.storage.blob import BlobServiceClient
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from astro_tools.core.settings import current_settings
+
+if TYPE_CHECKING:
+    from azure.storage.blob import ContainerClient
+
+    from astro_tools.core.settings import BlobStorageSettings
+
+DEFAULT_POOL_SIZE = 16
+"""Minimum connection pool size of the HTTP transport."""
+
+
+@dataclass
+class _RegisteredClient:
+    client: BlobServiceClient
+    pool_size: int
+
+
+_lock = threading.Lock()
+_clients: dict[tuple[int, str], _RegisteredClient] = {}
+
+
+def _credential(settings: BlobStorageSettings) -> Any:
+    if settings.account_key is not None:
+        return AzureNamedKeyCredential(settings.account_name, settings.account_key)
+
+    # Deferred - azure-identity pulls in MSAL and is only needed without an account key
+    from azure.identity import DefaultAzureCredential  # noqa: PLC0415
+
+    return DefaultAzureCredential()
+
+
+def _transport(pool_size: int) -> RequestsTransport:
+    session = requests.Session()
+    # Retries are handled by the Azure SDK retry policy
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=Retry(total=False, redirect=False, raise_on_status=False),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return RequestsTransport(session=session, session_owner=False)
+
+
+def get_blob_service_client(
+    concurrency: int = DEFAULT_POOL_SIZE,
+    settings: BlobStorageSettings | None = None,
+) -> BlobServiceClient:
+    """Returns the shared blob service client for the storage account.
+
+    Clients are cached per process and storage account. If a caller needs more concurrent connections than
+    the cached client provides, a client with a bigger connection pool replaces it - clients already handed out
+    keep working.
+
+    Args:
+        concurrency: Number of threads that will use the client concurrently.
+        settings: Blob storage settings - defaults to `current_settings().blob`.
+
+    Returns:
+        The blob service client.
+
+    """
+    settings = settings or current_settings().blob
+    # Clients are not fork-safe - processes forked from a process pool get their own clients
+    key = (os.getpid(), settings.account_name)
+    with _lock:
+        registered = _clients.get(key)
+        if registered is None or registered.pool_size < concurrency:
+            pool_size = max(concurrency, DEFAULT_POOL_SIZE)
+            client = BlobServiceClient(
+                account_url=settings.account_url,
+                credential=_credential(settings),
+                transport=_transport(pool_size),
+            )
+            registered = _clients[key] = _RegisteredClient(client=client, pool_size=pool_size)
+        return registered.client
+
+
+def get_container_client(
+    container: str,
+    concurrency: int = DEFAULT_POOL_SIZE,
+    settings: BlobStorageSettings | None = None,
+) -> ContainerClient:
+    """Returns a container client backed by the shared blob service client.
+
+    Args:
+        container: The container name.
+        concurrency: Number of threads that will use the client concurrently.
+        settings: Blob storage settings - defaults to `current_settings().blob`.
+
+    Returns:
+        The container client.
+
+    """
+    return get_blob_service_client(concurrency, settings).get_container_client(container)
+
+
+def clear_clients() -> None:
+    """Drops all cached clients."""
+    with _lock:
+        _clients.clear()
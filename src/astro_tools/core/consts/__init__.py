@@ -4,9 +4,10 @@
 
 from __future__ import annotations
 
-from astro_tools.core.consts import compute, directories, logging, reproducibility
+from astro_tools.core.consts import channels, compute, directories, logging, reproducibility
 
 __all__ = [
+    "channels",
     "compute",
     "directories",
     "logging",
@@ -0,0 +1,43 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+"""Imaging channel related consts.
+
+Attributes:
+    CHANNEL_LOOKUP (dict[str, str]): Mapping between telescope-live file name patterns and channel letters.
+    CHANNEL_PATTERNS (tuple[str, ...]): Channel patterns searched for in telescope-live file names.
+    UNKNOWN_CHANNEL (str): Channel of files without a known channel pattern in their names.
+
+"""
+
+from __future__ import annotations
+
+CHANNEL_LOOKUP = {
+    "_ha_": "H",
+    "_halpha_": "H",
+    "_sii_": "S",
+    "_oiii_": "O",
+    "_luminance_": "L",
+    "_lum_": "L",
+    "_red_": "R",
+    "_green_": "G",
+    "_blue_": "B",
+}
+CHANNEL_PATTERNS = ("_ha_", "_halpha_", "_sii_", "_oiii_", "_blue_", "_red_", "_green_", "_lum_", "_luminance_")
+UNKNOWN_CHANNEL = "unknown"
+
+
+def detect_channel(name: str) -> str:
+    """Detects the imaging channel from a telescope-live file name.
+
+    Args:
+        name: The file name.
+
+    Returns:
+        The channel letter from `CHANNEL_LOOKUP` or `UNKNOWN_CHANNEL` if no pattern matches.
+
+    """
+    lowered = name.lower()
+    for pattern, channel in CHANNEL_LOOKUP.items():
+        if pattern in lowered:
+            return channel
+    return UNKNOWN_CHANNEL
@@ -3,14 +3,23 @@
 """Compute related consts.
 
 Attributes:
-    CPU_COUNT (int): CPU count.
+    CPU_COUNT (int | None): Physical CPU count - resolved lazily on first access, as `psutil` import is slow.
     EPS (float): Floating point error.
 
 """
 
 from __future__ import annotations
 
-import psutil
+from typing import Any
 
-CPU_COUNT = psutil.cpu_count(logical=False)
 EPS = 1e-8
+
+
+def __getattr__(name: str) -> Any:
+    if name == "CPU_COUNT":
+        import psutil  # noqa: PLC0415
+
+        globals()[name] = psutil.cpu_count(logical=False)
+        return globals()[name]
+    msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(msg)
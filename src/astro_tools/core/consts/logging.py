@@ -9,4 +9,4 @@ Attributes:
 
 from __future__ import annotations
 
-FORMAT = "%(asctime)s:%(pathname)s:%(levelname)s:%(lineno)d:%(message)s"
+FORMAT = "%(asctime)s:%(name)s:%(levelname)s:%(lineno)d:%(message)s"
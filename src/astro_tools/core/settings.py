@@ -8,15 +8,19 @@ Examples:
 
 
     # log current environment
-    logging.info(current_settings.env)  # INFO:dev
+    logging.info(current_settings().environment)  # INFO:dev
     ```
 
+Settings are parsed once per process - call `current_settings.cache_clear()` to re-read them.
+
 """
 #  Copyright (c) xultaeculcis. All rights reserved.
 #  Licensed under MIT License.
 
 from __future__ import annotations
 
+import functools
+
 from pydantic import BaseModel
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -28,12 +32,25 @@ class BlobStorageSettings(BaseModel):
 
     account_name: str
     """Account name."""
-    account_key: str
-    """Account key."""
+    account_key: str | None = None
+    """Account key - if not set, `azure-identity` credentials (`DefaultAzureCredential`) are used."""
+
+    @property
+    def account_url(self) -> str:
+        """Blob service endpoint URL."""
+        return f"https://{self.account_name}.blob.core.windows.net"
 
     @property
     def connection_string(self) -> str:
-        """Connection string."""
+        """Connection string.
+
+        Raises:
+            ValueError: If the account key is not set.
+
+        """
+        if self.account_key is None:
+            msg = "Connection string requires BLOB__ACCOUNT_KEY - use `astro_tools.core.clients` for other credentials"
+            raise ValueError(msg)
         return (
             f"DefaultEndpointsProtocol=https;AccountName={self.account_name};AccountKey={self.account_key};"
             "EndpointSuffix=core.windows.net"
@@ -54,8 +71,9 @@ class Settings(BaseSettings):
     )
 
 
+@functools.cache
 def current_settings() -> Settings:
-    """Instantiate current application settings.
+    """Instantiate current application settings once per process.
 
     Returns:
         Current application settings.
@@ -0,0 +1,3 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+"""Image processing module."""
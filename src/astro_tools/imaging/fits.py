@@ -0,0 +1,334 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+"""Minimal FITS primary image I/O.
+
+Only the primary HDU of single image FITS files is supported, which covers the light and calibration frames
+produced by the telescopes we work with. Reading is done through `numpy.memmap` so that callers can slice
+only the rows they need instead of loading the whole frame into memory.
+
+"""
+
+from __future__ import annotations
+
+import io
+from dataclasses import dataclass
+from typing import IO, TYPE_CHECKING, Any
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+    from pathlib import Path
+
+BLOCK_SIZE = 2880
+"""FITS block size in bytes."""
+CARD_SIZE = 80
+"""FITS header card size in bytes."""
+BITPIX_TO_DTYPE: dict[int, np.dtype[Any]] = {
+    8: np.dtype("u1"),
+    16: np.dtype(">i2"),
+    32: np.dtype(">i4"),
+    64: np.dtype(">i8"),
+    -32: np.dtype(">f4"),
+    -64: np.dtype(">f8"),
+}
+"""Mapping between FITS `BITPIX` values and (big-endian) numpy dtypes."""
+
+_STRUCTURAL_KEYWORDS = {"SIMPLE", "BITPIX", "NAXIS", "EXTEND", "BZERO", "BSCALE", "END"}
+
+
+@dataclass(frozen=True)
+class FitsHeader:
+    """Parsed primary FITS header."""
+
+    cards: dict[str, Any]
+    """Header keyword values (comments and `COMMENT`/`HISTORY` cards are dropped)."""
+    data_offset: int
+    """Offset of the data unit in bytes from the start of the file."""
+
+    @property
+    def bitpix(self) -> int:
+        """The `BITPIX` value."""
+        return int(self.cards["BITPIX"])
+
+    @property
+    def dtype(self) -> np.dtype[Any]:
+        """The on-disk (big-endian) data type."""
+        return BITPIX_TO_DTYPE[self.bitpix]
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        """The numpy shape of the data unit - slowest varying axis first."""
+        naxis = int(self.cards.get("NAXIS", 0))
+        return tuple(int(self.cards[f"NAXIS{i}"]) for i in range(naxis, 0, -1))
+
+    @property
+    def bscale(self) -> float:
+        """The `BSCALE` value."""
+        return float(self.cards.get("BSCALE", 1.0))
+
+    @property
+    def bzero(self) -> float:
+        """The `BZERO` value."""
+        return float(self.cards.get("BZERO", 0.0))
+
+    @property
+    def data_size(self) -> int:
+        """The size of the data unit in bytes (without padding)."""
+        return int(np.prod(self.shape, dtype=np.int64)) * self.dtype.itemsize if self.shape else 0
+
+
+def _parse_value(raw: str) -> Any:
+    raw = raw.strip()
+    if raw.startswith("'"):
+        # Strings are quoted with single quotes, quotes inside are escaped by doubling them
+        end = 1
+        while True:
+            end = raw.find("'", end)
+            if end == -1 or raw[end : end + 2] != "''":
+                break
+            end += 2
+        return raw[1:end].replace("''", "'").rstrip()
+    value = raw.split("/", 1)[0].strip()
+    if value in {"T", "F"}:
+        return value == "T"
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value.replace("D", "E"))
+    except ValueError:
+        return value
+
+
+def _format_value(value: Any) -> str:
+    if isinstance(value, bool):
+        return f"{'T' if value else 'F':>20}"
+    if isinstance(value, int | np.integer):
+        return f"{int(value):>20}"
+    if isinstance(value, float | np.floating):
+        return f"{float(value)!r:>20}"
+    text = str(value).replace("'", "''")
+    return f"'{text:<8}'"
+
+
+def _format_card(keyword: str, value: Any) -> bytes:
+    card = f"{keyword.upper():<8}= {_format_value(value)}"
+    if len(card) > CARD_SIZE:
+        msg = f"FITS card for keyword '{keyword}' does not fit into {CARD_SIZE} characters"
+        raise ValueError(msg)
+    return f"{card:<{CARD_SIZE}}".encode("ascii")
+
+
+def _padding(size: int) -> int:
+    return -size % BLOCK_SIZE
+
+
+def read_header(fh: IO[bytes]) -> FitsHeader:
+    """Reads the primary FITS header from a binary stream.
+
+    Args:
+        fh: The binary stream positioned at the start of the FITS file.
+
+    Returns:
+        The parsed header.
+
+    Raises:
+        ValueError: If the stream does not contain a valid FITS header.
+
+    """
+    cards: dict[str, Any] = {}
+    offset = 0
+    while True:
+        block = fh.read(BLOCK_SIZE)
+        if len(block) != BLOCK_SIZE:
+            msg = "Unexpected end of file while reading FITS header"
+            raise ValueError(msg)
+        offset += BLOCK_SIZE
+        for start in range(0, BLOCK_SIZE, CARD_SIZE):
+            card = block[start : start + CARD_SIZE].decode("ascii", errors="replace")
+            keyword = card[:8].strip()
+            if offset == BLOCK_SIZE and start == 0 and keyword != "SIMPLE":
+                msg = "Not a FITS file - missing SIMPLE keyword"
+                raise ValueError(msg)
+            if keyword == "END":
+                return FitsHeader(cards=cards, data_offset=offset)
+            if keyword and card[8:10] == "= ":
+                cards[keyword] = _parse_value(card[10:])
+
+
+def read_header_from_path(path: Path) -> FitsHeader:
+    """Reads the primary FITS header from a file.
+
+    Args:
+        path: The path to the FITS file.
+
+    Returns:
+        The parsed header.
+
+    """
+    with path.open("rb") as fh:
+        return read_header(fh)
+
+
+def open_memmap(path: Path, header: FitsHeader | None = None, mode: str = "r") -> np.memmap[Any, Any]:
+    """Memory maps the raw (unscaled) data unit of a FITS file.
+
+    Args:
+        path: The path to the FITS file.
+        header: An already parsed header - will be read from the file if not provided.
+        mode: The memmap mode.
+
+    Returns:
+        The memory mapped data unit in its on-disk data type.
+
+    """
+    header = header or read_header_from_path(path)
+    return np.memmap(path, dtype=header.dtype, mode=mode, offset=header.data_offset, shape=header.shape)  # type: ignore[call-overload,no-any-return]
+
+
+def to_physical(
+    raw: np.ndarray[Any, Any], header: FitsHeader, dtype: type[np.floating[Any]] = np.float32
+) -> np.ndarray[Any, Any]:
+    """Converts raw stored values to physical values by applying `BSCALE` and `BZERO`.
+
+    Args:
+        raw: The raw values.
+        header: The header describing the data.
+        dtype: The floating point output type.
+
+    Returns:
+        The physical values in native byte order.
+
+    """
+    data = raw.astype(dtype)
+    if header.bscale != 1.0:
+        data *= dtype(header.bscale)
+    if header.bzero != 0.0:
+        data += dtype(header.bzero)
+    return data
+
+
+def read_image(path: Path) -> np.ndarray[Any, Any]:
+    """Reads a FITS image into memory as `float32` physical values.
+
+    Args:
+        path: The path to the FITS file.
+
+    Returns:
+        The image data.
+
+    """
+    header = read_header_from_path(path)
+    return to_physical(open_memmap(path, header), header)
+
+
+def image_from_bytes(buf: bytes) -> tuple[FitsHeader, np.ndarray[Any, Any]]:
+    """Parses an in-memory FITS file (e.g. a member read from a zip archive).
+
+    Args:
+        buf: The FITS file content.
+
+    Returns:
+        A tuple of the parsed header and the raw (unscaled) data as a read-only view over the buffer.
+
+    """
+    header = read_header(io.BytesIO(buf))
+    if len(buf) < header.data_offset + header.data_size:
+        msg = "Unexpected end of file while reading FITS data"
+        raise ValueError(msg)
+    count = header.data_size // header.dtype.itemsize
+    raw = np.frombuffer(buf, dtype=header.dtype, count=count, offset=header.data_offset)
+    return header, raw.reshape(header.shape)
+
+
+def _header_bytes(
+    shape: tuple[int, ...],
+    bitpix: int,
+    extra: Mapping[str, Any] | None,
+    bzero: int | None = None,
+) -> bytes:
+    cards = [
+        _format_card("SIMPLE", value=True),
+        _format_card("BITPIX", bitpix),
+        _format_card("NAXIS", len(shape)),
+        *(_format_card(f"NAXIS{i}", size) for i, size in enumerate(reversed(shape), start=1)),
+    ]
+    if bzero is not None:
+        cards.extend([_format_card("BZERO", bzero), _format_card("BSCALE", 1)])
+    cards.extend(
+        _format_card(key, value) for key, value in (extra or {}).items() if key.upper() not in _STRUCTURAL_KEYWORDS
+    )
+    header = b"".join(cards) + f"{'END':<{CARD_SIZE}}".encode("ascii")
+    return header + b" " * _padding(len(header))
+
+
+def create_image(
+    path: Path,
+    shape: tuple[int, ...],
+    header: Mapping[str, Any] | None = None,
+) -> np.memmap[Any, Any]:
+    """Preallocates a `float32` FITS image on disk and memory maps its data unit for writing.
+
+    The file is created sparse where the filesystem supports it, so allocation is instant regardless of
+    the image size. Callers can write into any region of the returned array and call `flush()`.
+
+    Args:
+        path: The output path.
+        shape: The image shape.
+        header: Additional header cards.
+
+    Returns:
+        Writable memory map over the data unit.
+
+    """
+    header_bytes = _header_bytes(shape, -32, header)
+    data_size = int(np.prod(shape, dtype=np.int64)) * 4
+    with path.open("wb") as fh:
+        fh.write(header_bytes)
+        fh.truncate(len(header_bytes) + data_size + _padding(data_size))
+    return np.memmap(path, dtype=">f4", mode="r+", offset=len(header_bytes), shape=shape)
+
+
+def encode_image(data: np.ndarray[Any, Any], header: Mapping[str, Any] | None = None) -> bytes:
+    """Encodes an image as FITS file content.
+
+    Integer data is written with its native `BITPIX`, unsigned 16-bit data uses the standard `BZERO` offset.
+
+    Args:
+        data: The image data.
+        header: Additional header cards.
+
+    Returns:
+        The FITS file content.
+
+    Raises:
+        ValueError: If the data type is not supported by FITS.
+
+    """
+    native = {dtype.newbyteorder("="): bitpix for bitpix, dtype in BITPIX_TO_DTYPE.items()}
+    bzero = None
+    if data.dtype == np.uint16:
+        bzero = 32768
+        data = data.astype(np.int32) - bzero
+        bitpix = 16
+    elif (bitpix := native.get(data.dtype.newbyteorder("="))) is None:  # type: ignore[assignment]
+        msg = f"Unsupported FITS data type: {data.dtype}"
+        raise ValueError(msg)
+    payload = data.astype(BITPIX_TO_DTYPE[bitpix]).tobytes()
+    return _header_bytes(data.shape, bitpix, header, bzero=bzero) + payload + b"\0" * _padding(len(payload))
+
+
+def write_image(path: Path, data: np.ndarray[Any, Any], header: Mapping[str, Any] | None = None) -> None:
+    """Writes an image as a FITS file.
+
+    Integer data is written with its native `BITPIX`, unsigned 16-bit data uses the standard `BZERO` offset.
+
+    Args:
+        path: The output path.
+        data: The image data.
+        header: Additional header cards.
+
+    """
+    path.write_bytes(encode_image(data, header))
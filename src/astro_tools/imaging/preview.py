@@ -0,0 +1,294 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+"""Stretched PNG previews of FITS frames with a content-addressed cache.
+
+Frames on disk are memory mapped and decimated with strided slicing, so only every n-th row is read from
+disk. Archive members have to be decompressed, but are never extracted to disk.
+
+Rendered previews are stored in a cache keyed by the frame content, not by its location:
+
+- archive members are identified by their name, CRC-32 and size from the archive central directory,
+  so renaming or moving an archive keeps its previews,
+- files on disk are identified by a BLAKE2 hash of their content. Hashes are remembered in an index keyed
+  by path, size and modification time, so unchanged files are not hashed again on subsequent runs.
+
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import struct
+import zlib
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from astro_tools.imaging import fits
+from astro_tools.imaging.sources import read_frame
+from astro_tools.utils import profiling
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from astro_tools.imaging.sources import FrameSource
+
+_HASH_CHUNK_SIZE = 4 * 1024 * 1024
+_MAD_TO_STD = 1.4826
+_SHADOWS_CLIP = -2.8
+_TARGET_BACKGROUND = 0.25
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def decimated_frame(source: FrameSource, max_size: int) -> np.ndarray[Any, Any]:
+    """Reads a frame decimated with a stride so that its longer side does not exceed `max_size`.
+
+    Args:
+        source: The frame source.
+        max_size: The maximum preview size in pixels.
+
+    Returns:
+        The decimated frame in physical units.
+
+    Raises:
+        ValueError: If the frame is not a 2D image.
+
+    """
+    header, raw = read_frame(source)
+    if raw.ndim != 2:  # noqa: PLR2004
+        msg = f"Expected 2D image, got shape {raw.shape}"
+        raise ValueError(msg)
+    step = max(1, math.ceil(max(raw.shape) / max_size))
+    return fits.to_physical(raw[::step, ::step], header)
+
+
+def midtones_transfer(midtones: float, x: np.ndarray[Any, Any] | float) -> Any:
+    """Midtones transfer function used for screen stretching of linear data.
+
+    Args:
+        midtones: The midtones balance in range (0, 1).
+        x: Normalised values in range [0, 1].
+
+    Returns:
+        The stretched values.
+
+    """
+    return (midtones - 1) * x / ((2 * midtones - 1) * x - midtones)
+
+
+def stretch(data: np.ndarray[Any, Any]) -> np.ndarray[Any, Any]:
+    """Applies an automatic screen stretch and converts the image to 8-bit.
+
+    Shadows are clipped slightly below the background and midtones are chosen so that the background ends
+    up at a quarter of the output range.
+
+    Args:
+        data: The linear image.
+
+    Returns:
+        The stretched `uint8` image.
+
+    """
+    finite = data[np.isfinite(data)]
+    if finite.size == 0:
+        return np.zeros(data.shape, dtype=np.uint8)
+    low, high = float(finite.min()), float(finite.max())
+    if high <= low:
+        return np.zeros(data.shape, dtype=np.uint8)
+    normalized = np.nan_to_num((data - low) / (high - low), nan=0.0)
+    median = float(np.median(normalized))
+    mad = _MAD_TO_STD * float(np.median(np.abs(normalized - median)))
+    shadows = min(max(median + _SHADOWS_CLIP * mad, 0.0), median)
+    clipped = np.clip((normalized - shadows) / (1.0 - shadows), 0.0, 1.0)
+    background = (median - shadows) / (1.0 - shadows)
+    midtones = float(midtones_transfer(_TARGET_BACKGROUND, background)) if 0.0 < background < 1.0 else 0.5
+    return np.round(midtones_transfer(midtones, clipped) * 255.0).astype(np.uint8)  # type: ignore[no-any-return]
+
+
+def _png_chunk(kind: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I", len(payload)) + kind + payload + struct.pack(">I", zlib.crc32(kind + payload))
+
+
+def encode_png(image: np.ndarray[Any, Any], compression_level: int = 6) -> bytes:
+    """Encodes an 8-bit grayscale image as PNG.
+
+    Args:
+        image: The `uint8` 2D image.
+        compression_level: The zlib compression level.
+
+    Returns:
+        The PNG file content.
+
+    """
+    height, width = image.shape
+    # Every scanline starts with a filter type byte - 0 means no filtering
+    scanlines = np.hstack([np.zeros((height, 1), dtype=np.uint8), image.astype(np.uint8)])
+    return b"".join([
+        _PNG_SIGNATURE,
+        _png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)),
+        _png_chunk(b"IDAT", zlib.compress(scanlines.tobytes(), compression_level)),
+        _png_chunk(b"IEND", b""),
+    ])
+
+
+def render_preview(source: FrameSource, max_size: int = 512) -> bytes:
+    """Renders a stretched PNG preview of a frame.
+
+    Args:
+        source: The frame source.
+        max_size: The maximum preview size in pixels.
+
+    Returns:
+        The PNG file content.
+
+    """
+    return encode_png(stretch(decimated_frame(source, max_size)))
+
+
+def content_hash(path: Path) -> str:
+    """Computes a BLAKE2 hash of the file content.
+
+    Args:
+        path: The file path.
+
+    Returns:
+        The hex digest.
+
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    with path.open("rb") as fh:
+        while chunk := fh.read(_HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(source: FrameSource, max_size: int, file_hash: str | None = None) -> str:
+    """Builds a content-addressed cache key for the preview of a frame.
+
+    Args:
+        source: The frame source.
+        max_size: The maximum preview size in pixels.
+        file_hash: Already known content hash of a file on disk - computed if not provided.
+
+    Returns:
+        The cache key.
+
+    """
+    if source.member is not None:
+        identity = f"member:{source.name}:{source.crc:08x}:{source.size}"
+    else:
+        identity = f"file:{file_hash or content_hash(source.path)}"
+    return hashlib.blake2b(f"{identity}:{max_size}".encode(), digest_size=20).hexdigest()
+
+
+class PreviewCache:
+    """Content-addressed preview cache on disk."""
+
+    def __init__(self, cache_dir: Path) -> None:
+        """Initializes the cache.
+
+        Args:
+            cache_dir: The cache directory.
+
+        """
+        self.cache_dir = cache_dir
+        self.index_path = cache_dir / "index.json"
+
+    def path_for(self, key: str) -> Path:
+        """Returns the cache path for the key.
+
+        Args:
+            key: The cache key.
+
+        Returns:
+            The path where the preview is (or would be) stored.
+
+        """
+        return self.cache_dir / key[:2] / f"{key}.png"
+
+    def get(self, key: str) -> Path | None:
+        """Looks up a cached preview.
+
+        Args:
+            key: The cache key.
+
+        Returns:
+            The path to the cached preview or `None` if it is not cached.
+
+        """
+        path = self.path_for(key)
+        return path if path.exists() else None
+
+    def put(self, key: str, png: bytes) -> Path:
+        """Stores a preview in the cache atomically.
+
+        Args:
+            key: The cache key.
+            png: The PNG file content.
+
+        Returns:
+            The path to the cached preview.
+
+        """
+        path = self.path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(png)
+        tmp_path.replace(path)
+        return path
+
+    def load_index(self) -> dict[str, tuple[int, int, str]]:
+        """Loads the file hash index.
+
+        Returns:
+            A mapping between file paths and their size, modification time (ns) and content hash.
+
+        """
+        if not self.index_path.exists():
+            return {}
+        index = json.loads(self.index_path.read_text())
+        return {path: (int(size), int(mtime_ns), str(digest)) for path, (size, mtime_ns, digest) in index.items()}
+
+    def save_index(self, index: dict[str, tuple[int, int, str]]) -> None:
+        """Saves the file hash index.
+
+        Args:
+            index: A mapping between file paths and their size, modification time (ns) and content hash.
+
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(index))
+        tmp_path.replace(self.index_path)
+
+
+def cached_preview(
+    source: FrameSource,
+    cache_dir: Path,
+    max_size: int = 512,
+    file_hash: str | None = None,
+) -> tuple[Path, str | None, bool]:
+    """Returns the cached preview of a frame, rendering it first if it is not cached yet.
+
+    Args:
+        source: The frame source.
+        cache_dir: The cache directory.
+        max_size: The maximum preview size in pixels.
+        file_hash: Already known content hash of a file on disk.
+
+    Returns:
+        A tuple of the cached preview path, the content hash of a file on disk (`None` for archive members)
+        and a flag indicating if the preview was rendered (`False` on cache hit).
+
+    """
+    cache = PreviewCache(cache_dir)
+    if source.member is None and file_hash is None:
+        file_hash = content_hash(source.path)
+    key = cache_key(source, max_size, file_hash)
+    if (path := cache.get(key)) is not None:
+        return path, file_hash, False
+    with profiling.span("frames.preview.render", frame=str(source)):
+        png = render_preview(source, max_size)
+    return cache.put(key, png), file_hash, True
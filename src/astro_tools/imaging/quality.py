@@ -0,0 +1,302 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+"""Frame quality metrics.
+
+All metrics are computed on a binned (downsampled) copy of the frame with vectorised numpy operations. Frames are
+binned on the fly while they are read in blocks of rows, so only the binned copy and a single block are kept
+in memory:
+
+- background and noise from iterative sigma clipping (median and MAD based standard deviation),
+- star count from local maxima of the smoothed image above the detection threshold,
+- FWHM estimated from the second order moments of the brightest stars.
+
+Frames hit by clouds show up with elevated background and few stars, bad tracking or focus with large FWHM.
+
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from astro_tools.core.consts.channels import detect_channel
+from astro_tools.imaging import fits
+from astro_tools.imaging.sources import read_frame_blocks
+from astro_tools.utils import profiling
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from astro_tools.imaging.sources import FrameSource
+
+_MAD_TO_STD = 1.4826
+_SIGMA_TO_FWHM = 2.0 * math.sqrt(2.0 * math.log(2.0))
+_MAX_STATS_SAMPLES = 1_000_000
+_BLOCK_BINNED_ROWS = 64
+"""Number of binned rows produced from a single block of rows read from a frame."""
+
+
+@dataclass(frozen=True)
+class FrameQuality:
+    """Frame quality metrics."""
+
+    background: float
+    """Sigma clipped background level."""
+    noise: float
+    """Sigma clipped background noise, scaled back to the original pixel size."""
+    star_count: int
+    """Number of detected stars."""
+    fwhm: float
+    """Median FWHM of the brightest stars in original pixels - NaN if no stars were detected."""
+
+
+def bin_image(data: np.ndarray[Any, Any], factor: int) -> np.ndarray[Any, Any]:
+    """Bins the image by averaging `factor x factor` pixel blocks.
+
+    Args:
+        data: The 2D image.
+        factor: The binning factor.
+
+    Returns:
+        The binned `float32` image. Rows and columns that do not fill a whole block are dropped.
+
+    Raises:
+        ValueError: If the image is not 2D.
+
+    """
+    factor = max(factor, 1)
+    step = factor * _BLOCK_BINNED_ROWS
+    return bin_blocks((data[start : start + step] for start in range(0, data.shape[0], step)), data.shape, factor)
+
+
+def bin_blocks(blocks: Iterable[np.ndarray[Any, Any]], shape: tuple[int, ...], factor: int) -> np.ndarray[Any, Any]:
+    """Bins an image read in blocks of rows by averaging `factor x factor` pixel blocks.
+
+    Only a single block is converted to `float32` at once, so the peak memory is the binned image plus one block.
+
+    Args:
+        blocks: Consecutive blocks of image rows - all but the last block must have a multiple of `factor` rows.
+        shape: The 2D image shape.
+        factor: The binning factor.
+
+    Returns:
+        The binned `float32` image. Rows and columns that do not fill a whole block are dropped.
+
+    Raises:
+        ValueError: If the image is not 2D or a block is not aligned to the binning factor.
+
+    """
+    if len(shape) != 2:  # noqa: PLR2004
+        msg = f"Expected 2D image, got shape {shape}"
+        raise ValueError(msg)
+    factor = max(factor, 1)
+    height, width = shape[0] // factor, shape[1] // factor
+    binned = np.empty((height, width), dtype=np.float32)
+    row = 0
+    for block in blocks:
+        count = min(block.shape[0] // factor, height - row)
+        if count <= 0:
+            continue
+        if block.shape[0] % factor and row + count < height:
+            msg = f"Block of {block.shape[0]} rows is not aligned to the binning factor {factor}"
+            raise ValueError(msg)
+        pixels = block[: count * factor, : width * factor].astype(np.float32)
+        binned[row : row + count] = pixels.reshape(count, factor, width, factor).mean(axis=(1, 3), dtype=np.float32)
+        row += count
+    return binned
+
+
+def sigma_clipped_stats(data: np.ndarray[Any, Any], kappa: float = 3.0, iterations: int = 5) -> tuple[float, float]:
+    """Computes sigma clipped median and standard deviation.
+
+    Args:
+        data: The image.
+        kappa: The clipping threshold in standard deviations.
+        iterations: Maximum number of clipping iterations.
+
+    Returns:
+        A tuple of the clipped median and standard deviation.
+
+    """
+    values = data.ravel()
+    if values.size > _MAX_STATS_SAMPLES:
+        values = values[:: values.size // _MAX_STATS_SAMPLES + 1]
+    values = values[np.isfinite(values)]
+    median, std = float(np.median(values)), float(np.std(values))
+    for _ in range(iterations):
+        median = float(np.median(values))
+        std = _MAD_TO_STD * float(np.median(np.abs(values - median)))
+        kept = values[np.abs(values - median) <= kappa * std]
+        if kept.size in {0, values.size}:
+            break
+        values = kept
+    return median, std
+
+
+def box_filter(data: np.ndarray[Any, Any]) -> np.ndarray[Any, Any]:
+    """Smooths the image with a 3x3 box filter.
+
+    Args:
+        data: The image.
+
+    Returns:
+        The smoothed image of the same shape.
+
+    """
+    padded = np.pad(data, 1, mode="edge")
+    smoothed = np.zeros_like(data, dtype=np.float32)
+    for dy in range(3):
+        for dx in range(3):
+            smoothed += padded[dy : dy + data.shape[0], dx : dx + data.shape[1]]
+    return smoothed / np.float32(9.0)
+
+
+def find_peaks(data: np.ndarray[Any, Any], threshold: float) -> tuple[np.ndarray[Any, Any], np.ndarray[Any, Any]]:
+    """Finds local maxima above the threshold.
+
+    A pixel is a local maximum if it is strictly greater than all of its 8 neighbours. Pixels on the image
+    border are never reported.
+
+    Args:
+        data: The image.
+        threshold: The detection threshold.
+
+    Returns:
+        A tuple of row and column indices of the peaks.
+
+    """
+    center = data[1:-1, 1:-1]
+    mask = center > threshold
+    for dy in (-1, 0, 1):
+        for dx in (-1, 0, 1):
+            if dy or dx:
+                mask &= center > data[1 + dy : data.shape[0] - 1 + dy, 1 + dx : data.shape[1] - 1 + dx]
+    ys, xs = np.nonzero(mask)
+    return ys + 1, xs + 1
+
+
+def fwhm_from_moments(
+    data: np.ndarray[Any, Any],
+    ys: np.ndarray[Any, Any],
+    xs: np.ndarray[Any, Any],
+    background: float,
+    radius: int = 3,
+    max_stars: int = 100,
+) -> float:
+    """Estimates the FWHM from the second order moments of windows around the brightest peaks.
+
+    Args:
+        data: The image.
+        ys: Peak row indices.
+        xs: Peak column indices.
+        background: The background level subtracted from the windows.
+        radius: Window radius in pixels.
+        max_stars: Maximum number of (brightest) stars to use.
+
+    Returns:
+        Median FWHM in pixels or NaN if there are no usable stars.
+
+    """
+    inside = (ys >= radius) & (ys < data.shape[0] - radius) & (xs >= radius) & (xs < data.shape[1] - radius)
+    ys, xs = ys[inside], xs[inside]
+    if ys.size == 0:
+        return math.nan
+    brightest = np.argsort(data[ys, xs])[::-1][:max_stars]
+    ys, xs = ys[brightest], xs[brightest]
+
+    offsets = np.arange(-radius, radius + 1)
+    dy, dx = np.meshgrid(offsets, offsets, indexing="ij")
+    windows = np.clip(data[ys[:, None, None] + dy, xs[:, None, None] + dx] - background, 0.0, None)
+    total = windows.sum(axis=(1, 2))
+    valid = total > 0
+    windows, total = windows[valid], total[valid]
+    if total.size == 0:
+        return math.nan
+    cy = (windows * dy).sum(axis=(1, 2)) / total
+    cx = (windows * dx).sum(axis=(1, 2)) / total
+    distance = (dy - cy[:, None, None]) ** 2 + (dx - cx[:, None, None]) ** 2
+    variance = (windows * distance).sum(axis=(1, 2)) / (2.0 * total)
+    return float(np.median(_SIGMA_TO_FWHM * np.sqrt(variance)))
+
+
+def score_image(data: np.ndarray[Any, Any], downsample: int = 2, detection_sigma: float = 5.0) -> FrameQuality:
+    """Computes quality metrics for a single image.
+
+    Args:
+        data: The 2D image in physical units.
+        downsample: The binning factor applied before computing the metrics.
+        detection_sigma: The star detection threshold in background standard deviations.
+
+    Returns:
+        The frame quality metrics.
+
+    """
+    return score_binned(bin_image(data, downsample), downsample, detection_sigma)
+
+
+def score_binned(binned: np.ndarray[Any, Any], downsample: int = 2, detection_sigma: float = 5.0) -> FrameQuality:
+    """Computes quality metrics for an already binned image.
+
+    Args:
+        binned: The binned 2D image in physical units.
+        downsample: The binning factor that was applied - noise and FWHM are scaled back to original pixels.
+        detection_sigma: The star detection threshold in background standard deviations.
+
+    Returns:
+        The frame quality metrics.
+
+    """
+    background, noise = sigma_clipped_stats(binned)
+    # Detect on a smoothed copy - single hot pixels and cosmic ray hits are mostly suppressed,
+    # 3x3 box averaging lowers the noise of a flat background three times
+    ys, xs = find_peaks(box_filter(binned), background + detection_sigma * noise / 3.0)
+    fwhm = fwhm_from_moments(binned, ys, xs, background)
+    factor = max(downsample, 1)
+    return FrameQuality(
+        background=background,
+        noise=noise * factor,
+        star_count=int(ys.size),
+        fwhm=fwhm * factor,
+    )
+
+
+def score_frame(source: FrameSource, downsample: int = 2, detection_sigma: float = 5.0) -> dict[str, Any]:
+    """Reads a frame and computes its quality metrics.
+
+    Errors are reported in the `error` column instead of being raised, so that a single broken frame
+    does not stop scoring of a whole batch.
+
+    Args:
+        source: The frame source.
+        downsample: The binning factor applied before computing the metrics.
+        detection_sigma: The star detection threshold in background standard deviations.
+
+    Returns:
+        A table row with the frame location, channel, shape and quality metrics.
+
+    """
+    row: dict[str, Any] = {
+        "path": source.path.as_posix(),
+        "member": source.member,
+        "name": source.name,
+        "channel": detect_channel(source.name),
+        "height": None,
+        "width": None,
+        **dict.fromkeys(FrameQuality.__dataclass_fields__),
+        "error": None,
+    }
+    try:
+        with profiling.span("frames.score.frame", frame=str(source)):
+            factor = max(downsample, 1)
+            header, blocks = read_frame_blocks(source, rows=factor * _BLOCK_BINNED_ROWS)
+            # Binning averages pixels, so BSCALE and BZERO can be applied to the (much smaller) binned image
+            binned = fits.to_physical(bin_blocks(blocks, header.shape, factor), header)
+            quality = score_binned(binned, downsample, detection_sigma)
+    except Exception as e:  # noqa: BLE001
+        row["error"] = f"{type(e).__name__}: {e}"
+        return row
+    row.update(height=header.shape[0], width=header.shape[1], **asdict(quality))
+    return row
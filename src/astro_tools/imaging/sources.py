@@ -0,0 +1,179 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+"""FITS frame sources - loose files on disk and members of zip archives.
+
+Archive members are read straight from the archive, without extracting anything to disk - either into memory
+or in blocks of rows, so that only a few rows of a frame are held in memory at once. Worker processes keep a small
+cache of open archives, so reading many members from the same archive only parses its central directory once.
+
+"""
+
+from __future__ import annotations
+
+import functools
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any
+
+import numpy as np
+
+from astro_tools.imaging import fits
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+FITS_SUFFIXES = (".fits", ".fit", ".fts")
+"""File suffixes recognised as FITS files."""
+
+
+@dataclass(frozen=True, order=True)
+class FrameSource:
+    """A single FITS frame stored either as a file or as a zip archive member."""
+
+    path: Path
+    """The path to the FITS file or to the zip archive."""
+    member: str | None = None
+    """The archive member name - `None` for files on disk."""
+    size: int = 0
+    """The uncompressed frame size in bytes."""
+    crc: int | None = None
+    """The CRC-32 of the archive member - `None` for files on disk."""
+
+    @property
+    def name(self) -> str:
+        """The frame file name."""
+        return Path(self.member).name if self.member is not None else self.path.name
+
+    def __str__(self) -> str:
+        """Human-readable location of the frame."""
+        return self.path.as_posix() if self.member is None else f"{self.path.as_posix()}::{self.member}"
+
+
+def is_fits_name(name: str) -> bool:
+    """Checks if file name has one of the FITS suffixes.
+
+    Args:
+        name: The file name.
+
+    Returns:
+        `True` if the name has a FITS suffix.
+
+    """
+    return name.lower().endswith(FITS_SUFFIXES)
+
+
+def archive_frame_sources(zip_path: Path) -> list[FrameSource]:
+    """Lists FITS members of a zip archive using only its central directory.
+
+    Args:
+        zip_path: The path to the zip archive.
+
+    Returns:
+        Frame sources for FITS members in the archive.
+
+    """
+    with zipfile.ZipFile(zip_path, "r") as zf:
+        return [
+            FrameSource(path=zip_path, member=info.filename, size=info.file_size, crc=info.CRC)
+            for info in zf.infolist()
+            if not info.is_dir() and is_fits_name(info.filename)
+        ]
+
+
+def iter_frame_sources(root: Path) -> Iterator[FrameSource]:
+    """Finds FITS frames under the root - both files on disk and members of zip archives.
+
+    Args:
+        root: A directory, a zip archive or a single FITS file.
+
+    Yields:
+        Frame sources sorted by path and member name.
+
+    """
+    paths = sorted(fp for fp in root.rglob("*") if fp.is_file()) if root.is_dir() else [root]
+    for path in paths:
+        if path.suffix.lower() == ".zip":
+            yield from sorted(archive_frame_sources(path))
+        elif is_fits_name(path.name):
+            yield FrameSource(path=path, size=path.stat().st_size)
+
+
+@functools.lru_cache(maxsize=8)
+def _open_archive(path: Path) -> zipfile.ZipFile:
+    return zipfile.ZipFile(path, "r")
+
+
+def read_frame_bytes(source: FrameSource) -> bytes:
+    """Reads the raw FITS file content of a frame.
+
+    Args:
+        source: The frame source.
+
+    Returns:
+        The FITS file content.
+
+    """
+    if source.member is None:
+        return source.path.read_bytes()
+    return _open_archive(source.path).read(source.member)
+
+
+def read_frame(source: FrameSource) -> tuple[fits.FitsHeader, np.ndarray[Any, Any]]:
+    """Reads the header and raw (unscaled) data of a frame.
+
+    Files on disk are memory mapped, archive members are decompressed into memory.
+
+    Args:
+        source: The frame source.
+
+    Returns:
+        A tuple of the parsed header and the raw data.
+
+    """
+    if source.member is None:
+        header = fits.read_header_from_path(source.path)
+        return header, fits.open_memmap(source.path, header)
+    return fits.image_from_bytes(read_frame_bytes(source))
+
+
+def read_frame_blocks(source: FrameSource, rows: int) -> tuple[fits.FitsHeader, Iterator[np.ndarray[Any, Any]]]:
+    """Reads the header of a frame and returns an iterator over its raw (unscaled) data in blocks of rows.
+
+    Files on disk are memory mapped, archive members are decompressed block by block - only a single block
+    of a member is held in memory at once.
+
+    Args:
+        source: The frame source.
+        rows: Number of rows (along the slowest varying axis) per block - the last block may be shorter.
+
+    Returns:
+        A tuple of the parsed header and the iterator over the blocks.
+
+    """
+    if source.member is None:
+        header = fits.read_header_from_path(source.path)
+        data = fits.open_memmap(source.path, header)
+        return header, (data[start : start + rows] for start in range(0, header.shape[0] if header.shape else 0, rows))
+    fh = _open_archive(source.path).open(source.member)
+    try:
+        header = fits.read_header(fh)
+    except Exception:
+        fh.close()
+        raise
+    return header, _iter_member_blocks(fh, header, rows)
+
+
+def _iter_member_blocks(fh: IO[bytes], header: fits.FitsHeader, rows: int) -> Iterator[np.ndarray[Any, Any]]:
+    row_shape = header.shape[1:]
+    row_size = int(np.prod(row_shape, dtype=np.int64)) * header.dtype.itemsize
+    with fh:
+        remaining = header.shape[0] if header.shape else 0
+        while remaining > 0:
+            count = min(rows, remaining)
+            buf = fh.read(count * row_size)
+            if len(buf) != count * row_size:
+                msg = "Unexpected end of file while reading FITS data"
+                raise ValueError(msg)
+            yield np.frombuffer(buf, dtype=header.dtype).reshape((count, *row_shape))
+            remaining -= count
@@ -0,0 +1,506 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+"""Tile-parallel light frame stacking.
+
+The stacking engine splits the output image into horizontal bands of rows (tiles). Each tile is processed by a
+separate worker process, which reads only the rows of the tile from every (memory mapped) light frame, applies
+the calibration masters, rejects outliers with vectorised kappa-sigma or winsorized kappa-sigma clipping and
+writes the result straight into a preallocated, memory mapped output FITS file.
+
+The tile height is derived from the memory budget, so the total working set of all workers stays within it.
+Finished tiles are recorded in a journal next to the output file - an interrupted run can be restarted and
+will only process the missing tiles.
+
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import json
+import math
+import warnings
+from concurrent.futures import as_completed
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Literal
+
+import numpy as np
+from tqdm import tqdm
+
+from astro_tools.core import consts
+from astro_tools.core.consts.channels import detect_channel
+from astro_tools.imaging import fits
+from astro_tools.utils import profiling
+from astro_tools.utils.logging import get_logger
+from astro_tools.utils.processes import process_pool
+from astro_tools.utils.serialization import JsonEncoder
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping, Sequence
+
+_logger = get_logger(__name__)
+
+RejectionMethod = Literal["none", "sigma", "winsorized"]
+"""Supported pixel rejection methods."""
+
+_WORKING_COPIES = 4  # tile stack + temporary copies made by median / clipping
+_SAMPLE_STRIDE = 16
+_WINSORIZATION_CUTOFF = 1.5
+_WINSORIZATION_CORRECTION = 1.134
+_WINSORIZATION_ITERATIONS = 5
+
+
+@dataclass(frozen=True)
+class CalibrationMasters:
+    """Master calibration frames applied to every light frame before stacking."""
+
+    bias: Path | None = None
+    """Master bias - subtracted from the light frame."""
+    dark: Path | None = None
+    """Master dark - subtracted from the light frame, expected to be bias subtracted already."""
+    flat: Path | None = None
+    """Master flat - light frames are divided by the flat normalised to its median."""
+
+
+@dataclass(frozen=True)
+class StackingConfig:
+    """Stacking configuration."""
+
+    rejection: RejectionMethod = "sigma"
+    """Pixel rejection method."""
+    kappa_low: float = 3.0
+    """Lower rejection threshold in standard deviations."""
+    kappa_high: float = 3.0
+    """Upper rejection threshold in standard deviations."""
+    iterations: int = 3
+    """Maximum number of rejection iterations."""
+    normalize: bool = True
+    """Whether to additively normalise frame backgrounds to the first frame before rejection."""
+    memory_limit_mb: int = 2048
+    """Total memory budget for all workers in MB."""
+    workers: int | None = None
+    """Number of worker processes - defaults to the number of physical cores."""
+
+
+@dataclass(frozen=True)
+class _TileJob:
+    index: int
+    row_start: int
+    row_end: int
+    frames: tuple[Path, ...]
+    offsets: tuple[float, ...]
+    masters: CalibrationMasters
+    flat_median: float
+    config: StackingConfig
+    output: Path
+
+
+@dataclass
+class _Journal:
+    path: Path
+    fingerprint: str
+    tile_rows: int
+    done: set[int] = field(default_factory=set)
+
+    @classmethod
+    def load(cls, path: Path, fingerprint: str) -> _Journal | None:
+        if not path.exists():
+            return None
+        lines = path.read_text().splitlines()
+        if not lines:
+            return None
+        meta = json.loads(lines[0])
+        if meta.get("fingerprint") != fingerprint:
+            return None
+        done = {int(line) for line in lines[1:] if line.strip().isdigit()}
+        return cls(path=path, fingerprint=fingerprint, tile_rows=int(meta["tile_rows"]), done=done)
+
+    def start(self) -> None:
+        self.path.write_text(json.dumps({"fingerprint": self.fingerprint, "tile_rows": self.tile_rows}) + "\n")
+
+    def mark_done(self, index: int) -> None:
+        with self.path.open("a") as fh:
+            fh.write(f"{index}\n")
+        self.done.add(index)
+
+
+@functools.lru_cache(maxsize=4096)
+def _cached_header(path: Path) -> fits.FitsHeader:
+    return fits.read_header_from_path(path)
+
+
+def _read_rows(path: Path, row_start: int, row_end: int, step: int = 1) -> np.ndarray[Any, Any]:
+    header = _cached_header(path)
+    return fits.to_physical(fits.open_memmap(path, header)[row_start:row_end:step, ::step], header)
+
+
+def group_frames_by_channel(paths: Iterable[Path]) -> dict[str, list[Path]]:
+    """Groups light frames by the imaging channel detected from their file names.
+
+    Args:
+        paths: The light frame paths.
+
+    Returns:
+        A mapping between channel letters and sorted frame paths.
+
+    """
+    groups: dict[str, list[Path]] = {}
+    for path in sorted(paths):
+        groups.setdefault(detect_channel(path.name), []).append(path)
+    return groups
+
+
+def sigma_clipped_mean(
+    stack: np.ndarray[Any, Any],
+    kappa_low: float = 3.0,
+    kappa_high: float = 3.0,
+    iterations: int = 3,
+) -> np.ndarray[Any, Any]:
+    """Kappa-sigma clipped mean along the first axis.
+
+    Notes:
+        Rejected pixels are replaced with NaN in place - pass a copy if the input needs to be preserved.
+
+    Args:
+        stack: Floating point array of shape `(frames, ...)`.
+        kappa_low: Lower rejection threshold in standard deviations.
+        kappa_high: Upper rejection threshold in standard deviations.
+        iterations: Maximum number of rejection iterations.
+
+    Returns:
+        The clipped mean with the shape of a single frame.
+
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        for _ in range(iterations):
+            center = np.nanmedian(stack, axis=0)
+            std = np.nanstd(stack, axis=0)
+            reject = (stack < center - kappa_low * std) | (stack > center + kappa_high * std)
+            if not reject.any():
+                break
+            stack[reject] = np.nan
+        return np.nanmean(stack, axis=0)
+
+
+def winsorized_sigma_clipped_mean(
+    stack: np.ndarray[Any, Any],
+    kappa_low: float = 3.0,
+    kappa_high: float = 3.0,
+    iterations: int = 3,
+) -> np.ndarray[Any, Any]:
+    """Winsorized kappa-sigma clipped mean along the first axis.
+
+    The center and spread used for rejection are estimated on a winsorized copy of the data, which makes
+    them robust against strong outliers (satellite trails, cosmic rays) even for small stacks.
+
+    Notes:
+        Rejected pixels are replaced with NaN in place - pass a copy if the input needs to be preserved.
+
+    Args:
+        stack: Floating point array of shape `(frames, ...)`.
+        kappa_low: Lower rejection threshold in standard deviations.
+        kappa_high: Upper rejection threshold in standard deviations.
+        iterations: Maximum number of rejection iterations.
+
+    Returns:
+        The clipped mean with the shape of a single frame.
+
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        for _ in range(iterations):
+            center = np.nanmedian(stack, axis=0)
+            std = np.nanstd(stack, axis=0)
+            for _ in range(_WINSORIZATION_ITERATIONS):
+                winsorized = np.clip(stack, center - _WINSORIZATION_CUTOFF * std, center + _WINSORIZATION_CUTOFF * std)
+                center = np.nanmedian(winsorized, axis=0)
+                new_std = _WINSORIZATION_CORRECTION * np.nanstd(winsorized, axis=0)
+                converged = np.allclose(new_std, std, rtol=5e-4, equal_nan=True)
+                std = new_std
+                if converged:
+                    break
+            reject = (stack < center - kappa_low * std) | (stack > center + kappa_high * std)
+            if not reject.any():
+                break
+            stack[reject] = np.nan
+        return np.nanmean(stack, axis=0)
+
+
+def combine(stack: np.ndarray[Any, Any], config: StackingConfig) -> np.ndarray[Any, Any]:
+    """Combines a stack of calibrated frames using the configured rejection method.
+
+    Args:
+        stack: Floating point array of shape `(frames, ...)`. Will be modified in place.
+        config: The stacking configuration.
+
+    Returns:
+        The combined image.
+
+    """
+    if config.rejection == "none" or stack.shape[0] < 3:  # noqa: PLR2004
+        return stack.mean(axis=0)
+    func = sigma_clipped_mean if config.rejection == "sigma" else winsorized_sigma_clipped_mean
+    return func(stack, config.kappa_low, config.kappa_high, config.iterations)
+
+
+def _calibrate(
+    data: np.ndarray[Any, Any],
+    masters: CalibrationMasters,
+    flat_median: float,
+    row_start: int,
+    row_end: int,
+    step: int = 1,
+) -> np.ndarray[Any, Any]:
+    if masters.bias is not None:
+        data -= _read_rows(masters.bias, row_start, row_end, step)
+    if masters.dark is not None:
+        data -= _read_rows(masters.dark, row_start, row_end, step)
+    if masters.flat is not None:
+        flat = _read_rows(masters.flat, row_start, row_end, step) / np.float32(flat_median)
+        data /= np.where(flat > 0, flat, np.float32(1.0))
+    return data
+
+
+def _stack_tile(job: _TileJob) -> int:
+    """Stacks a single tile and writes it into the output file. Runs in a worker process."""
+    with profiling.span("stack.tile", index=job.index, rows=job.row_end - job.row_start):
+        width = _cached_header(job.frames[0]).shape[1]
+        stack = np.empty((len(job.frames), job.row_end - job.row_start, width), dtype=np.float32)
+        for i, (frame, offset) in enumerate(zip(job.frames, job.offsets, strict=True)):
+            stack[i] = _read_rows(frame, job.row_start, job.row_end)
+            _calibrate(stack[i], job.masters, job.flat_median, job.row_start, job.row_end)
+            if offset:
+                stack[i] += np.float32(offset)
+
+        result = combine(stack, job.config)
+
+        output = fits.open_memmap(job.output, mode="r+")
+        output[job.row_start : job.row_end] = result
+        output.flush()
+        del output
+    return job.index
+
+
+def _validate_shapes(frames: Sequence[Path], masters: CalibrationMasters) -> tuple[int, int]:
+    shapes = {path: _cached_header(path).shape for path in frames}
+    shapes.update({path: _cached_header(path).shape for path in asdict(masters).values() if path is not None})
+    unique = set(shapes.values())
+    if len(unique) != 1:
+        msg = f"All frames and masters must have the same shape, got: {sorted(unique)}"
+        raise ValueError(msg)
+    shape = unique.pop()
+    if len(shape) != 2:  # noqa: PLR2004
+        msg = f"Only 2D (mono) frames are supported, got shape: {shape}"
+        raise ValueError(msg)
+    return shape
+
+
+def _flat_median(masters: CalibrationMasters) -> float:
+    if masters.flat is None:
+        return 1.0
+    sample = _read_rows(masters.flat, 0, _cached_header(masters.flat).shape[0], _SAMPLE_STRIDE)
+    return float(np.median(sample)) or 1.0
+
+
+def _background_offsets(
+    frames: Sequence[Path],
+    masters: CalibrationMasters,
+    flat_median: float,
+    height: int,
+) -> tuple[float, ...]:
+    """Estimates additive offsets matching each frame background to the first frame, using strided samples."""
+    medians = []
+    for frame in frames:
+        sample = _calibrate(
+            _read_rows(frame, 0, height, _SAMPLE_STRIDE), masters, flat_median, 0, height, _SAMPLE_STRIDE
+        )
+        medians.append(float(np.median(sample)))
+    return tuple(medians[0] - median for median in medians)
+
+
+def plan_tile_rows(n_frames: int, shape: tuple[int, int], memory_limit_mb: int, workers: int) -> tuple[int, int]:
+    """Computes the tile height so that all workers together stay within the memory budget.
+
+    Args:
+        n_frames: The number of frames to stack.
+        shape: The frame shape.
+        memory_limit_mb: The total memory budget in MB.
+        workers: The requested number of workers.
+
+    Returns:
+        A tuple of tile height in rows and number of workers that fit into the budget.
+
+    Raises:
+        ValueError: If a single row of all frames does not fit into the budget.
+
+    """
+    height, width = shape
+    bytes_per_row = _bytes_per_row(n_frames, width)
+    budget = memory_limit_mb * 1024 * 1024
+    if budget < bytes_per_row:
+        msg = (
+            f"Memory budget of {memory_limit_mb} MB is too small - stacking {n_frames} frame(s) of width {width} "
+            f"needs at least {math.ceil(bytes_per_row / 1024 / 1024)} MB"
+        )
+        raise ValueError(msg)
+    if budget < bytes_per_row * workers:
+        workers = budget // bytes_per_row
+        _logger.warning("Memory budget of %d MB only allows %d worker(s)", memory_limit_mb, workers)
+    tile_rows = max(1, budget // (bytes_per_row * workers))
+    # Keep a few tiles per worker so that workers are evenly loaded till the very end
+    tile_rows = min(tile_rows, math.ceil(height / (workers * 4)))
+    return int(tile_rows), int(workers)
+
+
+def _bytes_per_row(n_frames: int, width: int) -> int:
+    """Memory needed by a worker per stacked row."""
+    return n_frames * width * np.dtype(np.float32).itemsize * _WORKING_COPIES
+
+
+def _fingerprint(frames: Sequence[Path], masters: CalibrationMasters, config: StackingConfig) -> str:
+    payload = {
+        "frames": [(path, path.stat().st_size, path.stat().st_mtime_ns) for path in frames],
+        "masters": asdict(masters),
+        "config": {k: v for k, v in asdict(config).items() if k not in {"workers", "memory_limit_mb"}},
+    }
+    return hashlib.sha256(json.dumps(payload, cls=JsonEncoder, sort_keys=True).encode()).hexdigest()
+
+
+def _prepare_output(
+    output: Path,
+    frames: Sequence[Path],
+    shape: tuple[int, int],
+    masters: CalibrationMasters,
+    config: StackingConfig,
+    header: Mapping[str, Any] | None,
+) -> tuple[_Journal, int]:
+    """Resumes the journal of an interrupted run or preallocates the output file and starts a new journal."""
+    journal_path = output.with_name(f"{output.name}.tiles")
+    fingerprint = _fingerprint(frames, masters, config)
+    journal = _Journal.load(journal_path, fingerprint) if output.exists() else None
+    tile_rows, workers = plan_tile_rows(
+        len(frames), shape, config.memory_limit_mb, config.workers or consts.compute.CPU_COUNT or 1
+    )
+    if journal is not None:
+        _logger.info("Resuming stack %s - %d tile(s) already done", output.as_posix(), len(journal.done))
+        # Tiles of the interrupted run keep their height - fit the number of workers into the current budget
+        fitting = config.memory_limit_mb * 1024 * 1024 // (_bytes_per_row(len(frames), shape[1]) * journal.tile_rows)
+        if fitting < 1:
+            msg = (
+                f"Memory budget of {config.memory_limit_mb} MB is too small to resume {output.as_posix()} with "
+                f"tiles of {journal.tile_rows} row(s) - increase the budget or remove the output to start over"
+            )
+            raise ValueError(msg)
+        return journal, min(workers, fitting)
+
+    journal = _Journal(path=journal_path, fingerprint=fingerprint, tile_rows=tile_rows)
+    fits.create_image(output, shape, {"NCOMBINE": len(frames), "REJECT": config.rejection, **(header or {})})
+    journal.start()
+    return journal, workers
+
+
+def stack_frames(
+    frames: Sequence[Path],
+    output: Path,
+    masters: CalibrationMasters | None = None,
+    config: StackingConfig | None = None,
+    header: Mapping[str, Any] | None = None,
+) -> Path:
+    """Stacks light frames into a single FITS image.
+
+    Tiles are processed in parallel and written incrementally into a preallocated output file. If a previous
+    run for the same inputs was interrupted, only the missing tiles are processed.
+
+    Args:
+        frames: The light frame paths.
+        output: The output FITS path.
+        masters: The calibration masters.
+        config: The stacking configuration.
+        header: Additional header cards for the output file.
+
+    Returns:
+        The output path.
+
+    Raises:
+        ValueError: If no frames were provided or frame shapes do not match.
+
+    """
+    if not frames:
+        msg = "No frames to stack"
+        raise ValueError(msg)
+    masters = masters or CalibrationMasters()
+    config = config or StackingConfig()
+    frames = [Path(frame).resolve() for frame in frames]
+    shape = _validate_shapes(frames, masters)
+
+    journal, workers = _prepare_output(output, frames, shape, masters, config, header)
+
+    flat_median = _flat_median(masters)
+    offsets = _background_offsets(frames, masters, flat_median, shape[0]) if config.normalize else (0.0,) * len(frames)
+    jobs = [
+        _TileJob(
+            index=index,
+            row_start=row_start,
+            row_end=min(row_start + journal.tile_rows, shape[0]),
+            frames=tuple(frames),
+            offsets=offsets,
+            masters=masters,
+            flat_median=flat_median,
+            config=config,
+            output=output,
+        )
+        for index, row_start in enumerate(range(0, shape[0], journal.tile_rows))
+        if index not in journal.done
+    ]
+    _logger.info(
+        "Stacking %d frame(s) of shape %s into %s using %d worker(s) and %d row tiles",
+        len(frames),
+        shape,
+        output.as_posix(),
+        workers,
+        journal.tile_rows,
+    )
+
+    with process_pool(max_workers=workers) as executor:
+        futures = [profiling.submit(executor, _stack_tile, job) for job in jobs]
+        for future in tqdm(as_completed(futures), total=len(futures), desc=f"Stacking {output.name}", unit="tile"):
+            journal.mark_done(future.result())
+
+    journal.path.unlink()
+    return output
+
+
+def stack_channels(
+    frames: Mapping[str, Sequence[Path]],
+    output_dir: Path,
+    masters: Mapping[str, CalibrationMasters] | CalibrationMasters | None = None,
+    config: StackingConfig | None = None,
+) -> dict[str, Path]:
+    """Stacks light frames separately for every channel.
+
+    Args:
+        frames: A mapping between channel letters and light frame paths - see `group_frames_by_channel`.
+        output_dir: The directory to write `stack_<CHANNEL>.fits` files to.
+        masters: Calibration masters shared by all channels or a mapping with masters for each channel.
+        config: The stacking configuration.
+
+    Returns:
+        A mapping between channel letters and stacked image paths.
+
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    results = {}
+    for channel, channel_frames in frames.items():
+        channel_masters = (
+            masters if masters is None or isinstance(masters, CalibrationMasters) else masters.get(channel)
+        )
+        results[channel] = stack_frames(
+            frames=channel_frames,
+            output=output_dir / f"stack_{channel}.fits",
+            masters=channel_masters,
+            config=config,
+            header={"CHANNEL": channel},
+        )
+    return results
@@ -0,0 +1,3 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+"""Testing and benchmarking helpers - synthetic corpora, local blob storage and benchmark runner."""
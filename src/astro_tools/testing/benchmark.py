@@ -0,0 +1,217 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+"""Benchmark runner - throughput and peak memory measurement with baseline comparison.
+
+Memory is measured as the growth of the resident set size over a sample taken right before the benchmark runs,
+so memory held by the test session (the corpus, imported modules, earlier benchmarks) does not count.
+
+Examples:
+    ```python
+    from astro_tools.testing.benchmark import compare_to_baseline, load_baseline, measure
+
+    result = measure("zip.check.fast", lambda: check(paths), files=len(paths), size=total_bytes)
+    regressions = compare_to_baseline([result], load_baseline(Path("baseline.json")))
+    ```
+
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any
+
+import psutil
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+    from pathlib import Path
+
+_MB = 1024 * 1024
+RSS_NOISE_MB = 16.0
+"""Memory growth in MB that is never reported as a regression - small deltas are dominated by allocator noise."""
+
+
+@dataclass(frozen=True)
+class BenchmarkResult:
+    """Result of a single benchmark."""
+
+    name: str
+    """The benchmark name, e.g. `zip.check.fast`."""
+    files: int
+    """Number of processed files."""
+    size: int
+    """Number of processed bytes."""
+    seconds: float
+    """Wall clock time in seconds."""
+    peak_rss_delta_mb: float
+    """Peak growth of the resident set size of the process during the benchmark in MB."""
+
+    @property
+    def files_per_s(self) -> float:
+        """Throughput in files per second."""
+        return self.files / self.seconds if self.seconds else 0.0
+
+    @property
+    def mb_per_s(self) -> float:
+        """Throughput in MB per second."""
+        return self.size / _MB / self.seconds if self.seconds else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Returns the result with derived throughput metrics.
+
+        Returns:
+            The result as a dictionary.
+
+        """
+        return {**asdict(self), "files_per_s": self.files_per_s, "mb_per_s": self.mb_per_s}
+
+
+class _RssSampler(threading.Thread):
+    """Background thread sampling the resident set size of the current process."""
+
+    def __init__(self, interval: float) -> None:
+        """Initializes the sampler.
+
+        Args:
+            interval: Sampling interval in seconds.
+
+        """
+        super().__init__(daemon=True, name="rss-sampler")
+        self.interval = interval
+        self.process = psutil.Process()
+        self.start_rss = self.peak = self.process.memory_info().rss
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            self.peak = max(self.peak, self.process.memory_info().rss)
+
+    def stop(self) -> int:
+        """Stops sampling.
+
+        Returns:
+            The peak growth of the resident set size since the sampler was created in bytes.
+
+        """
+        self._stop_event.set()
+        self.join()
+        return max(self.peak, self.process.memory_info().rss) - self.start_rss
+
+
+def measure(
+    name: str,
+    func: Callable[[], Any],
+    files: int,
+    size: int,
+    sample_interval: float = 0.01,
+) -> BenchmarkResult:
+    """Runs the function and measures its wall clock time and peak memory growth.
+
+    Args:
+        name: The benchmark name.
+        func: The function to benchmark.
+        files: Number of files processed by the function.
+        size: Number of bytes processed by the function.
+        sample_interval: Memory sampling interval in seconds.
+
+    Returns:
+        The benchmark result.
+
+    """
+    sampler = _RssSampler(sample_interval)
+    sampler.start()
+    t0 = time.perf_counter()
+    try:
+        func()
+    finally:
+        seconds = time.perf_counter() - t0
+        peak_delta = sampler.stop()
+    return BenchmarkResult(name=name, files=files, size=size, seconds=seconds, peak_rss_delta_mb=peak_delta / _MB)
+
+
+def load_baseline(path: Path) -> dict[str, dict[str, float]]:
+    """Loads stored benchmark results.
+
+    Args:
+        path: The baseline JSON file path.
+
+    Returns:
+        A mapping between benchmark names and their metrics - empty if the file does not exist.
+
+    """
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())  # type: ignore[no-any-return]
+
+
+def save_results(path: Path, results: Iterable[BenchmarkResult]) -> None:
+    """Saves benchmark results in the baseline format.
+
+    Args:
+        path: The output JSON file path.
+        results: The benchmark results.
+
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        result.name: {key: round(result.as_dict()[key], 3) for key in ("files_per_s", "mb_per_s", "peak_rss_delta_mb")}
+        for result in sorted(results, key=lambda r: r.name)
+    }
+    path.write_text(json.dumps(payload, indent=2) + "\n")
+
+
+def compare_to_baseline(
+    results: Iterable[BenchmarkResult],
+    baseline: dict[str, dict[str, float]],
+    tolerance: float = 0.5,
+) -> list[str]:
+    """Compares results to the baseline.
+
+    A result regresses when its files/s throughput drops, or its peak memory growth increases, by more than
+    `tolerance` relative to the baseline - memory growth below `RSS_NOISE_MB` is never reported.
+    Benchmarks missing from the baseline are never reported.
+
+    Args:
+        results: The benchmark results.
+        baseline: Stored results - see `load_baseline`.
+        tolerance: Allowed relative deviation.
+
+    Returns:
+        Descriptions of the regressions - empty if there are none.
+
+    """
+    regressions = []
+    for result in results:
+        if (expected := baseline.get(result.name)) is None:
+            continue
+        if (files_per_s := expected.get("files_per_s")) and result.files_per_s < files_per_s * (1 - tolerance):
+            regressions.append(f"{result.name}: {result.files_per_s:.1f} files/s, baseline {files_per_s:.1f} files/s")
+        if (peak_rss_delta_mb := expected.get("peak_rss_delta_mb")) is not None and result.peak_rss_delta_mb > max(
+            peak_rss_delta_mb * (1 + tolerance), RSS_NOISE_MB
+        ):
+            regressions.append(
+                f"{result.name}: peak RSS growth {result.peak_rss_delta_mb:.1f} MB, baseline {peak_rss_delta_mb:.1f} MB"
+            )
+    return regressions
+
+
+def format_results(results: Iterable[BenchmarkResult]) -> str:
+    """Formats results as a plain text table.
+
+    Args:
+        results: The benchmark results.
+
+    Returns:
+        The table.
+
+    """
+    lines = [f"{'benchmark':<32} {'files':>8} {'seconds':>9} {'files/s':>10} {'MB/s':>9} {'RSS growth MB':>13}"]
+    lines.extend(
+        f"{r.name:<32} {r.files:>8} {r.seconds:>9.3f} {r.files_per_s:>10.1f} {r.mb_per_s:>9.1f} "
+        f"{r.peak_rss_delta_mb:>13.1f}"
+        for r in results
+    )
+    return "\n".join(lines)
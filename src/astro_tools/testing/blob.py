@@ -0,0 +1,387 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+"""Local stand-in for Azure Blob Storage container clients.
+
+`LocalContainerClient` implements the subset of `azure.storage.blob.ContainerClient` (and `BlobClient`) used
+by this project, keeping blobs in memory or in a local directory. Every request is delayed by the configured
+latency, and request rate and bandwidth can be capped to simulate server side throttling - the Azure SDK
+retries throttled requests with a backoff, which clients observe as additional delay.
+
+Examples:
+    ```python
+    from astro_tools.testing.blob import LocalContainerClient, NetworkProfile
+
+    container_client = LocalContainerClient(profile=NetworkProfile(latency=0.02, bandwidth_mbps=50))
+    container_client.get_blob_client("data/file.bin").upload_blob(b"content")
+    print([blob.name for blob in container_client.list_blobs(name_starts_with="data/")])
+    ```
+
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING, Any, BinaryIO
+
+from azure.core import MatchConditions
+from azure.core.exceptions import HttpResponseError, ResourceExistsError, ResourceNotFoundError
+
+from astro_tools.utils.progress import TokenBucket
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+_MB = 1024 * 1024
+_READ_CHUNK_SIZE = 4 * _MB
+
+
+@dataclass(frozen=True)
+class NetworkProfile:
+    """Simulated network and service characteristics."""
+
+    latency: float = 0.0
+    """Round trip latency added to every request in seconds."""
+    bandwidth_mbps: float | None = None
+    """Aggregate transfer rate cap in MB/s - unlimited if `None`."""
+    max_requests_per_second: float | None = None
+    """Aggregate request rate cap - unlimited if `None`."""
+
+
+@dataclass(frozen=True)
+class LocalBlobProperties:
+    """Subset of `azure.storage.blob.BlobProperties`."""
+
+    name: str
+    """The blob name."""
+    size: int
+    """The blob size in bytes."""
+    last_modified: datetime
+    """Last modification time (UTC)."""
+    metadata: dict[str, str] = field(default_factory=dict)
+    """The blob metadata."""
+
+
+@dataclass
+class _StoredBlob:
+    data: bytes
+    size: int
+    last_modified: datetime
+    metadata: dict[str, str]
+
+
+class LocalBlobDownloader:
+    """Subset of `azure.storage.blob.StorageStreamDownloader`."""
+
+    def __init__(self, data: bytes, properties: LocalBlobProperties) -> None:
+        """Initializes the downloader.
+
+        Args:
+            data: The downloaded bytes.
+            properties: The blob properties.
+
+        """
+        self._data = data
+        self.properties = properties
+        self.size = len(data)
+
+    def readall(self) -> bytes:
+        """Returns the downloaded bytes.
+
+        Returns:
+            The blob content (or its requested range).
+
+        """
+        return self._data
+
+    def chunks(self) -> Iterator[bytes]:
+        """Iterates over the downloaded bytes in chunks.
+
+        Yields:
+            Consecutive chunks of the content.
+
+        """
+        for offset in range(0, len(self._data), _READ_CHUNK_SIZE):
+            yield self._data[offset : offset + _READ_CHUNK_SIZE]
+
+
+class LocalContainerClient:
+    """In-memory or disk-backed stand-in for `azure.storage.blob.ContainerClient`."""
+
+    def __init__(
+        self,
+        root: Path | None = None,
+        profile: NetworkProfile | None = None,
+        container_name: str = "datasets",
+    ) -> None:
+        """Initializes the client.
+
+        Args:
+            root: Directory where blob content is stored - blobs are kept in memory if `None`.
+            profile: Simulated network and service characteristics.
+            container_name: The container name.
+
+        """
+        self.root = root
+        self.profile = profile or NetworkProfile()
+        self.container_name = container_name
+        self.requests = 0
+        """Total number of requests."""
+        self.bytes_uploaded = 0
+        """Total number of uploaded bytes."""
+        self.bytes_downloaded = 0
+        """Total number of downloaded bytes."""
+        self._blobs: dict[str, _StoredBlob] = {}
+        self._staged: dict[str, dict[str, bytes]] = {}
+        self._lock = threading.Lock()
+        # Services throttle without bursts
+        self._requests_bucket = TokenBucket(self.profile.max_requests_per_second, burst=0)
+        self._bandwidth_bucket = TokenBucket(
+            self.profile.bandwidth_mbps * _MB if self.profile.bandwidth_mbps else None, burst=0
+        )
+
+    def _request(self, transferred: int = 0) -> None:
+        """Simulates a round trip and accounts for the request."""
+        self._requests_bucket.acquire(1)
+        if self.profile.latency:
+            time.sleep(self.profile.latency)
+        self._bandwidth_bucket.acquire(transferred)
+        with self._lock:
+            self.requests += 1
+
+    def _store(
+        self,
+        name: str,
+        data: bytes,
+        metadata: dict[str, str],
+        *,
+        overwrite: bool,
+        transferred: int | None = None,
+    ) -> None:
+        with self._lock:
+            if not overwrite and name in self._blobs:
+                msg = f"The specified blob already exists: {name}"
+                raise ResourceExistsError(msg)
+            self._blobs[name] = _StoredBlob(
+                data=data if self.root is None else b"",
+                size=len(data),
+                last_modified=datetime.now(tz=UTC),
+                metadata=metadata,
+            )
+            self.bytes_uploaded += len(data) if transferred is None else transferred
+        if self.root is not None:
+            path = self.root / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+
+    def _stage(self, name: str, block_id: str, data: bytes) -> None:
+        with self._lock:
+            self._staged.setdefault(name, {})[block_id] = data
+            self.bytes_uploaded += len(data)
+
+    def _commit(self, name: str, block_ids: list[str], metadata: dict[str, str], *, overwrite: bool) -> None:
+        with self._lock:
+            staged = self._staged.pop(name, {})
+        missing = [block_id for block_id in block_ids if block_id not in staged]
+        if missing:
+            msg = f"The specified block list is invalid - blocks {missing} were not staged: {name}"
+            raise HttpResponseError(msg)
+        # Block content was already accounted for when staged
+        data = b"".join(staged[block_id] for block_id in block_ids)
+        self._store(name, data, metadata, overwrite=overwrite, transferred=0)
+
+    def _load(self, name: str, offset: int = 0, length: int | None = None) -> tuple[bytes, LocalBlobProperties]:
+        properties = self._properties(name)
+        end = properties.size if length is None else min(offset + length, properties.size)
+        if self.root is not None:
+            with (self.root / name).open("rb") as fh:
+                fh.seek(offset)
+                data = fh.read(max(end - offset, 0))
+        else:
+            data = self._blobs[name].data[offset:end]
+        with self._lock:
+            self.bytes_downloaded += len(data)
+        return data, properties
+
+    def _properties(self, name: str) -> LocalBlobProperties:
+        with self._lock:
+            blob = self._blobs.get(name)
+        if blob is None:
+            msg = f"The specified blob does not exist: {name}"
+            raise ResourceNotFoundError(msg)
+        return LocalBlobProperties(
+            name=name, size=blob.size, last_modified=blob.last_modified, metadata=dict(blob.metadata)
+        )
+
+    def get_blob_client(self, blob: str) -> LocalBlobClient:
+        """Returns a client for a single blob.
+
+        Args:
+            blob: The blob name.
+
+        Returns:
+            The blob client.
+
+        """
+        return LocalBlobClient(self, blob)
+
+    def list_blobs(self, name_starts_with: str | None = None, **kwargs: Any) -> Iterator[LocalBlobProperties]:  # noqa: ARG002
+        """Lists blobs, one request per 5000 blobs like the service does.
+
+        Args:
+            name_starts_with: Optional blob name prefix.
+            **kwargs: Ignored keyword arguments accepted by the Azure SDK.
+
+        Yields:
+            Properties of the matching blobs sorted by name.
+
+        """
+        with self._lock:
+            names = sorted(name for name in self._blobs if name.startswith(name_starts_with or ""))
+        for index, name in enumerate(names):
+            if index % 5000 == 0:
+                self._request()
+            yield self._properties(name)
+
+
+class LocalBlobClient:
+    """Stand-in for `azure.storage.blob.BlobClient` returned by `LocalContainerClient.get_blob_client`."""
+
+    def __init__(self, container_client: LocalContainerClient, blob_name: str) -> None:
+        """Initializes the client.
+
+        Args:
+            container_client: The parent container client.
+            blob_name: The blob name.
+
+        """
+        self.container_client = container_client
+        self.blob_name = blob_name
+
+    def upload_blob(
+        self,
+        data: bytes | BinaryIO,
+        *,
+        overwrite: bool = False,
+        metadata: dict[str, str] | None = None,
+        **kwargs: Any,  # noqa: ARG002
+    ) -> dict[str, Any]:
+        """Uploads the blob.
+
+        Args:
+            data: The blob content or a binary file object to read it from.
+            overwrite: Whether to replace an existing blob.
+            metadata: The blob metadata.
+            **kwargs: Ignored keyword arguments accepted by the Azure SDK.
+
+        Returns:
+            Blob properties (name and size).
+
+        Raises:
+            ResourceExistsError: If the blob exists and `overwrite` is `False`.
+
+        """
+        content = data if isinstance(data, bytes) else b"".join(iter(lambda: data.read(_READ_CHUNK_SIZE), b""))
+        self.container_client._request(len(content))  # noqa: SLF001
+        self.container_client._store(self.blob_name, content, dict(metadata or {}), overwrite=overwrite)  # noqa: SLF001
+        return {"name": self.blob_name, "size": len(content)}
+
+    def stage_block(
+        self,
+        block_id: str,
+        data: bytes,
+        length: int | None = None,  # noqa: ARG002
+        **kwargs: Any,  # noqa: ARG002
+    ) -> dict[str, Any]:
+        """Stages a block to be committed as part of the blob.
+
+        Args:
+            block_id: The block identifier.
+            data: The block content.
+            length: Ignored - the content length is known.
+            **kwargs: Ignored keyword arguments accepted by the Azure SDK.
+
+        Returns:
+            The block identifier.
+
+        """
+        self.container_client._request(len(data))  # noqa: SLF001
+        self.container_client._stage(self.blob_name, block_id, data)  # noqa: SLF001
+        return {"block_id": block_id}
+
+    def commit_block_list(
+        self,
+        block_list: list[Any],
+        metadata: dict[str, str] | None = None,
+        match_condition: MatchConditions | None = None,
+        **kwargs: Any,  # noqa: ARG002
+    ) -> dict[str, Any]:
+        """Writes the blob from staged blocks.
+
+        Args:
+            block_list: Block identifiers or `azure.storage.blob.BlobBlock` objects in content order.
+            metadata: The blob metadata.
+            match_condition: `MatchConditions.IfMissing` to fail if the blob exists - replaced otherwise.
+            **kwargs: Ignored keyword arguments accepted by the Azure SDK.
+
+        Returns:
+            Blob properties (name and size).
+
+        Raises:
+            HttpResponseError: If any of the blocks was not staged.
+            ResourceExistsError: If the blob exists and `match_condition` is `MatchConditions.IfMissing`.
+
+        """
+        block_ids = [str(getattr(block, "id", block)) for block in block_list]
+        overwrite = match_condition != MatchConditions.IfMissing
+        self.container_client._request()  # noqa: SLF001
+        self.container_client._commit(self.blob_name, block_ids, dict(metadata or {}), overwrite=overwrite)  # noqa: SLF001
+        return {"name": self.blob_name, "size": self.container_client._properties(self.blob_name).size}  # noqa: SLF001
+
+    def exists(self) -> bool:
+        """Checks if the blob exists.
+
+        Returns:
+            `True` if the blob exists.
+
+        """
+        try:
+            self.container_client._properties(self.blob_name)  # noqa: SLF001
+        except ResourceNotFoundError:
+            return False
+        return True
+
+    def get_blob_properties(self) -> LocalBlobProperties:
+        """Returns the blob properties.
+
+        Returns:
+            The blob properties.
+
+        Raises:
+            ResourceNotFoundError: If the blob does not exist.
+
+        """
+        self.container_client._request()  # noqa: SLF001
+        return self.container_client._properties(self.blob_name)  # noqa: SLF001
+
+    def download_blob(self, offset: int | None = None, length: int | None = None, **kwargs: Any) -> LocalBlobDownloader:  # noqa: ARG002
+        """Downloads the blob or its byte range.
+
+        Args:
+            offset: Start of the range in bytes.
+            length: Number of bytes to download - until the end of the blob if `None`.
+            **kwargs: Ignored keyword arguments accepted by the Azure SDK.
+
+        Returns:
+            The downloader.
+
+        Raises:
+            ResourceNotFoundError: If the blob does not exist.
+
+        """
+        data, properties = self.container_client._load(self.blob_name, offset or 0, length)  # noqa: SLF001
+        self.container_client._request(len(data))  # noqa: SLF001
+        return LocalBlobDownloader(data, properties)
@@ -0,0 +1,256 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+"""Reproducible synthetic data corpora.
+
+The generated corpus mimics telescope-live downloads - zip archives named `<TARGET>_<TELESCOPE>_<FRAMES>_<ID>.zip`
+with FITS light frames of several channels, plus corrupted and truncated archives and a large tree of
+small files. All content is derived from a seeded random number generator, so the same spec and seed always
+produce byte-identical corpora.
+
+Examples:
+    ```python
+    from astro_tools.testing.corpus import CorpusSpec, generate_corpus
+
+    corpus = generate_corpus(Path("/tmp/corpus"), CorpusSpec(archives=20, frames_per_archive=10))
+    print(corpus.total_archive_bytes)
+    ```
+
+"""
+
+from __future__ import annotations
+
+import zipfile
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from astro_tools.core import consts
+from astro_tools.imaging import fits
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+_CHANNELS = ("Ha", "OIII", "SII", "Red", "Green", "Blue", "Luminance")
+_TARGETS = ("NGC7000", "M31", "IC1805", "NGC6888", "M42", "Sh2-129")
+_TELESCOPES = ("T11", "T20", "T30", "T32", "T71")
+
+
+@dataclass(frozen=True)
+class CorpusSpec:
+    """Synthetic corpus specification."""
+
+    archives: int = 8
+    """Number of valid zip archives."""
+    frames_per_archive: int = 6
+    """Number of FITS frames per archive."""
+    frame_shape: tuple[int, int] = (256, 256)
+    """Frame shape (height, width)."""
+    channels_per_archive: int = 2
+    """Number of channels per archive."""
+    corrupted: int = 1
+    """Number of archives with a damaged member - the central directory is intact."""
+    truncated: int = 1
+    """Number of archives cut in half - the central directory is missing."""
+    small_files: int = 2000
+    """Number of files in the small-file tree."""
+    small_file_size: int = 512
+    """Size of each small file in bytes."""
+    small_files_per_dir: int = 100
+    """Number of small files per directory."""
+
+
+@dataclass
+class Corpus:
+    """Generated corpus."""
+
+    root: Path
+    """The corpus root directory."""
+    archives: list[Path] = field(default_factory=list)
+    """Valid archives."""
+    corrupted: list[Path] = field(default_factory=list)
+    """Archives with a damaged member."""
+    truncated: list[Path] = field(default_factory=list)
+    """Truncated archives."""
+    small_files: list[Path] = field(default_factory=list)
+    """Files in the small-file tree."""
+
+    @property
+    def archives_dir(self) -> Path:
+        """Directory with all archives."""
+        return self.root / "zips"
+
+    @property
+    def small_files_dir(self) -> Path:
+        """Directory with the small-file tree."""
+        return self.root / "small-files"
+
+    @property
+    def all_archives(self) -> list[Path]:
+        """Valid, corrupted and truncated archives."""
+        return sorted([*self.archives, *self.corrupted, *self.truncated])
+
+    @property
+    def total_archive_bytes(self) -> int:
+        """Total size of all archives in bytes."""
+        return sum(path.stat().st_size for path in self.all_archives)
+
+    @property
+    def total_small_file_bytes(self) -> int:
+        """Total size of the small-file tree in bytes."""
+        return sum(path.stat().st_size for path in self.small_files)
+
+
+def synthetic_frame(rng: np.random.Generator, shape: tuple[int, int], stars: int = 50) -> np.ndarray[Any, Any]:
+    """Simulates a `uint16` light frame with sky background, noise and gaussian stars.
+
+    Args:
+        rng: The random number generator.
+        shape: The frame shape (height, width).
+        stars: Number of stars.
+
+    Returns:
+        The simulated frame.
+
+    """
+    height, width = shape
+    frame = rng.normal(1000.0, 20.0, size=shape)
+    ys, xs = np.mgrid[-4:5, -4:5]
+    psf = np.exp(-(ys**2 + xs**2) / (2 * 1.5**2))
+    for y, x, flux in zip(
+        rng.integers(4, height - 4, stars),
+        rng.integers(4, width - 4, stars),
+        rng.uniform(500.0, 20000.0, stars),
+        strict=True,
+    ):
+        frame[y - 4 : y + 5, x - 4 : x + 5] += flux * psf
+    return np.clip(frame, 0, np.iinfo(np.uint16).max).astype(np.uint16)
+
+
+def write_telescope_live_zip(
+    path: Path,
+    rng: np.random.Generator,
+    frames: int,
+    shape: tuple[int, int],
+    channels: tuple[str, ...],
+) -> None:
+    """Writes a telescope-live style zip archive with FITS light frames.
+
+    Args:
+        path: The archive path.
+        rng: The random number generator.
+        frames: Number of frames.
+        shape: Frame shape (height, width).
+        channels: Channel names - frames are assigned to channels in turns.
+
+    """
+    target = path.stem.split("_")[0]
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+        for index in range(frames):
+            channel = channels[index % len(channels)]
+            header = {"OBJECT": target, "FILTER": channel, "EXPTIME": 300.0, "IMAGETYP": "Light Frame"}
+            zf.writestr(
+                f"{target}/{channel}/{target}_{channel}_300s_{index:04d}.fits",
+                fits.encode_image(synthetic_frame(rng, shape), header),
+            )
+
+
+def corrupt_member(path: Path, rng: np.random.Generator) -> None:
+    """Overwrites bytes inside the compressed data of the first member, keeping the central directory intact.
+
+    Args:
+        path: The archive path.
+        rng: The random number generator.
+
+    """
+    with zipfile.ZipFile(path, "r") as zf:
+        info = zf.infolist()[0]
+    # Local file header is 30 bytes followed by the file name and the extra field
+    data_offset = info.header_offset + 30 + len(info.filename.encode()) + len(info.extra)
+    offset = data_offset + info.compress_size // 2
+    with path.open("r+b") as fh:
+        fh.seek(offset)
+        fh.write(rng.integers(0, 256, 64, dtype=np.uint8).tobytes())
+
+
+def truncate(path: Path) -> None:
+    """Cuts the file in half.
+
+    Args:
+        path: The file path.
+
+    """
+    with path.open("r+b") as fh:
+        fh.truncate(path.stat().st_size // 2)
+
+
+def write_small_file_tree(
+    root: Path,
+    rng: np.random.Generator,
+    files: int,
+    file_size: int,
+    files_per_dir: int,
+) -> list[Path]:
+    """Writes a two-level directory tree of small files.
+
+    Args:
+        root: The tree root directory.
+        rng: The random number generator.
+        files: Number of files.
+        file_size: Size of each file in bytes.
+        files_per_dir: Number of files per leaf directory.
+
+    Returns:
+        Paths of the written files.
+
+    """
+    paths = []
+    for index in range(files):
+        dir_index = index // files_per_dir
+        directory = root / f"group-{dir_index // 10:03d}" / f"set-{dir_index:05d}"
+        if index % files_per_dir == 0:
+            directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"file-{index:07d}.bin"
+        path.write_bytes(rng.bytes(file_size))
+        paths.append(path)
+    return paths
+
+
+def generate_corpus(root: Path, spec: CorpusSpec | None = None, seed: int = consts.reproducibility.SEED) -> Corpus:
+    """Generates a reproducible synthetic corpus.
+
+    Args:
+        root: The corpus root directory.
+        spec: The corpus specification.
+        seed: The random seed.
+
+    Returns:
+        The generated corpus.
+
+    """
+    spec = spec or CorpusSpec()
+    rng = np.random.default_rng(seed)
+    corpus = Corpus(root=root)
+    corpus.archives_dir.mkdir(parents=True, exist_ok=True)
+
+    total = spec.archives + spec.corrupted + spec.truncated
+    for index in range(total):
+        target = _TARGETS[index % len(_TARGETS)]
+        telescope = _TELESCOPES[index % len(_TELESCOPES)]
+        path = corpus.archives_dir / f"{target}_{telescope}_{spec.frames_per_archive}_{index:05d}.zip"
+        channels = tuple(rng.choice(_CHANNELS, size=spec.channels_per_archive, replace=False).tolist())
+        write_telescope_live_zip(path, rng, spec.frames_per_archive, spec.frame_shape, channels)
+        if index < spec.archives:
+            corpus.archives.append(path)
+        elif index < spec.archives + spec.corrupted:
+            corrupt_member(path, rng)
+            corpus.corrupted.append(path)
+        else:
+            truncate(path)
+            corpus.truncated.append(path)
+
+    if spec.small_files:
+        corpus.small_files = write_small_file_tree(
+            corpus.small_files_dir, rng, spec.small_files, spec.small_file_size, spec.small_files_per_dir
+        )
+    return corpus
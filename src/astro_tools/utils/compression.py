@@ -0,0 +1,144 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+"""Chunked gzip compression for uploads.
+
+Files are split into fixed size chunks and every chunk is compressed into a separate gzip member in a process
+pool. Concatenated gzip members form a valid gzip stream (RFC 1952), so the result can be decompressed with any
+gzip tool, while compression of a single file scales to all cores and chunks map directly onto blob blocks.
+
+Examples:
+    ```python
+    with ProcessPoolExecutor() as executor:
+        for chunk in iter_compressed_chunks(Path("light.fits"), executor, level=6):
+            upload_block(chunk)
+    ```
+
+"""
+
+from __future__ import annotations
+
+import gzip
+import zlib
+from collections import deque
+from typing import TYPE_CHECKING, Literal
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+    from concurrent.futures import Executor, Future
+    from pathlib import Path
+
+Codec = Literal["none", "gzip"]
+"""Supported upload codecs."""
+CHUNK_SIZE = 8 * 1024 * 1024
+"""Size of uncompressed chunks - every chunk becomes a separate gzip member and blob block."""
+CODEC_METADATA_KEY = "astro_tools_codec"
+"""Blob metadata key with the codec used to compress the content."""
+SIZE_METADATA_KEY = "astro_tools_original_size"
+"""Blob metadata key with the uncompressed content size in bytes."""
+CRC_METADATA_KEY = "astro_tools_original_crc32"
+"""Blob metadata key with the CRC-32 of the uncompressed content (8 hex digits)."""
+
+
+def compress_chunk(data: bytes, level: int = 6) -> bytes:
+    """Compresses a chunk into a single gzip member.
+
+    The member header has no modification time, so the same input always produces the same output.
+
+    Args:
+        data: The uncompressed chunk.
+        level: The compression level (1-9).
+
+    Returns:
+        The gzip member.
+
+    """
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def iter_file_chunks(path: Path, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Reads a file in chunks.
+
+    Args:
+        path: The file path.
+        chunk_size: The chunk size in bytes.
+
+    Yields:
+        Consecutive chunks of the file.
+
+    """
+    with path.open("rb") as fh:
+        while chunk := fh.read(chunk_size):
+            yield chunk
+
+
+def iter_compressed_chunks(
+    path: Path,
+    executor: Executor,
+    level: int = 6,
+    chunk_size: int = CHUNK_SIZE,
+    max_pending: int = 4,
+) -> Iterator[tuple[bytes, int, int]]:
+    """Compresses file chunks in the executor, yielding them in order.
+
+    At most `max_pending` chunks are compressed at the same time, which bounds memory usage regardless of
+    the file size. An empty file yields a single empty gzip member, so the output is always a valid gzip stream.
+
+    Args:
+        path: The file path.
+        executor: The executor - a process pool to use multiple cores.
+        level: The compression level (1-9).
+        chunk_size: The uncompressed chunk size in bytes.
+        max_pending: Maximum number of chunks submitted to the executor at once.
+
+    Yields:
+        Tuples of the compressed chunk, the uncompressed chunk size and the running CRC-32 of the uncompressed
+        data up to and including the chunk.
+
+    """
+    pending: deque[tuple[Future[bytes], int, int]] = deque()
+    crc = 0
+    empty = True
+    for chunk in iter_file_chunks(path, chunk_size):
+        empty = False
+        crc = zlib.crc32(chunk, crc)
+        pending.append((executor.submit(compress_chunk, chunk, level), len(chunk), crc))
+        if len(pending) >= max_pending:
+            future, size, running_crc = pending.popleft()
+            yield future.result(), size, running_crc
+    while pending:
+        future, size, running_crc = pending.popleft()
+        yield future.result(), size, running_crc
+    if empty:
+        yield compress_chunk(b"", level), 0, 0
+
+
+def iter_decompressed(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Decompresses a (multi-member) gzip stream.
+
+    Args:
+        chunks: Consecutive chunks of the gzip stream, split at arbitrary positions.
+
+    Yields:
+        Decompressed data.
+
+    Raises:
+        ValueError: If the stream ends in the middle of a gzip member.
+
+    """
+    decompressor = zlib.decompressobj(wbits=31)
+    # A member is open once it received data - a stream may only end on a member boundary
+    member_open = False
+    for chunk in chunks:
+        data = chunk
+        while data:
+            member_open = True
+            yield decompressor.decompress(data)
+            if not decompressor.eof:
+                break
+            # Member finished - the rest of the chunk belongs to the next member
+            data = decompressor.unused_data
+            decompressor = zlib.decompressobj(wbits=31)
+            member_open = False
+    if member_open:
+        msg = "Compressed stream is truncated"
+        raise ValueError(msg)
@@ -6,13 +6,19 @@ from __future__ import annotations
 
 import contextlib
 import logging
+import logging.handlers
+import os
+import queue
+import threading
 import time
 from typing import TYPE_CHECKING
 
 from astro_tools.core import consts
+from astro_tools.utils import profiling
 
 if TYPE_CHECKING:
     from collections.abc import Generator
+    from pathlib import Path
 
 
 def get_logger(name: str, log_level: int | str = logging.INFO) -> logging.Logger:
@@ -42,6 +48,152 @@ def get_logger(name: str, log_level: int | str = logging.INFO) -> logging.Logger
     return logger
 
 
+class BufferedFileHandler(logging.handlers.MemoryHandler):
+    """File handler that writes records in batches.
+
+    Records are buffered in memory and written when the buffer is full, when a record with `flush_level`
+    or higher arrives, at the latest `flush_interval` seconds after a record was buffered - a timer thread
+    writes the buffer even if no further record arrives - or when the handler is closed.
+
+    """
+
+    def __init__(
+        self,
+        filename: Path,
+        capacity: int = 512,
+        flush_level: int = logging.ERROR,
+        flush_interval: float = 5.0,
+    ) -> None:
+        """Initializes the handler.
+
+        Args:
+            filename: The log file path.
+            capacity: Maximum number of buffered records.
+            flush_level: Records with this level or higher are written immediately (with the buffer).
+            flush_interval: Maximum time in seconds a record stays in the buffer.
+
+        """
+        file_handler = logging.FileHandler(filename)
+        file_handler.setFormatter(logging.Formatter(fmt=consts.logging.FORMAT))
+        super().__init__(capacity, flushLevel=flush_level, target=file_handler, flushOnClose=True)
+        self.flush_interval = flush_interval
+        self._timer: threading.Timer | None = None
+
+    @property
+    def base_filename(self) -> str:
+        """Absolute path of the log file."""
+        return str(self.target.baseFilename)  # type: ignore[union-attr]
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Buffers the record and schedules a flush if the buffer was empty.
+
+        Args:
+            record: The record.
+
+        """
+        super().emit(record)
+        if self.buffer and self._timer is None:
+            self._timer = threading.Timer(self.flush_interval, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> None:
+        """Writes buffered records to the file."""
+        with self.lock:  # type: ignore[union-attr]
+            super().flush()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def close(self) -> None:
+        """Flushes the buffer and closes the file."""
+        target = self.target
+        super().close()
+        if target is not None:
+            target.close()
+
+
+def add_file_handler(logger: logging.Logger, filename: Path) -> logging.Handler:
+    """Attaches a buffered file handler to the logger - idempotent.
+
+    Calling this function repeatedly with the same file does not duplicate log output.
+
+    Args:
+        logger: The logger.
+        filename: The log file path.
+
+    Returns:
+        The new or already attached handler.
+
+    """
+    base_filename = os.path.abspath(filename)  # noqa: PTH100 - same normalisation as `logging.FileHandler`
+    for handler in logger.handlers:
+        if isinstance(handler, BufferedFileHandler) and handler.base_filename == base_filename:
+            return handler
+        if isinstance(handler, logging.FileHandler) and handler.baseFilename == base_filename:
+            return handler
+    handler = BufferedFileHandler(filename)
+    logger.addHandler(handler)
+    return handler
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that leaves formatting (including tracebacks) to the listener thread.
+
+    The queue never leaves the process, so records do not have to be made picklable - only the message
+    is merged with its arguments, so that mutable arguments cannot change before the record is written.
+
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:  # noqa: PLR6301
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+@contextlib.contextmanager
+def queue_logging(*loggers: logging.Logger) -> Generator[None]:
+    """Moves handlers of the loggers to background threads for the duration of the block.
+
+    Every logger gets a `QueueHandler` and its current handlers are driven by a `QueueListener`, so logging
+    calls from worker threads only put the record on a queue - handler locks, formatting and terminal or file
+    I/O no longer serialise the workers. Remaining records are written and the original handlers are restored
+    when the block exits. Loggers that are already queued are left untouched.
+
+    Notes:
+        Attach all handlers (e.g. with `add_file_handler`) before entering the block.
+
+    Args:
+        *loggers: The loggers.
+
+    Yields:
+        Nothing.
+
+    """
+    active = []
+    for logger in loggers:
+        handlers = list(logger.handlers)
+        if not handlers or any(isinstance(handler, logging.handlers.QueueHandler) for handler in handlers):
+            continue
+        log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        queue_handler = _DeferredQueueHandler(log_queue)
+        for handler in handlers:
+            logger.removeHandler(handler)
+        logger.addHandler(queue_handler)
+        listener.start()
+        active.append((logger, handlers, queue_handler, listener))
+    try:
+        yield
+    finally:
+        for logger, handlers, queue_handler, listener in active:
+            listener.stop()
+            logger.removeHandler(queue_handler)
+            for handler in handlers:
+                logger.addHandler(handler)
+                handler.flush()
+
+
 _timed_logger = get_logger("timed", log_level=logging.INFO)
 
 
@@ -50,7 +202,8 @@ def timing_context(name: str) -> Generator[None]:
     """Prints the execution time for the decorated function.
 
     Notes:
-        Can also act as a context manager.
+        Can also act as a context manager. When profiling is enabled, the block is also recorded as a span,
+        see `astro_tools.utils.profiling`.
 
     Args:
         name: The name of the wrapped execution block.
@@ -62,7 +215,8 @@ def timing_context(name: str) -> Generator[None]:
     _timed_logger.info("%(func_name)s is running...", {"func_name": name})
     t0 = time.monotonic()
     try:
-        yield
+        with profiling.span(name):
+            yield
     finally:
         t1 = time.monotonic()
         _timed_logger.info(
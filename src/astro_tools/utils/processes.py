@@ -0,0 +1,39 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+"""Process pools for CPU-bound work.
+
+Commands start their worker processes with the `spawn` start method instead of the Linux default `fork`. A forked
+child gets a copy of the parent's memory but only the thread that called `fork`. Locks held at that moment by any
+other thread - the logging queue listener, upload threads, the tqdm monitor or the Azure SDK's transport threads -
+stay locked in the child forever, and the first worker touching one of them hangs. Spawned workers start a fresh
+interpreter instead, so they are safe no matter which threads the command runs, and behave the same as on macOS and
+Windows, where `spawn` is the default. The price is that tasks and their arguments must be picklable, module-level
+callables.
+
+Examples:
+    ```python
+    from astro_tools.utils.processes import process_pool
+
+    with process_pool(max_workers=4) as executor:
+        results = list(executor.map(score_frame, sources))
+    ```
+
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+
+def process_pool(max_workers: int | None = None) -> ProcessPoolExecutor:
+    """Creates a process pool whose workers are started with the `spawn` start method.
+
+    Args:
+        max_workers: The number of worker processes. Defaults to the number of CPUs.
+
+    Returns:
+        A process pool executor. Use it as a context manager to shut the workers down.
+
+    """
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
@@ -0,0 +1,569 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+"""Profiling utils - nested spans, counters and histograms.
+
+Profiling is disabled by default and every recording function returns immediately in that case, so
+instrumentation can stay in hot loops. Once enabled, recorded data can be exported as JSON or logged to MLflow.
+
+Only the first `MAX_SPANS_PER_NAME` spans with the same name are kept - e.g. one span per checked archive
+would otherwise grow without bound on large directories. Later spans still count towards the span summary.
+
+Worker processes have their own profiler. Tasks submitted to process pools with `submit` or `map_tasks` record into it
+and send the recorded data back with their results, where it is merged into the process-wide profiler.
+Data recorded by tasks submitted to process pools directly is not collected.
+
+Examples:
+    ```python
+    from astro_tools.utils import profiling
+    from astro_tools.utils.processes import process_pool
+
+    profiling.enable()
+    with profiling.span("upload", container="datasets") as parent:
+        for path in paths:
+            with profiling.span("upload.file", parent=parent, path=path):
+                size = upload(path)
+            profiling.increment("upload.bytes", size)
+            profiling.observe("upload.file_size_bytes", size)
+    profiling.export_json(Path("trace.json"))
+
+    with process_pool() as executor:
+        results = list(profiling.map_tasks(executor, score_frame, sources))
+    ```
+
+"""
+
+from __future__ import annotations
+
+import bisect
+import contextlib
+import functools
+import itertools
+import json
+import threading
+import time
+from concurrent.futures import Future
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field, replace
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING, Any
+
+from astro_tools.utils.mlflow import resolve_experiment_name, run_id_from_context
+from astro_tools.utils.serialization import JsonEncoder
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Generator, Iterable, Iterator, Sequence
+    from concurrent.futures import Executor
+    from pathlib import Path
+
+BYTE_BUCKETS = tuple(float(1024 * 4**i) for i in range(14))
+"""Default histogram bucket upper bounds for sizes in bytes - from 1 KiB to 64 GiB."""
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+"""Default histogram bucket upper bounds for durations in seconds."""
+MAX_SPANS_PER_NAME = 1000
+"""Default number of spans with the same name kept by a profiler - later spans only update the span summary."""
+
+
+@dataclass
+class Span:
+    """A timed block of work."""
+
+    name: str
+    """The span name."""
+    span_id: int
+    """Unique span identifier."""
+    parent_id: int | None
+    """Identifier of the parent span - `None` for root spans."""
+    start: datetime
+    """Start time (UTC)."""
+    thread: str
+    """Name of the thread that started the span."""
+    attributes: dict[str, Any] = field(default_factory=dict)
+    """Arbitrary span attributes."""
+    duration: float | None = None
+    """Duration in seconds - `None` while the span is running."""
+
+
+@dataclass
+class Histogram:
+    """Histogram with fixed bucket upper bounds."""
+
+    bounds: tuple[float, ...]
+    """Bucket upper bounds - the last, implicit bucket collects everything above the last bound."""
+    counts: list[int] = field(default_factory=list)
+    """Observation counts per bucket."""
+    count: int = 0
+    """Total number of observations."""
+    total: float = 0.0
+    """Sum of all observations."""
+    min: float | None = None
+    """Smallest observation."""
+    max: float | None = None
+    """Largest observation."""
+
+    def __post_init__(self) -> None:
+        """Initializes bucket counts."""
+        if not self.counts:
+            self.counts = [0] * (len(self.bounds) + 1)
+
+    def observe(self, value: float) -> None:
+        """Records an observation.
+
+        Args:
+            value: The observed value.
+
+        """
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: Histogram) -> None:
+        """Adds observations of another histogram.
+
+        Args:
+            other: The histogram with the same bucket bounds.
+
+        Raises:
+            ValueError: If the bucket bounds differ.
+
+        """
+        if other.bounds != self.bounds:
+            msg = "Cannot merge histograms with different bucket bounds"
+            raise ValueError(msg)
+        self.counts = [a + b for a, b in zip(self.counts, other.counts, strict=True)]
+        self.count += other.count
+        self.total += other.total
+        self.min = min(value for value in (self.min, other.min) if value is not None) if other.count else self.min
+        self.max = max(value for value in (self.max, other.max) if value is not None) if other.count else self.max
+
+    def quantile(self, q: float) -> float | None:
+        """Estimates a quantile as the upper bound of the bucket containing it.
+
+        Args:
+            q: The quantile in range [0, 1].
+
+        Returns:
+            The estimated quantile or `None` if there are no observations.
+
+        """
+        if not self.count or self.max is None:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            cumulative += bucket_count
+            if bucket_count and cumulative >= rank:
+                return min(self.bounds[index], self.max) if index < len(self.bounds) else self.max
+        return self.max
+
+
+@dataclass
+class Recording:
+    """Data recorded by a profiler - sent back from worker processes to be merged into the parent profiler."""
+
+    spans: list[Span]
+    """Kept spans."""
+    span_stats: dict[str, dict[str, float]]
+    """Count, total and max duration of all finished spans by span name."""
+    dropped_spans: dict[str, int]
+    """Number of spans that were not kept by span name."""
+    counters: dict[str, float]
+    """Counter values."""
+    histograms: dict[str, Histogram]
+    """Histograms."""
+
+
+_current_span: ContextVar[Span | None] = ContextVar("astro_tools_current_span", default=None)
+
+
+class Profiler:
+    """Thread-safe collector of spans, counters and histograms."""
+
+    def __init__(self, max_spans_per_name: int = MAX_SPANS_PER_NAME) -> None:
+        """Initializes a disabled profiler.
+
+        Args:
+            max_spans_per_name: Number of spans with the same name that are kept.
+
+        """
+        self.enabled = False
+        self.max_spans_per_name = max_spans_per_name
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.spans: list[Span] = []
+        self.dropped_spans: dict[str, int] = {}
+        self.counters: dict[str, float] = {}
+        self.histograms: dict[str, Histogram] = {}
+        self._span_stats: dict[str, dict[str, float]] = {}
+        self._kept_spans: dict[str, int] = {}
+
+    def reset(self) -> None:
+        """Drops all recorded data."""
+        with self._lock:
+            self.spans.clear()
+            self.dropped_spans.clear()
+            self.counters.clear()
+            self.histograms.clear()
+            self._span_stats.clear()
+            self._kept_spans.clear()
+
+    def _keep_span(self, span: Span) -> None:
+        """Keeps the span unless there are too many spans with its name - must be called with the lock held."""
+        kept = self._kept_spans.get(span.name, 0)
+        if kept < self.max_spans_per_name:
+            self._kept_spans[span.name] = kept + 1
+            self.spans.append(span)
+        else:
+            self.dropped_spans[span.name] = self.dropped_spans.get(span.name, 0) + 1
+
+    def _add_span_stats(self, name: str, count: float, total_s: float, max_s: float) -> None:
+        """Updates the span summary - must be called with the lock held."""
+        stats = self._span_stats.setdefault(name, {"count": 0, "total_s": 0.0, "max_s": 0.0})
+        stats["count"] += count
+        stats["total_s"] += total_s
+        stats["max_s"] = max(stats["max_s"], max_s)
+
+    @contextlib.contextmanager
+    def _span(self, name: str, parent: Span | None, attributes: dict[str, Any]) -> Generator[Span]:
+        parent = parent or _current_span.get()
+        span = Span(
+            name=name,
+            span_id=next(self._ids),
+            parent_id=parent.span_id if parent else None,
+            start=datetime.now(tz=UTC),
+            thread=threading.current_thread().name,
+            attributes=attributes,
+        )
+        token = _current_span.set(span)
+        t0 = time.perf_counter()
+        try:
+            yield span
+        finally:
+            span.duration = duration = time.perf_counter() - t0
+            _current_span.reset(token)
+            with self._lock:
+                self._add_span_stats(span.name, 1, duration, duration)
+                self._keep_span(span)
+
+    def span(
+        self,
+        name: str,
+        parent: Span | None = None,
+        **attributes: Any,
+    ) -> contextlib.AbstractContextManager[Span | None]:
+        """Times a block of work as a span.
+
+        Spans started inside another span in the same thread (or asyncio task) become its children.
+        Worker threads do not inherit the current span - pass `parent` explicitly.
+
+        Args:
+            name: The span name.
+            parent: The parent span - defaults to the current span.
+            **attributes: Arbitrary span attributes.
+
+        Returns:
+            A context manager yielding the span, or `None` if profiling is disabled.
+
+        """
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return self._span(name, parent, attributes)
+
+    def increment(self, name: str, value: float = 1) -> None:
+        """Increments a counter.
+
+        Args:
+            name: The counter name.
+            value: The increment.
+
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float, buckets: Sequence[float] = BYTE_BUCKETS) -> None:
+        """Records a histogram observation.
+
+        Args:
+            name: The histogram name.
+            value: The observed value.
+            buckets: Bucket upper bounds used when the histogram is created.
+
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if name not in self.histograms:
+                self.histograms[name] = Histogram(bounds=tuple(buckets))
+            self.histograms[name].observe(value)
+
+    def span_summary(self) -> dict[str, dict[str, float]]:
+        """Aggregates finished span durations by span name - including spans that were not kept.
+
+        Returns:
+            A mapping between span names and their count, total, mean and max duration in seconds.
+
+        """
+        with self._lock:
+            return {
+                name: {**stats, "mean_s": stats["total_s"] / stats["count"]} for name, stats in self._span_stats.items()
+            }
+
+    def recording(self) -> Recording:
+        """Returns a copy of all recorded data that can be merged into another profiler.
+
+        Returns:
+            The recorded data.
+
+        """
+        with self._lock:
+            return Recording(
+                spans=list(self.spans),
+                span_stats={name: dict(stats) for name, stats in self._span_stats.items()},
+                dropped_spans=dict(self.dropped_spans),
+                counters=dict(self.counters),
+                histograms={name: Histogram(**asdict(histogram)) for name, histogram in self.histograms.items()},
+            )
+
+    def merge(self, recording: Recording, parent: Span | None = None) -> None:
+        """Merges data recorded by another profiler, e.g. in a worker process.
+
+        Merged spans get new identifiers, root spans of the recording become children of `parent`.
+
+        Args:
+            recording: The recorded data - see `recording`.
+            parent: The parent span of the merged root spans.
+
+        """
+        with self._lock:
+            ids = {span.span_id: next(self._ids) for span in recording.spans}
+            for span in recording.spans:
+                # Parents of spans that were not kept are unknown - such spans are attached to the parent as well
+                parent_id = ids.get(span.parent_id) if span.parent_id is not None else None
+                if parent_id is None and parent is not None:
+                    parent_id = parent.span_id
+                self._keep_span(replace(span, span_id=ids[span.span_id], parent_id=parent_id))
+            for name, stats in recording.span_stats.items():
+                self._add_span_stats(name, stats["count"], stats["total_s"], stats["max_s"])
+            for name, dropped in recording.dropped_spans.items():
+                self.dropped_spans[name] = self.dropped_spans.get(name, 0) + dropped
+            for name, value in recording.counters.items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            for name, histogram in recording.histograms.items():
+                if name in self.histograms:
+                    self.histograms[name].merge(histogram)
+                else:
+                    self.histograms[name] = histogram
+
+    def snapshot(self) -> dict[str, Any]:
+        """Returns all recorded data.
+
+        Returns:
+            A dictionary with spans, numbers of dropped spans, span summary, counters and histograms.
+
+        """
+        summary = self.span_summary()
+        with self._lock:
+            return {
+                "spans": [asdict(span) for span in self.spans],
+                "dropped_spans": dict(self.dropped_spans),
+                "span_summary": summary,
+                "counters": dict(self.counters),
+                "histograms": {
+                    name: {**asdict(histogram), "p50": histogram.quantile(0.5), "p95": histogram.quantile(0.95)}
+                    for name, histogram in self.histograms.items()
+                },
+            }
+
+    def metrics(self) -> dict[str, float]:
+        """Flattens recorded data into scalar metrics.
+
+        Returns:
+            A mapping between metric names and values.
+
+        """
+        snapshot = self.snapshot()
+        metrics = {f"counter.{name}": value for name, value in snapshot["counters"].items()}
+        for name, stats in snapshot["span_summary"].items():
+            metrics.update({f"span.{name}.{key}": value for key, value in stats.items()})
+        for name, histogram in snapshot["histograms"].items():
+            metrics.update({
+                f"histogram.{name}.{key}": histogram[key]
+                for key in ("count", "total", "min", "max", "p50", "p95")
+                if histogram[key] is not None
+            })
+        return metrics
+
+    def export_json(self, path: Path) -> None:
+        """Saves recorded data as JSON.
+
+        Args:
+            path: The output file path.
+
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.snapshot(), cls=JsonEncoder, indent=2))
+
+    def log_to_mlflow(self, default_experiment_name: str = "astro-tools-profiling") -> None:
+        """Logs flattened metrics and the full JSON snapshot to MLflow.
+
+        The experiment name is resolved with `resolve_experiment_name` and an already active run
+        (`MLFLOW_RUN_ID`) is reused if there is one.
+
+        Args:
+            default_experiment_name: The experiment name used if `MLFLOW_EXPERIMENT_NAME` is not set.
+
+        """
+        import mlflow  # noqa: PLC0415
+
+        mlflow.set_experiment(resolve_experiment_name(default_experiment_name))
+        with mlflow.start_run(run_id=run_id_from_context()):
+            mlflow.log_metrics(self.metrics())
+            mlflow.log_dict(json.loads(json.dumps(self.snapshot(), cls=JsonEncoder)), "profiling.json")
+
+
+PROFILER = Profiler()
+"""Process-wide profiler."""
+
+
+def enable() -> None:
+    """Enables the process-wide profiler."""
+    PROFILER.enabled = True
+
+
+def disable() -> None:
+    """Disables the process-wide profiler."""
+    PROFILER.enabled = False
+
+
+def current_span() -> Span | None:
+    """Returns the span running in the current thread (or asyncio task).
+
+    Returns:
+        The current span or `None`.
+
+    """
+    return _current_span.get()
+
+
+def span(name: str, parent: Span | None = None, **attributes: Any) -> contextlib.AbstractContextManager[Span | None]:
+    """Times a block of work as a span of the process-wide profiler - see `Profiler.span`.
+
+    Args:
+        name: The span name.
+        parent: The parent span - defaults to the current span.
+        **attributes: Arbitrary span attributes.
+
+    Returns:
+        A context manager yielding the span, or `None` if profiling is disabled.
+
+    """
+    return PROFILER.span(name, parent, **attributes)
+
+
+def _run_recorded(func: Callable[..., Any], /, *args: Any, **kwargs: Any) -> tuple[Any, Recording]:
+    """Runs a task in a worker process and returns its result with the data recorded while it ran."""
+    PROFILER.reset()
+    PROFILER.enabled = True
+    return func(*args, **kwargs), PROFILER.recording()
+
+
+def submit(executor: Executor, func: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future[Any]:
+    """Submits a task to a process pool, merging data recorded in the worker into the process-wide profiler.
+
+    The task is submitted unchanged if profiling is disabled. Data recorded by a task that raises is lost.
+
+    Args:
+        executor: The process pool executor.
+        func: The task - must be picklable.
+        *args: Positional arguments of the task.
+        **kwargs: Keyword arguments of the task.
+
+    Returns:
+        The future with the task result - set once the recorded data is merged.
+
+    """
+    if not PROFILER.enabled:
+        return executor.submit(func, *args, **kwargs)
+    parent = current_span()
+    future: Future[Any] = Future()
+
+    def on_done(worker_future: Future[tuple[Any, Recording]]) -> None:
+        if (error := worker_future.exception()) is not None:
+            future.set_exception(error)
+            return
+        result, recording = worker_future.result()
+        PROFILER.merge(recording, parent)
+        future.set_result(result)
+
+    executor.submit(_run_recorded, func, *args, **kwargs).add_done_callback(on_done)
+    return future
+
+
+def map_tasks(
+    executor: Executor, func: Callable[..., Any], *iterables: Iterable[Any], chunksize: int = 1
+) -> Iterator[Any]:
+    """Maps a task over the iterables in a process pool - see `submit` and `Executor.map`.
+
+    Args:
+        executor: The process pool executor.
+        func: The task - must be picklable.
+        *iterables: Iterables with the task arguments.
+        chunksize: Number of tasks sent to a worker at once.
+
+    Yields:
+        Task results in the order of the arguments.
+
+    """
+    if not PROFILER.enabled:
+        yield from executor.map(func, *iterables, chunksize=chunksize)
+        return
+    parent = current_span()
+    for result, recording in executor.map(functools.partial(_run_recorded, func), *iterables, chunksize=chunksize):
+        PROFILER.merge(recording, parent)
+        yield result
+
+
+def increment(name: str, value: float = 1) -> None:
+    """Increments a counter of the process-wide profiler.
+
+    Args:
+        name: The counter name.
+        value: The increment.
+
+    """
+    PROFILER.increment(name, value)
+
+
+def observe(name: str, value: float, buckets: Sequence[float] = BYTE_BUCKETS) -> None:
+    """Records a histogram observation in the process-wide profiler.
+
+    Args:
+        name: The histogram name.
+        value: The observed value.
+        buckets: Bucket upper bounds used when the histogram is created.
+
+    """
+    PROFILER.observe(name, value, buckets)
+
+
+def export_json(path: Path) -> None:
+    """Saves data recorded by the process-wide profiler as JSON.
+
+    Args:
+        path: The output file path.
+
+    """
+    PROFILER.export_json(path)
+
+
+def log_to_mlflow(default_experiment_name: str = "astro-tools-profiling") -> None:
+    """Logs data recorded by the process-wide profiler to MLflow.
+
+    Args:
+        default_experiment_name: The experiment name used if `MLFLOW_EXPERIMENT_NAME` is not set.
+
+    """
+    PROFILER.log_to_mlflow(default_experiment_name)
@@ -0,0 +1,330 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+"""Byte-level progress accounting and bandwidth limiting for long transfers and checks.
+
+`ByteProgress` is fed by read loops with the number of processed bytes, so progress, rolling throughput and the
+ETA stay accurate even if a run consists of a few huge files. Snapshots can be written periodically to a JSON
+file for external monitoring. `TokenBucket` caps the aggregate rate of all threads sharing it, and
+`ProgressReader` connects both to any binary file object.
+
+Examples:
+    ```python
+    from astro_tools.utils.progress import ByteProgress, ProgressReader, TokenBucket
+
+    bucket = TokenBucket.from_mbps(50)
+    with ByteProgress(total=path.stat().st_size, files=1, snapshot_file=Path("progress.json")) as progress:
+        with path.open("rb") as fh:
+            blob_client.upload_blob(ProgressReader(fh, progress, bucket), length=path.stat().st_size)
+        progress.file_done()
+    ```
+
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import IO, TYPE_CHECKING, Any, Self
+
+from tqdm import tqdm
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from types import TracebackType
+
+_MB = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class ProgressSnapshot:
+    """Point-in-time progress of a run."""
+
+    desc: str
+    """Description of the run."""
+    timestamp: float
+    """Unix time of the snapshot."""
+    elapsed: float
+    """Seconds since the start of the run."""
+    bytes_done: int
+    """Number of processed bytes."""
+    bytes_total: int
+    """Total number of bytes to process."""
+    files_done: int
+    """Number of processed files."""
+    files_total: int
+    """Total number of files to process."""
+    mb_per_s: float
+    """Throughput over the rolling window in MB/s."""
+    avg_mb_per_s: float
+    """Throughput since the start of the run in MB/s."""
+    eta: float | None
+    """Estimated seconds until the end of the run based on the rolling throughput - `None` if unknown."""
+
+    @property
+    def fraction(self) -> float:
+        """Fraction of processed bytes."""
+        return min(self.bytes_done / self.bytes_total, 1.0) if self.bytes_total else 1.0
+
+
+class ByteProgress:
+    """Thread-safe byte-level progress with rolling throughput, ETA and periodic JSON snapshots."""
+
+    def __init__(
+        self,
+        total: int,
+        files: int = 0,
+        desc: str = "",
+        *,
+        window: float = 10.0,
+        snapshot_file: Path | None = None,
+        snapshot_interval: float = 5.0,
+        disable: bool = False,
+    ) -> None:
+        """Initializes the progress.
+
+        Args:
+            total: Total number of bytes to process.
+            files: Total number of files to process.
+            desc: Description shown next to the progress bar.
+            window: Length of the rolling throughput window in seconds.
+            snapshot_file: JSON file that snapshots are written to - no snapshots if `None`.
+            snapshot_interval: Minimum number of seconds between snapshots.
+            disable: Whether to hide the progress bar.
+
+        """
+        self.total = total
+        self.files = files
+        self.desc = desc
+        self.window = window
+        self.snapshot_file = snapshot_file
+        self.snapshot_interval = snapshot_interval
+        self.bytes_done = 0
+        self.files_done = 0
+        self._start = time.monotonic()
+        self._last_snapshot = self._start
+        self._samples: deque[tuple[float, int]] = deque([(self._start, 0)])
+        self._lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        self._pbar = tqdm(total=total, desc=desc, unit="B", unit_scale=True, unit_divisor=1024, disable=disable)
+
+    def __enter__(self) -> Self:
+        """Returns the progress."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        """Closes the progress."""
+        self.close()
+
+    def update(self, n: int) -> None:
+        """Records processed bytes.
+
+        Args:
+            n: Number of bytes processed since the last update.
+
+        """
+        if n <= 0:
+            return
+        with self._lock:
+            self.bytes_done += n
+            now = time.monotonic()
+            self._samples.append((now, self.bytes_done))
+            # Keep one sample older than the window as the reference point of the rolling rate
+            while len(self._samples) > 2 and self._samples[1][0] <= now - self.window:  # noqa: PLR2004
+                self._samples.popleft()
+            self._pbar.update(n)
+            write_snapshot = self.snapshot_file is not None and now - self._last_snapshot >= self.snapshot_interval
+            if write_snapshot:
+                self._last_snapshot = now
+        if write_snapshot:
+            self.write_snapshot()
+
+    def file_done(self, remaining: int = 0) -> None:
+        """Records a processed file.
+
+        Args:
+            remaining: Bytes of the file that were not reported with `update`, e.g. parts skipped after an error.
+
+        """
+        self.update(remaining)
+        with self._lock:
+            self.files_done += 1
+            self._pbar.set_postfix_str(f"files={self.files_done}/{self.files}", refresh=False)
+
+    def snapshot(self) -> ProgressSnapshot:
+        """Returns the current progress.
+
+        Returns:
+            The snapshot.
+
+        """
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._start
+            reference_time, reference_bytes = self._samples[0]
+            span = now - reference_time
+            rate = (self.bytes_done - reference_bytes) / span if span > 0 else 0.0
+            remaining = max(self.total - self.bytes_done, 0)
+            return ProgressSnapshot(
+                desc=self.desc,
+                timestamp=time.time(),
+                elapsed=elapsed,
+                bytes_done=self.bytes_done,
+                bytes_total=self.total,
+                files_done=self.files_done,
+                files_total=self.files,
+                mb_per_s=rate / _MB,
+                avg_mb_per_s=self.bytes_done / elapsed / _MB if elapsed > 0 else 0.0,
+                eta=remaining / rate if rate > 0 else (0.0 if not remaining else None),
+            )
+
+    def write_snapshot(self) -> ProgressSnapshot:
+        """Writes the current progress to the snapshot file (atomically, if the file is configured).
+
+        Returns:
+            The snapshot.
+
+        """
+        snapshot = self.snapshot()
+        if self.snapshot_file is not None:
+            tmp_path = self.snapshot_file.with_name(f"{self.snapshot_file.name}.tmp")
+            with self._snapshot_lock:
+                tmp_path.write_text(json.dumps({**asdict(snapshot), "fraction": snapshot.fraction}, indent=2))
+                tmp_path.replace(self.snapshot_file)
+        return snapshot
+
+    def close(self) -> ProgressSnapshot:
+        """Closes the progress bar and writes the final snapshot.
+
+        Returns:
+            The final snapshot.
+
+        """
+        self._pbar.close()
+        return self.write_snapshot()
+
+
+class TokenBucket:
+    """Thread-safe token bucket delaying callers to keep their aggregate rate under the limit."""
+
+    def __init__(self, rate: float | None, burst: float | None = None) -> None:
+        """Initializes the bucket.
+
+        Args:
+            rate: Tokens (bytes) per second - unlimited if `None`.
+            burst: Tokens that can be consumed at once after an idle period - one second worth of tokens if `None`.
+
+        """
+        self.rate = rate
+        self.burst = burst if burst is not None else (rate or 0.0)
+        self._lock = threading.Lock()
+        self._next_free = time.monotonic()
+
+    @classmethod
+    def from_mbps(cls, mbps: float | None) -> TokenBucket:
+        """Creates a bucket limiting the rate in MB per second.
+
+        Args:
+            mbps: The limit in MB/s - unlimited if `None`.
+
+        Returns:
+            The bucket.
+
+        """
+        return cls(mbps * _MB if mbps else None)
+
+    def acquire(self, tokens: float) -> None:
+        """Blocks until the tokens can be consumed.
+
+        Args:
+            tokens: Number of tokens to consume.
+
+        """
+        if not self.rate or tokens <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            # Idle time refills the bucket up to the burst size
+            start = max(now - self.burst / self.rate, self._next_free)
+            finish = start + tokens / self.rate
+            self._next_free = finish
+        if finish > now:
+            time.sleep(finish - now)
+
+
+class ProgressReader:
+    """Binary file object wrapper reporting read bytes to progress and pacing reads with a token bucket.
+
+    Every read is charged to the token bucket, so the paced rate matches the bytes actually read - including
+    blocks the Azure SDK reads again when it retries a request. Progress only counts bytes past the furthest offset
+    read so far - blocks uploaded in parallel are read out of order - so bytes read again are not reported twice
+    and the reported total never exceeds the file size.
+
+    """
+
+    def __init__(self, fh: IO[bytes], progress: ByteProgress | None = None, bucket: TokenBucket | None = None) -> None:
+        """Initializes the reader.
+
+        Args:
+            fh: The wrapped binary file object - other attributes are delegated to it.
+            progress: Progress fed with the number of read bytes.
+            bucket: Token bucket limiting the read rate.
+
+        """
+        self._fh = fh
+        self.progress = progress
+        self.bucket = bucket
+        self.bytes_read = 0
+        """Furthest offset read through the wrapper - the number of bytes reported to the progress."""
+
+    def __getattr__(self, name: str) -> Any:
+        """Delegates other attributes to the wrapped file object."""
+        return getattr(self._fh, name)
+
+    def _account(self, n: int) -> None:
+        try:
+            end = self._fh.tell()
+        except OSError:
+            # Not seekable - reads are sequential
+            end = self.bytes_read + n
+        if end > self.bytes_read:
+            new_bytes, self.bytes_read = end - self.bytes_read, end
+            if self.progress is not None:
+                self.progress.update(new_bytes)
+        if self.bucket is not None:
+            self.bucket.acquire(n)
+
+    def read(self, size: int = -1) -> bytes:
+        """Reads bytes from the wrapped file object.
+
+        Args:
+            size: Maximum number of bytes - until the end of the file if negative.
+
+        Returns:
+            The bytes.
+
+        """
+        data = self._fh.read(size)
+        self._account(len(data))
+        return data
+
+    def readinto(self, buffer: Any) -> int:
+        """Reads bytes from the wrapped file object into the buffer.
+
+        Args:
+            buffer: A writable buffer.
+
+        Returns:
+            Number of read bytes.
+
+        """
+        n: int = self._fh.readinto(buffer)  # type: ignore[attr-defined]
+        self._account(n or 0)
+        return n
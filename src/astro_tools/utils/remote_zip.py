@@ -0,0 +1,377 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+"""Reading members of zip archives stored in Blob Storage without downloading whole archives.
+
+`BlobRangeFile` is a read-only, seekable file object backed by range requests, so `zipfile` can parse the end of
+central directory record (including zip64 records) and the central directory of a remote archive - the archive
+tail is fetched with a single request. Members are extracted by `zipfile` as well, which takes care of all
+compression methods and CRC checks. To avoid one request per read, byte ranges of the selected members are
+computed from the central directory, adjacent ranges are coalesced and fetched concurrently before the members
+are inflated.
+
+Examples:
+    ```python
+    from astro_tools.core.clients import get_container_client
+    from astro_tools.utils.remote_zip import extract_members
+
+    blob_client = get_container_client("datasets").get_blob_client("raw/M31_T11_HO_40.zip")
+    extract_members(blob_client, Path("frames"), lambda info: "_ha_" in info.filename.lower())
+    ```
+
+"""
+
+from __future__ import annotations
+
+import bisect
+import io
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import pyzipper
+
+from astro_tools.utils import profiling
+from astro_tools.utils.logging import get_logger
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Sequence
+    from concurrent.futures import Future
+
+    from azure.storage.blob import BlobClient
+
+_logger = get_logger(__name__)
+
+_MB = 1024 * 1024
+DEFAULT_TAIL_SIZE = 1 * _MB
+"""Number of bytes at the end of the archive fetched up front - covers the central directory of most archives."""
+DEFAULT_MAX_GAP = 1 * _MB
+"""Member ranges separated by at most this many bytes are fetched with a single request."""
+DEFAULT_MAX_RANGE_SIZE = 64 * _MB
+"""Maximum size of coalesced ranges - larger ranges are only fetched for members that are larger themselves."""
+
+
+@dataclass(frozen=True)
+class ByteRange:
+    """A byte range of the archive holding complete members."""
+
+    start: int
+    """Offset of the first byte."""
+    end: int
+    """Offset after the last byte."""
+    members: tuple[str, ...]
+    """Names of the members stored in the range."""
+
+    @property
+    def size(self) -> int:
+        """The range size in bytes."""
+        return self.end - self.start
+
+
+class BlobRangeFile(io.RawIOBase):
+    """Read-only, seekable file object serving reads from prefetched ranges or range requests."""
+
+    def __init__(self, blob_client: BlobClient, size: int | None = None, tail_size: int = DEFAULT_TAIL_SIZE) -> None:
+        """Initializes the file object and fetches the archive tail.
+
+        Args:
+            blob_client: The blob client.
+            size: The blob size - requested from the service if `None`.
+            tail_size: Number of bytes fetched from the end of the blob.
+
+        """
+        super().__init__()
+        self.blob_client = blob_client
+        self.size = blob_client.get_blob_properties().size if size is None else size
+        self.requests = 0
+        """Number of range requests."""
+        self.bytes_fetched = 0
+        """Number of fetched bytes."""
+        self._pos = 0
+        self._starts: list[int] = []
+        self._ranges: dict[int, bytes] = {}
+        self._lock = threading.Lock()
+        tail_start = max(self.size - tail_size, 0)
+        self.add_range(tail_start, self.fetch(tail_start, self.size))
+
+    def fetch(self, start: int, end: int, max_concurrency: int = 1) -> bytes:
+        """Downloads a byte range - safe to call from multiple threads.
+
+        Args:
+            start: Offset of the first byte.
+            end: Offset after the last byte.
+            max_concurrency: Number of parallel connections used for large ranges.
+
+        Returns:
+            The downloaded bytes.
+
+        """
+        if end <= start:
+            return b""
+        data: bytes = self.blob_client.download_blob(
+            offset=start, length=end - start, max_concurrency=max_concurrency
+        ).readall()
+        with self._lock:
+            self.requests += 1
+            self.bytes_fetched += len(data)
+        profiling.increment("blob.extract.requests")
+        profiling.increment("blob.extract.bytes_fetched", len(data))
+        return data
+
+    def add_range(self, start: int, data: bytes) -> None:
+        """Caches fetched bytes, so reads within the range do not send requests.
+
+        Args:
+            start: Offset of the first byte.
+            data: The bytes.
+
+        """
+        if start not in self._ranges:
+            bisect.insort(self._starts, start)
+        self._ranges[start] = data
+
+    def drop_range(self, start: int) -> None:
+        """Removes a cached range.
+
+        Args:
+            start: Offset of the first byte of the range.
+
+        """
+        if self._ranges.pop(start, None) is not None:
+            self._starts.remove(start)
+
+    def covers(self, start: int, end: int) -> bool:
+        """Checks if a byte range is available in a single cached range.
+
+        Args:
+            start: Offset of the first byte.
+            end: Offset after the last byte.
+
+        Returns:
+            `True` if reading the range does not send any requests.
+
+        """
+        cached = self._cached(start, end - start)
+        return cached is not None and len(cached) == end - start
+
+    def _cached(self, pos: int, n: int) -> bytes | None:
+        index = bisect.bisect_right(self._starts, pos) - 1
+        if index < 0:
+            return None
+        start = self._starts[index]
+        data = self._ranges[start]
+        if pos >= start + len(data):
+            return None
+        return data[pos - start : pos - start + n]
+
+    def readable(self) -> bool:  # noqa: PLR6301
+        """Returns `True` - the file is readable."""
+        return True
+
+    def seekable(self) -> bool:  # noqa: PLR6301
+        """Returns `True` - the file supports random access."""
+        return True
+
+    def tell(self) -> int:
+        """Returns the current position."""
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        """Changes the current position.
+
+        Args:
+            offset: The offset relative to `whence`.
+            whence: `io.SEEK_SET`, `io.SEEK_CUR` or `io.SEEK_END`.
+
+        Returns:
+            The new position.
+
+        Raises:
+            ValueError: If `whence` is invalid.
+            OSError: If the new position is negative.
+
+        """
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        elif whence == io.SEEK_END:
+            self._pos = self.size + offset
+        else:
+            msg = f"Invalid whence: {whence}"
+            raise ValueError(msg)
+        if self._pos < 0:
+            msg = "Negative seek position"
+            raise OSError(msg)
+        return self._pos
+
+    def readinto(self, buffer: Any) -> int:
+        """Reads bytes into the buffer, fetching bytes missing in cached ranges.
+
+        Unlike most raw streams, the buffer is always filled up to the end of the blob.
+
+        Args:
+            buffer: A writable buffer.
+
+        Returns:
+            Number of bytes read - 0 at the end of the blob.
+
+        """
+        view = memoryview(buffer).cast("B")
+        n = min(len(view), max(self.size - self._pos, 0))
+        filled = 0
+        while filled < n:
+            chunk = self._cached(self._pos + filled, n - filled)
+            if chunk is None:
+                # Cache miss - fetch the rest of the read, up to the next cached range
+                index = bisect.bisect_right(self._starts, self._pos + filled)
+                end = self._pos + n if index == len(self._starts) else min(self._starts[index], self._pos + n)
+                _logger.debug("Range cache miss at %d (%d bytes)", self._pos + filled, end - self._pos - filled)
+                chunk = self.fetch(self._pos + filled, end)
+            view[filled : filled + len(chunk)] = chunk
+            filled += len(chunk)
+        self._pos += filled
+        return filled
+
+
+def member_ranges(zf: zipfile.ZipFile, members: Iterable[zipfile.ZipInfo]) -> list[ByteRange]:
+    """Computes byte ranges of the members, including local headers and data descriptors.
+
+    A member ends where the next member (or the central directory) starts, so the range covers everything
+    `zipfile` reads when extracting it.
+
+    Args:
+        zf: The archive.
+        members: The selected members.
+
+    Returns:
+        Member ranges sorted by offset.
+
+    """
+    start_dir = zf.start_dir
+    offsets = sorted({info.header_offset for info in zf.infolist()} | {start_dir})
+    ranges = []
+    for info in sorted(members, key=lambda i: i.header_offset):
+        end = offsets[bisect.bisect_right(offsets, info.header_offset)] if info.header_offset < start_dir else start_dir
+        ranges.append(ByteRange(start=info.header_offset, end=end, members=(info.filename,)))
+    return ranges
+
+
+def coalesce_ranges(
+    ranges: Sequence[ByteRange],
+    max_gap: int = DEFAULT_MAX_GAP,
+    max_size: int = DEFAULT_MAX_RANGE_SIZE,
+) -> list[ByteRange]:
+    """Merges ranges separated by small gaps, so adjacent members are fetched with a single request.
+
+    Args:
+        ranges: Ranges sorted by offset.
+        max_gap: Maximum number of unneeded bytes between merged ranges.
+        max_size: Maximum size of a merged range.
+
+    Returns:
+        The merged ranges.
+
+    """
+    merged: list[ByteRange] = []
+    for current in ranges:
+        last = merged[-1] if merged else None
+        if last is not None and current.start - last.end <= max_gap and current.end - last.start <= max_size:
+            merged[-1] = ByteRange(start=last.start, end=current.end, members=last.members + current.members)
+        else:
+            merged.append(current)
+    return merged
+
+
+def open_remote_zip(file: BlobRangeFile, password: str | None = None) -> zipfile.ZipFile:
+    """Opens the remote archive.
+
+    Args:
+        file: The remote archive file object.
+        password: The password of an (AES) encrypted archive.
+
+    Returns:
+        The archive - `pyzipper.AESZipFile` if a password is provided.
+
+    """
+    if password is None:
+        return zipfile.ZipFile(file)
+    zf: zipfile.ZipFile = pyzipper.AESZipFile(file)
+    zf.setpassword(password.encode())
+    return zf
+
+
+def extract_members(
+    blob_client: BlobClient,
+    output_dir: Path,
+    select: Callable[[zipfile.ZipInfo], bool],
+    workers: int = 8,
+    password: str | None = None,
+    max_gap: int = DEFAULT_MAX_GAP,
+    max_range_size: int = DEFAULT_MAX_RANGE_SIZE,
+    tail_size: int = DEFAULT_TAIL_SIZE,
+) -> list[Path]:
+    """Extracts the selected members of a remote archive, fetching only their byte ranges.
+
+    Coalesced ranges are fetched concurrently and members are extracted as soon as their range arrives - at most
+    `workers` ranges are held in memory at once.
+
+    Args:
+        blob_client: The blob client of the archive.
+        output_dir: The output directory - member paths are preserved.
+        select: Predicate deciding which members to extract.
+        workers: Number of concurrent range requests.
+        password: The password of an (AES) encrypted archive.
+        max_gap: Maximum number of unneeded bytes between merged ranges.
+        max_range_size: Maximum size of a merged range.
+        tail_size: Number of bytes fetched from the end of the archive up front.
+
+    Returns:
+        Paths of the extracted files.
+
+    """
+    file = BlobRangeFile(blob_client, tail_size=tail_size)
+    with open_remote_zip(file, password) as zf:
+        selected = [info for info in zf.infolist() if not info.is_dir() and select(info)]
+        infos = {info.filename: info for info in selected}
+        ranges = coalesce_ranges(member_ranges(zf, selected), max_gap, max_range_size)
+        # Members stored in the archive tail were already fetched together with the central directory
+        cached_members = [name for r in ranges if file.covers(r.start, r.end) for name in r.members]
+        ranges = [r for r in ranges if not file.covers(r.start, r.end)]
+        _logger.info(
+            "Extracting %d of %d members (%s of %s MB) from %s with %d requests",
+            len(selected),
+            len(zf.infolist()),
+            f"{sum(r.size for r in ranges) / _MB:.2f}",
+            f"{file.size / _MB:.2f}",
+            blob_client.blob_name,
+            len(ranges),
+        )
+
+        extracted = [_extract(zf, infos[name], output_dir) for name in cached_members]
+        # Few large ranges are split into parallel requests by the SDK
+        concurrency = max(workers // max(len(ranges), 1), 1)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # Submitting all ranges at once would buffer the whole selection if extraction is slower than download
+            pending = list(reversed(ranges))
+            futures: dict[Future[bytes], ByteRange] = {}
+            while pending or futures:
+                while pending and len(futures) < workers:
+                    byte_range = pending.pop()
+                    futures[executor.submit(file.fetch, byte_range.start, byte_range.end, concurrency)] = byte_range
+                future = next(as_completed(futures))
+                byte_range = futures.pop(future)
+                file.add_range(byte_range.start, future.result())
+                extracted.extend(_extract(zf, infos[name], output_dir) for name in byte_range.members)
+                file.drop_range(byte_range.start)
+
+    _logger.info("Fetched %s MB with %d requests", f"{file.bytes_fetched / _MB:.2f}", file.requests)
+    return extracted
+
+
+def _extract(zf: zipfile.ZipFile, info: zipfile.ZipInfo, output_dir: Path) -> Path:
+    path = Path(zf.extract(info, output_dir))
+    profiling.increment("blob.extract.members")
+    return path
@@ -0,0 +1,299 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+"""Incremental directory tree scanning.
+
+The scanner keeps a compact manifest with the modification time of every directory and the size and
+modification time of every file in it. Adding, removing or renaming a directory entry updates the modification
+time of that directory, so on subsequent scans only directories whose modification time changed are listed
+again - every other directory costs a single `stat` call. Directories are scanned level by level in a thread pool.
+
+Notes:
+    Rewriting an existing file in place does not touch the modification time of its directory, so such
+    changes are only detected when the directory is listed for another reason. Use `full=True` to re-list
+    every directory.
+
+Examples:
+    ```python
+    from astro_tools.utils.scanning import incremental_scan
+
+    result = incremental_scan(Path("/data"), manifest_path=Path("logs/scan-manifest.json.gz"))
+    print(len(result.added), len(result.changed), len(result.removed))
+    zip_files = result.paths(suffix=".zip")
+    ```
+
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from astro_tools.utils import profiling
+from astro_tools.utils.logging import get_logger
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+_logger = get_logger(__name__)
+
+MANIFEST_VERSION = 1
+"""Version of the manifest file format."""
+_RACY_WINDOW_NS = 2_000_000_000
+
+
+@dataclass(frozen=True)
+class DirRecord:
+    """Manifest record of a single directory."""
+
+    mtime_ns: int | None
+    """Directory modification time - `None` if it cannot be trusted and the directory has to be listed again."""
+    files: dict[str, tuple[int, int]]
+    """A mapping between file names and their size and modification time (ns)."""
+    subdirs: tuple[str, ...]
+    """Names of the subdirectories."""
+
+
+@dataclass
+class ScanResult:
+    """Result of a directory tree scan."""
+
+    root: Path
+    """The scanned directory."""
+    dirs: dict[str, DirRecord]
+    """A mapping between relative directory paths (`""` for the root) and their records."""
+    added: set[str] = field(default_factory=set)
+    """Relative paths of files added since the previous scan."""
+    changed: set[str] = field(default_factory=set)
+    """Relative paths of files with different size or modification time than in the previous scan."""
+    removed: set[str] = field(default_factory=set)
+    """Relative paths of files removed since the previous scan."""
+    dirs_scanned: int = 0
+    """Number of directories that were listed."""
+    dirs_reused: int = 0
+    """Number of directories reused from the previous scan."""
+
+    def iter_files(self) -> Iterator[tuple[str, int, int]]:
+        """Iterates over all files in the tree.
+
+        Yields:
+            Tuples of relative file path, size and modification time (ns).
+
+        """
+        for rel_dir, record in self.dirs.items():
+            for name, (size, mtime_ns) in record.files.items():
+                yield _join(rel_dir, name), size, mtime_ns
+
+    def paths(self, suffix: str | None = None) -> list[Path]:
+        """Returns absolute paths of the files in the tree.
+
+        Args:
+            suffix: Optional case-insensitive file suffix filter, e.g. `".zip"`.
+
+        Returns:
+            Sorted file paths.
+
+        """
+        suffix = suffix.lower() if suffix else None
+        return sorted(
+            self.root / rel_path
+            for rel_path, _, _ in self.iter_files()
+            if suffix is None or rel_path.lower().endswith(suffix)
+        )
+
+
+def _join(rel_dir: str, name: str) -> str:
+    return f"{rel_dir}/{name}" if rel_dir else name
+
+
+def load_manifest(manifest_path: Path, root: Path) -> dict[str, DirRecord]:
+    """Loads directory records from the manifest.
+
+    Args:
+        manifest_path: The manifest file path.
+        root: The scanned directory - manifests of other directories are ignored.
+
+    Returns:
+        A mapping between relative directory paths and their records - empty if the manifest does not exist,
+        cannot be read or belongs to another directory.
+
+    """
+    if not manifest_path.exists():
+        return {}
+    try:
+        with gzip.open(manifest_path, "rt", encoding="utf-8") as fh:
+            manifest = json.load(fh)
+    except (OSError, ValueError):
+        _logger.warning("Could not read scan manifest %s - scanning everything", manifest_path.as_posix())
+        return {}
+    if manifest.get("version") != MANIFEST_VERSION or manifest.get("root") != root.as_posix():
+        return {}
+    return {
+        rel_dir: DirRecord(
+            mtime_ns=mtime_ns,
+            files={name: (size, file_mtime_ns) for name, (size, file_mtime_ns) in files.items()},
+            subdirs=tuple(subdirs),
+        )
+        for rel_dir, (mtime_ns, files, subdirs) in manifest["dirs"].items()
+    }
+
+
+def save_manifest(manifest_path: Path, root: Path, dirs: dict[str, DirRecord]) -> None:
+    """Saves directory records as a gzip compressed JSON manifest atomically.
+
+    Args:
+        manifest_path: The manifest file path.
+        root: The scanned directory.
+        dirs: A mapping between relative directory paths and their records.
+
+    """
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "root": root.as_posix(),
+        "dirs": {rel_dir: [record.mtime_ns, record.files, record.subdirs] for rel_dir, record in dirs.items()},
+    }
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = manifest_path.with_name(f"{manifest_path.name}.{os.getpid()}.tmp")
+    with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=1) as fh:
+        json.dump(manifest, fh, separators=(",", ":"))
+    tmp_path.replace(manifest_path)
+
+
+def _scan_dir(
+    root: Path,
+    rel_dir: str,
+    previous: DirRecord | None,
+    scan_started_ns: int,
+    *,
+    full: bool,
+) -> tuple[str, DirRecord | None, bool]:
+    """Lists a single directory unless its modification time matches the previous record.
+
+    Returns:
+        A tuple of the relative directory path, its record (`None` if the directory disappeared)
+        and a flag indicating if the directory was listed.
+
+    """
+    dir_path = os.path.join(root, rel_dir)  # noqa: PTH118
+    try:
+        mtime_ns = os.stat(dir_path).st_mtime_ns  # noqa: PTH116
+        if not full and previous is not None and previous.mtime_ns == mtime_ns:
+            return rel_dir, previous, False
+        files: dict[str, tuple[int, int]] = {}
+        subdirs: list[str] = []
+        with os.scandir(dir_path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.name)
+                    elif entry.is_file():
+                        stat = entry.stat()
+                        files[entry.name] = (stat.st_size, stat.st_mtime_ns)
+                except FileNotFoundError:
+                    continue
+    except (FileNotFoundError, NotADirectoryError):
+        return rel_dir, None, True
+    # Entries added within the timestamp granularity of the listing would not change the modification time
+    # again - do not trust modification times that are too close to the scan
+    trusted_mtime_ns = mtime_ns if scan_started_ns - mtime_ns > _RACY_WINDOW_NS else None
+    return rel_dir, DirRecord(mtime_ns=trusted_mtime_ns, files=files, subdirs=tuple(sorted(subdirs))), True
+
+
+def _diff(result: ScanResult, rel_dir: str, old: DirRecord | None, new: DirRecord | None) -> None:
+    old_files = old.files if old is not None else {}
+    new_files = new.files if new is not None else {}
+    for name, stat in new_files.items():
+        if name not in old_files:
+            result.added.add(_join(rel_dir, name))
+        elif old_files[name] != stat:
+            result.changed.add(_join(rel_dir, name))
+    result.removed.update(_join(rel_dir, name) for name in old_files.keys() - new_files.keys())
+
+
+def scan_tree(
+    root: Path,
+    previous: dict[str, DirRecord] | None = None,
+    workers: int = 8,
+    *,
+    full: bool = False,
+) -> ScanResult:
+    """Scans the directory tree, listing only directories that changed since the previous scan.
+
+    Symbolic links to directories are not followed.
+
+    Args:
+        root: The directory to scan.
+        previous: Directory records from the previous scan.
+        workers: Number of threads used to scan directories.
+        full: Whether to list every directory regardless of its modification time.
+
+    Returns:
+        The scan result with the added, changed and removed files.
+
+    """
+    previous = previous or {}
+    result = ScanResult(root=root, dirs={})
+    scan_started_ns = time.time_ns()
+    level = [""]
+    with (
+        profiling.span("scan.tree", root=root.as_posix()),
+        ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan") as executor,
+    ):
+        while level:
+            next_level: list[str] = []
+            for rel_dir, record, listed in executor.map(
+                lambda rel_dir: _scan_dir(root, rel_dir, previous.get(rel_dir), scan_started_ns, full=full),
+                level,
+            ):
+                if record is None:
+                    continue
+                result.dirs[rel_dir] = record
+                if listed:
+                    result.dirs_scanned += 1
+                    _diff(result, rel_dir, previous.get(rel_dir), record)
+                else:
+                    result.dirs_reused += 1
+                next_level.extend(_join(rel_dir, name) for name in record.subdirs)
+            level = next_level
+
+    for rel_dir in previous.keys() - result.dirs.keys():
+        _diff(result, rel_dir, previous[rel_dir], None)
+
+    profiling.increment("scan.dirs_scanned", result.dirs_scanned)
+    profiling.increment("scan.dirs_reused", result.dirs_reused)
+    return result
+
+
+def incremental_scan(root: Path, manifest_path: Path, workers: int = 8, *, full: bool = False) -> ScanResult:
+    """Scans the directory tree using the manifest from the previous scan and saves the updated manifest.
+
+    Args:
+        root: The directory to scan.
+        manifest_path: The manifest file path - created if it does not exist.
+        workers: Number of threads used to scan directories.
+        full: Whether to list every directory regardless of its modification time.
+
+    Returns:
+        The scan result with the files added, changed and removed since the previous scan.
+
+    """
+    root = root.resolve()
+    previous = load_manifest(manifest_path, root)
+    result = scan_tree(root, previous, workers, full=full)
+    if result.dirs_scanned or result.removed or not previous:
+        save_manifest(manifest_path, root, result.dirs)
+    _logger.info(
+        "Scanned %s: %d directories listed, %d reused, %d files added, %d changed, %d removed",
+        root.as_posix(),
+        result.dirs_scanned,
+        result.dirs_reused,
+        len(result.added),
+        len(result.changed),
+        len(result.removed),
+    )
+    return result
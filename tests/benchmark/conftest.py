@@ -0,0 +1,65 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+
+from __future__ import annotations
+
+import typing
+
+import pytest
+
+from astro_tools.testing.benchmark import (
+    BenchmarkResult,
+    compare_to_baseline,
+    format_results,
+    load_baseline,
+    save_results,
+)
+from astro_tools.testing.corpus import Corpus, CorpusSpec, generate_corpus
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Callable, Generator
+
+    from _pytest.config import Config
+
+BENCHMARK_SPEC = CorpusSpec(
+    archives=40,
+    frames_per_archive=8,
+    frame_shape=(512, 512),
+    corrupted=4,
+    truncated=4,
+    small_files=20_000,
+    small_file_size=1024,
+    small_files_per_dir=200,
+)
+"""Corpus used by all benchmarks - changing it invalidates the baseline."""
+
+
+@pytest.fixture(scope="session")
+def corpus(tmp_path_factory: pytest.TempPathFactory) -> Corpus:
+    return generate_corpus(tmp_path_factory.mktemp("corpus"), BENCHMARK_SPEC)
+
+
+@pytest.fixture(scope="session")
+def benchmark_results(pytestconfig: Config) -> Generator[list[BenchmarkResult]]:
+    results: list[BenchmarkResult] = []
+    yield results
+    if results:
+        print("\n" + format_results(results))  # noqa: T201
+    if (save_path := pytestconfig.getoption("--benchmark-save")) is not None:
+        save_results(save_path, results)
+
+
+@pytest.fixture
+def record_benchmark(
+    pytestconfig: Config,
+    benchmark_results: list[BenchmarkResult],
+) -> Callable[[BenchmarkResult], None]:
+    baseline = load_baseline(pytestconfig.getoption("--benchmark-baseline"))
+    tolerance = pytestconfig.getoption("--benchmark-tolerance")
+
+    def record(result: BenchmarkResult) -> None:
+        benchmark_results.append(result)
+        regressions = compare_to_baseline([result], baseline, tolerance)
+        assert not regressions, "\n".join(regressions)
+
+    return record
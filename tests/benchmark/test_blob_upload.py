@@ -0,0 +1,83 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+
+from __future__ import annotations
+
+import typing
+
+import pytest
+
+from astro_tools.cli.blob.blob_upload import _list_existing_blobs, _upload_files_parallel  # noqa: PLC2701
+from astro_tools.testing.benchmark import measure
+from astro_tools.testing.blob import LocalContainerClient, NetworkProfile
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from astro_tools.testing.benchmark import BenchmarkResult
+    from astro_tools.testing.corpus import Corpus
+
+_PROFILES = {
+    "local": NetworkProfile(),
+    "wan": NetworkProfile(latency=0.02, bandwidth_mbps=200.0, max_requests_per_second=500.0),
+}
+
+
+@pytest.mark.parametrize("profile", list(_PROFILES))
+def test_upload_small_files(
+    profile: str,
+    corpus: Corpus,
+    record_benchmark: Callable[[BenchmarkResult], None],
+) -> None:
+    container_client = LocalContainerClient(profile=_PROFILES[profile])
+    files = corpus.small_files[:2000]
+
+    result = measure(
+        f"blob.upload.small_files.{profile}",
+        lambda: _upload_files_parallel(
+            base_path=corpus.small_files_dir,
+            files_to_upload=files,
+            container_client=container_client,  # type: ignore[arg-type]
+            prefix="benchmark",
+            max_workers=16,
+        ),
+        files=len(files),
+        size=sum(path.stat().st_size for path in files),
+    )
+
+    assert container_client.bytes_uploaded == result.size
+    record_benchmark(result)
+
+
+def test_upload_archives(corpus: Corpus, record_benchmark: Callable[[BenchmarkResult], None]) -> None:
+    container_client = LocalContainerClient(profile=_PROFILES["wan"])
+
+    result = measure(
+        "blob.upload.archives.wan",
+        lambda: _upload_files_parallel(
+            base_path=corpus.archives_dir,
+            files_to_upload=corpus.all_archives,
+            container_client=container_client,  # type: ignore[arg-type]
+            prefix="benchmark",
+            max_workers=8,
+        ),
+        files=len(corpus.all_archives),
+        size=corpus.total_archive_bytes,
+    )
+
+    record_benchmark(result)
+
+
+def test_list_existing_blobs(corpus: Corpus, record_benchmark: Callable[[BenchmarkResult], None]) -> None:
+    container_client = LocalContainerClient(profile=_PROFILES["wan"])
+    for path in corpus.small_files:
+        container_client._store(f"benchmark/{path.name}", b"", {}, overwrite=True)  # noqa: SLF001
+
+    result = measure(
+        "blob.list_existing",
+        lambda: _list_existing_blobs(container_client, "benchmark"),  # type: ignore[arg-type]
+        files=len(corpus.small_files),
+        size=0,
+    )
+
+    record_benchmark(result)
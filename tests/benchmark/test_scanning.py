@@ -0,0 +1,33 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+
+from __future__ import annotations
+
+import typing
+
+from astro_tools.testing.benchmark import measure
+from astro_tools.utils.scanning import incremental_scan
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+    from astro_tools.testing.benchmark import BenchmarkResult
+    from astro_tools.testing.corpus import Corpus
+
+
+def test_scan_small_file_tree(
+    corpus: Corpus,
+    tmp_path: Path,
+    record_benchmark: Callable[[BenchmarkResult], None],
+) -> None:
+    manifest_path = tmp_path / "manifest.json.gz"
+
+    for name in ("scan.cold", "scan.warm"):
+        result = measure(
+            name,
+            lambda: incremental_scan(corpus.small_files_dir, manifest_path),
+            files=len(corpus.small_files),
+            size=0,
+        )
+        record_benchmark(result)
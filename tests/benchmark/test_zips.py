@@ -0,0 +1,62 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+
+from __future__ import annotations
+
+import shutil
+import typing
+
+import pytest
+from click.testing import CliRunner
+
+from astro_tools.cli.zips.check_zips import check_zips
+from astro_tools.cli.zips.rename_zips import rename_zips
+from astro_tools.testing.benchmark import measure
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+    from astro_tools.testing.benchmark import BenchmarkResult
+    from astro_tools.testing.corpus import Corpus
+
+
+@pytest.mark.parametrize("mode", ["fast", "full"])
+def test_check_zips(
+    mode: str,
+    corpus: Corpus,
+    tmp_path: Path,
+    record_benchmark: Callable[[BenchmarkResult], None],
+) -> None:
+    args = [
+        f"--directory={corpus.archives_dir}",
+        f"--log_file={tmp_path / 'check.log'}",
+        "--workers=4",
+        f"--{mode}",
+    ]
+
+    result = measure(
+        f"zip.check.{mode}",
+        lambda: CliRunner().invoke(check_zips, args, catch_exceptions=False),
+        files=len(corpus.all_archives),
+        size=corpus.total_archive_bytes,
+    )
+
+    record_benchmark(result)
+
+
+def test_rename_zips(corpus: Corpus, tmp_path: Path, record_benchmark: Callable[[BenchmarkResult], None]) -> None:
+    data_dir = tmp_path / "zips"
+    data_dir.mkdir()
+    for path in corpus.archives:
+        shutil.copy(path, data_dir / path.name)
+
+    result = measure(
+        "zip.rename",
+        lambda: CliRunner().invoke(rename_zips, [f"--data_dir={data_dir}"], catch_exceptions=False),
+        files=len(corpus.archives),
+        size=sum(path.stat().st_size for path in corpus.archives),
+    )
+
+    assert len(list(data_dir.glob("*.zip"))) == len(corpus.archives)
+    record_benchmark(result)
@@ -10,16 +10,38 @@ import pytest
 
 if typing.TYPE_CHECKING:
     from _pytest.config import Config
+    from _pytest.config.argparsing import Parser
     from _pytest.python import Function
 
-MARKERS = ["unit"]
+MARKERS = ["unit", "benchmark"]
 
 
-def pytest_collection_modifyitems(config: Config, items: list[Function]) -> None:  # noqa: ARG001
+def pytest_addoption(parser: Parser) -> None:
+    group = parser.getgroup("benchmark")
+    group.addoption("--run-benchmarks", action="store_true", default=False, help="Run benchmarks in tests/benchmark")
+    group.addoption(
+        "--benchmark-baseline",
+        type=pathlib.Path,
+        default=pathlib.Path(__file__).parent / "benchmark" / "baseline.json",
+        help="Baseline results - benchmarks fail if they regress past the tolerance",
+    )
+    group.addoption(
+        "--benchmark-tolerance",
+        type=float,
+        default=0.5,
+        help="Allowed relative throughput drop or peak memory growth",
+    )
+    group.addoption("--benchmark-save", type=pathlib.Path, help="Save benchmark results to this JSON file")
+
+
+def pytest_collection_modifyitems(config: Config, items: list[Function]) -> None:
     rootdir = pathlib.Path(__file__).parent.parent
+    skip_benchmark = pytest.mark.skip(reason="benchmarks run only with --run-benchmarks")
     for item in items:
         rel_path = pathlib.Path(item.fspath).relative_to(rootdir)
         mark_name = rel_path.as_posix().split("/")[1]
         if mark_name in MARKERS:
             mark = getattr(pytest.mark, mark_name)
             item.add_marker(mark)
+        if mark_name == "benchmark" and not config.getoption("--run-benchmarks"):
+            item.add_marker(skip_benchmark)
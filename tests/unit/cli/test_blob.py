@@ -0,0 +1,118 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+
+from __future__ import annotations
+
+import gzip
+import json
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from astro_tools.cli.blob.blob_download import download_file, verify_file
+from astro_tools.cli.blob.blob_extract import member_filter
+from astro_tools.cli.blob.blob_upload import (
+    UploadCompression,
+    _upload_files_parallel,  # noqa: PLC2701
+    upload_compressed_file,
+)
+from astro_tools.testing.blob import LocalContainerClient
+from astro_tools.utils.compression import CODEC_METADATA_KEY, CRC_METADATA_KEY, SIZE_METADATA_KEY
+
+
+@pytest.fixture
+def data() -> bytes:
+    rng = np.random.default_rng(42)
+    return rng.integers(0, 16, size=50_000, dtype=np.uint8).tobytes()
+
+
+def test_compressed_upload_round_trip(tmp_path: Path, data: bytes) -> None:
+    path = tmp_path / "frame.fits"
+    path.write_bytes(data)
+    container_client = LocalContainerClient()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        uploaded = upload_compressed_file(
+            container_client,  # type: ignore[arg-type]
+            path,
+            "raw/frame.fits",
+            executor,
+            level=1,
+            chunk_size=16_384,
+        )
+
+    blob_client = container_client.get_blob_client("raw/frame.fits")
+    properties = blob_client.get_blob_properties()
+    assert properties.size == uploaded < len(data)
+    assert properties.metadata[CODEC_METADATA_KEY] == "gzip"
+    assert properties.metadata[SIZE_METADATA_KEY] == str(len(data))
+    assert gzip.decompress(blob_client.download_blob().readall()) == data
+
+    output = tmp_path / "out" / "frame.fits"
+    assert download_file(container_client, "raw/frame.fits", output) == len(data)  # type: ignore[arg-type]
+    assert output.read_bytes() == data
+    assert verify_file(container_client, "raw/frame.fits", path) == len(data)  # type: ignore[arg-type]
+
+    path.write_bytes(data[:-1] + b"\xff")
+    with pytest.raises(ValueError, match="differs"):
+        verify_file(container_client, "raw/frame.fits", path)  # type: ignore[arg-type]
+
+
+def test_download_detects_corrupted_blob(tmp_path: Path) -> None:
+    container_client = LocalContainerClient()
+    container_client.get_blob_client("raw/a.fits").upload_blob(
+        gzip.compress(b"abc"), metadata={CODEC_METADATA_KEY: "gzip", SIZE_METADATA_KEY: "4"}
+    )
+    output = tmp_path / "a.fits"
+
+    with pytest.raises(ValueError, match="size mismatch"):
+        download_file(container_client, "raw/a.fits", output)  # type: ignore[arg-type]
+    assert not output.exists()
+    assert not list(tmp_path.iterdir())
+
+
+def test_upload_compresses_matching_files_only(tmp_path: Path, data: bytes) -> None:
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    (source_dir / "light.FITS").write_bytes(data)
+    (source_dir / "notes.txt").write_bytes(data)
+    container_client = LocalContainerClient()
+
+    _upload_files_parallel(
+        base_path=source_dir,
+        files_to_upload=sorted(source_dir.iterdir()),
+        container_client=container_client,  # type: ignore[arg-type]
+        prefix="raw",
+        compression=UploadCompression(codec="gzip", level=1, workers=1),
+        progress_file=tmp_path / "progress.json",
+    )
+
+    metadata = {blob.name: blob.metadata for blob in container_client.list_blobs()}
+    progress = json.loads((tmp_path / "progress.json").read_text())
+    assert progress["bytes_done"] == progress["bytes_total"] == 2 * len(data)
+    assert progress["files_done"] == progress["files_total"] == len(metadata)
+    assert metadata == {
+        "raw/light.FITS": {
+            CODEC_METADATA_KEY: "gzip",
+            SIZE_METADATA_KEY: str(len(data)),
+            CRC_METADATA_KEY: f"{zlib.crc32(data):08x}",
+        },
+        "raw/notes.txt": {},
+    }
+    for name in metadata:
+        output = tmp_path / "out" / Path(name).name
+        download_file(container_client, name, output)  # type: ignore[arg-type]
+        assert output.read_bytes() == data
+
+
+def test_member_filter() -> None:
+    select = member_filter(patterns=["*_0001.fits"], channels=["h"])
+
+    assert select(zipfile.ZipInfo("M31/Ha/M31_ha_300s_0001.fits"))
+    assert not select(zipfile.ZipInfo("M31/Ha/M31_ha_300s_0002.fits"))
+    assert not select(zipfile.ZipInfo("M31/OIII/M31_oiii_300s_0001.fits"))
+    assert member_filter()(zipfile.ZipInfo("notes.txt"))
@@ -0,0 +1,67 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+
+from __future__ import annotations
+
+import zipfile
+from typing import TYPE_CHECKING
+
+from astro_tools.cli.zips import check_zips
+from astro_tools.cli.zips.check_zips import check_zip_fast, check_zip_full
+from astro_tools.utils.progress import ByteProgress
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    import pytest
+
+
+def test_full_check_reports_read_bytes(tmp_path: Path) -> None:
+    zip_path = tmp_path / "frames.zip"
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_STORED) as zf:
+        zf.writestr("a.fits", b"a" * 10_000)
+        zf.writestr("b.fits", b"b" * 10_000)
+
+    with ByteProgress(zip_path.stat().st_size, files=1, disable=True) as progress:
+        _, error = check_zip_full(zip_path, progress)
+
+    assert error is None
+    assert progress.bytes_done == zip_path.stat().st_size
+    assert progress.files_done == 1
+
+
+def test_full_check_finds_corrupted_member(tmp_path: Path) -> None:
+    zip_path = tmp_path / "frames.zip"
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_STORED) as zf:
+        zf.writestr("a.fits", b"a" * 10_000)
+        zf.writestr("b.fits", b"b" * 10_000)
+    data = bytearray(zip_path.read_bytes())
+    offset = data.index(b"b" * 100)
+    data[offset] = ord("x")
+    zip_path.write_bytes(bytes(data))
+
+    _, error = check_zip_full(zip_path)
+
+    assert error is not None
+    assert "'b.fits'" in error
+
+
+def test_fast_check_reports_archive_once_checked(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    zip_path = tmp_path / "frames.zip"
+    with zipfile.ZipFile(zip_path, "w") as zf:
+        zf.writestr("a.fits", b"a" * 10_000)
+    done_before_check = []
+    check = check_zips._check_zip_fast  # noqa: SLF001
+
+    def checked(path: Path) -> tuple[Path, str | None]:
+        done_before_check.append(progress.files_done)
+        return check(path)
+
+    monkeypatch.setattr(check_zips, "_check_zip_fast", checked)
+    with ByteProgress(zip_path.stat().st_size, files=1, disable=True) as progress:
+        _, error = check_zip_fast(zip_path, progress)
+
+    assert error is None
+    assert done_before_check == [0]
+    assert progress.files_done == 1
+    assert progress.bytes_done == zip_path.stat().st_size
@@ -0,0 +1,86 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+from click.testing import CliRunner
+
+from astro_tools.cli.dirs.create_dirs import create_dirs, create_tree, expand_template, parse_values
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_expand_template_deduplicates_and_sorts() -> None:
+    rows = [{"target": "M42"}, {"target": "M31"}, {"target": "M31"}]
+
+    paths = expand_template("{target}/{channel}", rows, parse_values(["channel=R, L"]))
+
+    assert paths == ["M31/L", "M31/R", "M42/L", "M42/R"]
+
+
+@pytest.mark.parametrize("template", ["{missing}", "../{target}", "/{target}", "{target}/.."])
+def test_expand_template_rejects_invalid_paths(template: str) -> None:
+    with pytest.raises((KeyError, ValueError)):
+        expand_template(template, [{"target": "M31"}])
+
+
+def test_create_tree_skips_existing_dirs(tmp_path: Path) -> None:
+    (tmp_path / "M31" / "T11").mkdir(parents=True)
+    (tmp_path / "M31" / "T11" / "notes.txt").touch()
+
+    created = create_tree(tmp_path, ["M31/T11/L", "M31/T11/R", "M31/T17/L", "M42/T11/L"], workers=4)
+
+    assert created == 7  # noqa: PLR2004
+    assert sorted(p.relative_to(tmp_path).as_posix() for p in tmp_path.rglob("*") if p.is_dir()) == [
+        "M31",
+        "M31/T11",
+        "M31/T11/L",
+        "M31/T11/R",
+        "M31/T17",
+        "M31/T17/L",
+        "M42",
+        "M42/T11",
+        "M42/T11/L",
+    ]
+    assert create_tree(tmp_path, ["M31/T11/L"]) == 0
+
+
+def test_create_dirs_from_catalog(tmp_path: Path) -> None:
+    catalog = tmp_path / "catalog.csv"
+    catalog.write_text("target,telescope\nM31,T11\nM42,T17\nM31,T11\n")
+    target_dir = tmp_path / "out"
+    target_dir.mkdir()
+
+    result = CliRunner().invoke(
+        create_dirs,
+        [
+            f"--catalog_fp={catalog}",
+            f"--target_dir={target_dir}",
+            "--template={target}/{telescope}/{channel}",
+            "--values=channel=Ha,OIII",
+        ],
+    )
+
+    assert result.exit_code == 0, result.output
+    assert sorted(p.relative_to(target_dir).as_posix() for p in target_dir.glob("*/*/*")) == [
+        "M31/T11/Ha",
+        "M31/T11/OIII",
+        "M42/T17/Ha",
+        "M42/T17/OIII",
+    ]
+
+
+def test_create_dirs_from_names_file(tmp_path: Path) -> None:
+    names = tmp_path / "names.txt"
+    names.write_text("M31\n\nM42\nM31\n")
+    target_dir = tmp_path / "out"
+    target_dir.mkdir()
+
+    result = CliRunner().invoke(create_dirs, [f"--names_fp={names}", f"--target_dir={target_dir}"])
+
+    assert result.exit_code == 0, result.output
+    assert sorted(p.name for p in target_dir.iterdir()) == ["M31", "M42"]
@@ -0,0 +1,96 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+
+from __future__ import annotations
+
+import re
+import subprocess  # noqa: S404
+import sys
+
+import click
+import pytest
+from click.testing import CliRunner
+
+from astro_tools import cli
+from astro_tools.cli.lazy import LazyGroup
+
+_HEAVY_MODULES = {"azure", "mlflow", "numpy", "pandas", "psutil", "pyzipper", "tqdm"}
+_IMPORT_BUDGET_US = 150_000
+"""Cumulative `import astro_tools` time budget in microseconds - the CLI is called from cron and shell loops."""
+
+
+def _run_python(code: str, *args: str) -> subprocess.CompletedProcess[str]:
+    return subprocess.run(  # noqa: S603
+        [sys.executable, *args, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def _imported_heavy_modules(code: str) -> set[str]:
+    result = _run_python(f"import sys\n{code}\nprint('\\n'.join(sys.modules))")
+    return {name.split(".")[0] for name in result.stdout.splitlines()} & _HEAVY_MODULES
+
+
+def test_package_import_does_not_import_heavy_dependencies() -> None:
+    assert _imported_heavy_modules("import astro_tools") == set()
+
+
+def test_command_help_only_imports_command_module() -> None:
+    code = "from astro_tools import cli\ncli(['dir', 'create', '--help'], standalone_mode=False)"
+    assert _imported_heavy_modules(code) <= {"tqdm"}
+
+
+@pytest.mark.parametrize("args", [[], ["blob"], ["dir"], ["frames"], ["zip"]])
+def test_group_help_does_not_import_heavy_dependencies(args: list[str]) -> None:
+    code = f"from astro_tools import cli\ncli({[*args, '--help']!r}, standalone_mode=False)"
+    assert _imported_heavy_modules(code) == set()
+
+
+def test_package_import_time_budget() -> None:
+    result = _run_python("import astro_tools", "-X", "importtime")
+    cumulative_us = next(
+        int(match.group(1))
+        for line in result.stderr.splitlines()
+        if (match := re.match(r"import time:\s+\d+ \|\s+(\d+) \| astro_tools$", line))
+    )
+    assert cumulative_us < _IMPORT_BUDGET_US
+
+
+@pytest.mark.parametrize("group_name", ["", "blob", "dir", "frames", "zip"])
+def test_all_lazy_subcommands_resolve(group_name: str) -> None:
+    group = cli.commands[group_name] if group_name else cli
+    assert isinstance(group, LazyGroup)
+    ctx = click.Context(group)
+    for name in group.list_commands(ctx):
+        command = group.get_command(ctx, name)
+        assert isinstance(command, click.Command)
+        if name in group.lazy_subcommands:
+            # Static help is a copy of the command docstring summary and must stay in sync with it
+            static = click.Command(name, help=group.lazy_help[name])
+            assert static.get_short_help_str(limit=1000) == command.get_short_help_str(limit=1000)
+
+
+def test_lazy_group_invokes_command() -> None:
+    @click.group(cls=LazyGroup, lazy_subcommands={"echo": "tests.unit.cli.test_lazy:_echo"})
+    def group() -> None:
+        pass
+
+    result = CliRunner().invoke(group, ["echo", "--text", "hello"])
+
+    assert result.exit_code == 0
+    assert result.output == "hello\n"
+
+
+def test_lazy_group_rejects_non_command() -> None:
+    group = LazyGroup(lazy_subcommands={"bad": "tests.unit.cli.test_lazy:_HEAVY_MODULES"})
+
+    with pytest.raises(TypeError, match="did not return a click command"):
+        group.get_command(click.Context(group), "bad")
+
+
+@click.command("echo")
+@click.option("--text")
+def _echo(text: str) -> None:
+    click.echo(text)
@@ -0,0 +1,84 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+
+from __future__ import annotations
+
+import zipfile
+from typing import TYPE_CHECKING
+
+from click.testing import CliRunner
+
+from astro_tools.cli.zips.rename_zips import (
+    channel_combination,
+    new_archive_name,
+    next_free_path,
+    rename_zips,
+    renamed_path,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_channel_combination_follows_lookup_order() -> None:
+    assert channel_combination(["m31_OIII_001.fits", "m31_Ha_001.fits", "readme.txt"]) == "HO"
+
+
+def test_new_archive_name(tmp_path: Path) -> None:
+    zip_fp = tmp_path / "M31_T11_20_123.zip"
+    with zipfile.ZipFile(zip_fp, "w") as zf:
+        zf.writestr("M31_Red_001.fits", b"")
+        zf.writestr("M31_Blue_001.fits", b"")
+
+    assert new_archive_name(zip_fp) == "M31_T11_RB_20"
+
+
+def test_new_archive_name_skips_renamed_archives(tmp_path: Path) -> None:
+    for name in ("M31_T11_RB_20.zip", "M31_T11_RB_20-2.zip", "M31_T11__20.zip"):
+        assert new_archive_name(_archive(tmp_path / name)) is None
+
+
+def test_next_free_path(tmp_path: Path) -> None:
+    assert next_free_path(tmp_path, "a") == tmp_path / "a.zip"
+    (tmp_path / "a.zip").touch()
+    (tmp_path / "a-2.zip").touch()
+    assert next_free_path(tmp_path, "a") == tmp_path / "a-3.zip"
+
+
+def _archive(path: Path) -> Path:
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("M31_Red_001.fits", b"")
+    return path
+
+
+def test_renamed_path(tmp_path: Path) -> None:
+    assert renamed_path(_archive(tmp_path / "M31_T11_20_123.zip")) == tmp_path / "M31_T11_R_20.zip"
+    (tmp_path / "M31_T11_R_20.zip").touch()
+    assert renamed_path(tmp_path / "M31_T11_20_123.zip") == tmp_path / "M31_T11_R_20-2.zip"
+    assert renamed_path(_archive(tmp_path / "broken.zip")) is None
+
+
+def test_rename_zips_numbers_duplicates_only_if_taken(tmp_path: Path) -> None:
+    for idx in range(3):
+        _archive(tmp_path / f"M31_T11_20_{idx}.zip")
+
+    result = CliRunner().invoke(rename_zips, ["--data_dir", str(tmp_path)])
+
+    assert result.exit_code == 0
+    assert sorted(fp.name for fp in tmp_path.iterdir()) == [
+        "M31_T11_R_20-2.zip",
+        "M31_T11_R_20-3.zip",
+        "M31_T11_R_20.zip",
+    ]
+
+
+def test_rename_zips_twice_changes_nothing(tmp_path: Path) -> None:
+    for idx in range(2):
+        _archive(tmp_path / f"M31_T11_20_{idx}.zip")
+    CliRunner().invoke(rename_zips, ["--data_dir", str(tmp_path)])
+    names = sorted(fp.name for fp in tmp_path.iterdir())
+
+    result = CliRunner().invoke(rename_zips, ["--data_dir", str(tmp_path)])
+
+    assert result.exit_code == 0
+    assert sorted(fp.name for fp in tmp_path.iterdir()) == names == ["M31_T11_R_20-2.zip", "M31_T11_R_20.zip"]
@@ -0,0 +1,143 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+
+from __future__ import annotations
+
+import csv
+import zipfile
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pytest
+import pyzipper
+from click.testing import CliRunner
+
+from astro_tools.cli.zips.repack_zips import (
+    COPY_CHUNK_SIZE,
+    repack_zip,
+    repack_zips,
+    repack_zips_parallel,
+    write_report,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def _members() -> dict[str, bytes]:
+    rng = np.random.default_rng(42)
+    return {f"M31/Ha/M31_ha_300s_{i:04d}.fits": rng.integers(0, 8, 50_000, dtype=np.uint8).tobytes() for i in range(3)}
+
+
+@pytest.fixture
+def stored_zip(tmp_path: Path) -> Path:
+    path = tmp_path / "stored.zip"
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED) as zf:
+        zf.mkdir("M31")
+        for name, data in _members().items():
+            zf.writestr(name, data)
+    return path
+
+
+def test_repack_zip_recompresses_members(stored_zip: Path) -> None:
+    original_size = stored_zip.stat().st_size
+
+    result = repack_zip(stored_zip, codec="deflated", level=9)
+
+    assert result.error is None
+    assert result.replaced
+    assert result.original_size == original_size
+    assert result.new_size == stored_zip.stat().st_size < original_size
+    assert result.saved > 0
+    assert result.members == 4  # noqa: PLR2004
+    with zipfile.ZipFile(stored_zip) as zf:
+        assert zf.testzip() is None
+        assert {info.compress_type for info in zf.infolist() if not info.is_dir()} == {zipfile.ZIP_DEFLATED}
+        assert {name: zf.read(name) for name in zf.namelist() if not name.endswith("/")} == _members()
+    assert [p.name for p in stored_zip.parent.iterdir()] == ["stored.zip"]
+
+
+def test_repack_zip_applies_compression_level(tmp_path: Path) -> None:
+    sizes = {}
+    for level in (1, 9):
+        path = tmp_path / f"level-{level}.zip"
+        with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED) as zf:
+            zf.writestr("frame.fits", bytes(range(256)) * 2000 + b"".join(_members().values()))
+        sizes[level] = repack_zip(path, codec="deflated", level=level).new_size
+
+    assert sizes[9] < sizes[1]
+
+
+def test_repack_zip_streams_large_members_in_chunks(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    path = tmp_path / "large.zip"
+    data = np.random.default_rng(42).integers(0, 8, 3 * COPY_CHUNK_SIZE + 100, dtype=np.uint8).tobytes()
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED) as zf:
+        zf.writestr("frame.fits", data)
+    reads = []
+    read = zipfile.ZipExtFile.read
+
+    def spy(self: zipfile.ZipExtFile, n: int = -1) -> bytes:
+        reads.append(n)
+        return read(self, n)
+
+    monkeypatch.setattr(zipfile.ZipExtFile, "read", spy)
+    result = repack_zip(path, codec="deflated", level=1)
+    monkeypatch.undo()
+
+    assert result.error is None
+    assert reads == [COPY_CHUNK_SIZE] * 5
+    with zipfile.ZipFile(path) as zf:
+        assert zf.read("frame.fits") == data
+
+
+def test_repack_rejects_bzip2_level_0(tmp_path: Path) -> None:
+    result = CliRunner().invoke(repack_zips, ["--directory", str(tmp_path), "--codec", "bzip2", "--level", "0"])
+
+    assert result.exit_code == 2  # noqa: PLR2004
+    assert "Level 0 is not supported" in result.output
+
+
+def test_repack_zip_keeps_archive_that_would_grow(stored_zip: Path) -> None:
+    repack_zip(stored_zip, codec="deflated", level=9)
+    content = stored_zip.read_bytes()
+
+    result = repack_zip(stored_zip, codec="stored")
+
+    assert not result.replaced
+    assert result.saved == 0
+    assert stored_zip.read_bytes() == content
+
+
+def test_repack_zip_decrypts_aes_archives(tmp_path: Path) -> None:
+    path = tmp_path / "secret.zip"
+    with pyzipper.AESZipFile(path, "w", compression=pyzipper.ZIP_STORED, encryption=pyzipper.WZ_AES) as zf:
+        zf.setpassword(b"secret")
+        for name, data in _members().items():
+            zf.writestr(name, data)
+
+    assert repack_zip(path).error is not None
+
+    result = repack_zip(path, codec="lzma", password="secret")  # noqa: S106
+
+    assert result.error is None
+    with zipfile.ZipFile(path) as zf:
+        assert {name: zf.read(name) for name in zf.namelist()} == _members()
+
+
+def test_repack_zip_reports_corrupted_member(tmp_path: Path, stored_zip: Path) -> None:
+    with zipfile.ZipFile(stored_zip) as zf:
+        info = zf.infolist()[1]
+    data = bytearray(stored_zip.read_bytes())
+    data[info.header_offset + 30 + len(info.filename) + 100] ^= 0xFF
+    stored_zip.write_bytes(data)
+
+    results = repack_zips_parallel([stored_zip], workers=1)
+
+    assert results[0].error is not None
+    assert "CRC" in results[0].error
+    assert stored_zip.read_bytes() == data
+    write_report(tmp_path / "report.csv", results)
+    with (tmp_path / "report.csv").open() as fh:
+        rows = list(csv.DictReader(fh))
+    assert rows[0]["saved"] == "0"
+    assert rows[0]["replaced"] == "False"
@@ -0,0 +1,157 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+
+from __future__ import annotations
+
+import json
+import zipfile
+from typing import TYPE_CHECKING
+
+import click
+
+from astro_tools import cli
+from astro_tools.cli.watch import watch_folder
+from astro_tools.cli.watch.watch_folder import ArchiveWatcher
+from astro_tools.testing.blob import LocalContainerClient
+from astro_tools.testing.corpus import CorpusSpec, generate_corpus
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    import pytest
+    from azure.storage.blob import ContainerClient
+
+_SPEC = CorpusSpec(archives=3, frames_per_archive=2, frame_shape=(16, 16), corrupted=0, truncated=1, small_files=0)
+
+
+def _watcher(
+    directory: Path, container_client: LocalContainerClient, state_file: Path, **kwargs: float
+) -> ArchiveWatcher:
+    return ArchiveWatcher(
+        directory=directory,
+        container_client=container_client,  # type: ignore[arg-type]
+        prefix="raw",
+        state_file=state_file,
+        **kwargs,  # type: ignore[arg-type]
+    )
+
+
+def test_watch_is_registered_lazily() -> None:
+    ctx = click.Context(cli)
+    assert "watch" in cli.list_commands(ctx)
+    assert isinstance(cli.get_command(ctx, "watch"), click.Command)
+
+
+def test_watcher_checks_renames_and_uploads_archives(tmp_path: Path) -> None:
+    corpus = generate_corpus(tmp_path / "drop", _SPEC)
+    container_client = LocalContainerClient()
+    state_file = tmp_path / "state.json"
+
+    _watcher(corpus.archives_dir, container_client, state_file, settle=0.0).run(interval=0.01, once=True)
+
+    state = json.loads(state_file.read_text())
+    assert {record["status"] for record in state.values()} == {"uploaded", "corrupted"}
+    assert state[corpus.truncated[0].name]["blob"] is None
+    blobs = sorted(blob.name for blob in container_client.list_blobs())
+    assert len(blobs) == len(corpus.archives)
+    for path in corpus.archives:
+        record = state[path.name]
+        assert record["renamed"]
+        assert record["path"] != path.name
+        assert (corpus.archives_dir / record["path"]).exists()
+        assert record["blob"] == f"raw/{record['path']}"
+    assert container_client.bytes_uploaded == sum(record["size"] for record in state.values() if record["blob"])
+
+
+def test_watcher_skips_processed_archives_after_restart(tmp_path: Path) -> None:
+    corpus = generate_corpus(tmp_path / "drop", _SPEC)
+    container_client = LocalContainerClient()
+    state_file = tmp_path / "state.json"
+    _watcher(corpus.archives_dir, container_client, state_file, settle=0.0).run(interval=0.01, once=True)
+    requests = container_client.requests
+
+    _watcher(corpus.archives_dir, container_client, state_file, settle=0.0).run(interval=0.01, once=True)
+
+    assert container_client.requests == requests
+
+
+def test_watcher_waits_for_archives_to_settle(tmp_path: Path) -> None:
+    corpus = generate_corpus(tmp_path / "drop", _SPEC)
+    watcher = _watcher(corpus.archives_dir, LocalContainerClient(), tmp_path / "state.json", settle=3600.0)
+    try:
+        assert watcher.poll() == []
+        assert watcher.poll() == []
+        assert not watcher.idle
+    finally:
+        watcher.close()
+
+
+def _process(watcher: ArchiveWatcher) -> None:
+    # The first poll only discovers the archives
+    watcher.poll()
+    for rel_path in watcher.poll():
+        watcher.submit(rel_path)
+    watcher.wait()
+
+
+def test_watcher_names_duplicates_like_zip_rename(tmp_path: Path) -> None:
+    for idx in range(3):
+        with zipfile.ZipFile(tmp_path / f"M31_T11_20_{idx}.zip", "w") as zf:
+            zf.writestr("M31_Red_001.fits", b"")
+
+    _watcher(tmp_path, LocalContainerClient(), tmp_path.parent / "state.json", settle=0.0).run(interval=0.01, once=True)
+
+    assert sorted(fp.name for fp in tmp_path.iterdir()) == [
+        "M31_T11_R_20-2.zip",
+        "M31_T11_R_20-3.zip",
+        "M31_T11_R_20.zip",
+    ]
+
+
+def test_watcher_retries_failed_archives(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    corpus = generate_corpus(tmp_path / "drop", _SPEC)
+    upload_file = watch_folder.upload_file
+    failures = []
+
+    def flaky_upload(container_client: ContainerClient, fp: Path, blob_name: str) -> int:
+        if fp.name not in failures:
+            failures.append(fp.name)
+            msg = "Connection reset"
+            raise ConnectionError(msg)
+        return upload_file(container_client, fp, blob_name)
+
+    monkeypatch.setattr(watch_folder, "upload_file", flaky_upload)
+    watcher = _watcher(
+        corpus.archives_dir, LocalContainerClient(), tmp_path / "state.json", settle=0.0, retry_delay=0.0
+    )
+    try:
+        _process(watcher)
+        assert {record.status for record in watcher.records.values()} == {"failed", "corrupted"}
+
+        watcher.retry_failed()
+        watcher.wait()
+    finally:
+        watcher.close()
+
+    assert {record.status for record in watcher.records.values()} == {"uploaded", "corrupted"}
+    assert {record.attempts for record in watcher.records.values() if record.status == "uploaded"} == {1}
+
+
+def test_watcher_forgets_removed_archives(tmp_path: Path) -> None:
+    corpus = generate_corpus(tmp_path / "drop", _SPEC)
+    state_file = tmp_path / "state.json"
+    watcher = _watcher(corpus.archives_dir, LocalContainerClient(), state_file, settle=0.0)
+    try:
+        _process(watcher)
+        processed = dict(watcher.records)
+        for record in processed.values():
+            (corpus.archives_dir / record.path).unlink()
+
+        assert watcher.poll() == []
+    finally:
+        watcher.close()
+
+    assert processed
+    assert watcher.records == {}
+    assert not watcher._known  # noqa: SLF001
+    assert json.loads(state_file.read_text()) == {}
@@ -0,0 +1,70 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+from unittest.mock import patch
+
+import pytest
+
+from astro_tools.core import clients
+from astro_tools.core.settings import BlobStorageSettings, current_settings
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+
+_SETTINGS = BlobStorageSettings(account_name="astrotools", account_key="a2V5")
+
+
+@pytest.fixture(autouse=True)
+def _clear_clients() -> Generator[None]:
+    clients.clear_clients()
+    yield
+    clients.clear_clients()
+
+
+def _pool_maxsize(client: object) -> int:
+    session = client._config.transport.session  # type: ignore[attr-defined] # noqa: SLF001
+    return session.get_adapter("https://astrotools.blob.core.windows.net")._pool_maxsize  # type: ignore[no-any-return] # noqa: SLF001
+
+
+def test_client_is_shared_and_pool_is_sized_to_concurrency() -> None:
+    client = clients.get_blob_service_client(concurrency=4, settings=_SETTINGS)
+
+    assert clients.get_blob_service_client(concurrency=8, settings=_SETTINGS) is client
+    assert _pool_maxsize(client) == clients.DEFAULT_POOL_SIZE
+    assert client.url.startswith(_SETTINGS.account_url)
+    assert client.credential.account_name == _SETTINGS.account_name
+
+    bigger = clients.get_blob_service_client(concurrency=64, settings=_SETTINGS)
+    assert bigger is not client
+    assert _pool_maxsize(bigger) == 64  # noqa: PLR2004
+    assert clients.get_container_client("datasets", concurrency=32, settings=_SETTINGS).container_name == "datasets"
+
+
+def test_client_is_not_shared_across_processes() -> None:
+    client = clients.get_blob_service_client(settings=_SETTINGS)
+    with patch("astro_tools.core.clients.os.getpid", return_value=-1):
+        assert clients.get_blob_service_client(settings=_SETTINGS) is not client
+
+
+def test_default_azure_credential_is_used_without_account_key() -> None:
+    settings = BlobStorageSettings(account_name="astrotools")
+    with patch("azure.identity.DefaultAzureCredential") as credential:
+        clients.get_blob_service_client(settings=settings)
+    credential.assert_called_once_with()
+    with pytest.raises(ValueError, match="BLOB__ACCOUNT_KEY"):
+        _ = settings.connection_string
+
+
+def test_settings_are_cached(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("BLOB__ACCOUNT_NAME", "first")
+    current_settings.cache_clear()
+    try:
+        settings = current_settings()
+        monkeypatch.setenv("BLOB__ACCOUNT_NAME", "second")
+        assert current_settings() is settings
+        assert settings.blob.account_name == "first"
+    finally:
+        current_settings.cache_clear()
@@ -0,0 +1,76 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+import pytest
+
+from astro_tools.imaging import fits
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+@pytest.mark.parametrize("dtype", [np.uint8, np.uint16, np.int16, np.int32, np.float32, np.float64])
+def test_write_and_read_image_roundtrip(tmp_path: Path, dtype: Any) -> None:
+    data = (np.arange(35).reshape(5, 7) * 3).astype(dtype)
+    fp = tmp_path / "frame.fits"
+    fits.write_image(fp, data)
+
+    assert fp.stat().st_size % fits.BLOCK_SIZE == 0
+    np.testing.assert_array_equal(fits.read_image(fp), data.astype(np.float32))
+
+
+def test_header_cards_are_preserved(tmp_path: Path) -> None:
+    fp = tmp_path / "frame.fits"
+    fits.write_image(fp, np.zeros((2, 3), dtype=np.float32), {"OBJECT": "M 31 'core'", "EXPTIME": 300.0, "GAIN": 100})
+
+    header = fits.read_header_from_path(fp)
+
+    assert header.shape == (2, 3)
+    assert header.cards["OBJECT"] == "M 31 'core'"
+    assert header.cards["EXPTIME"] == 300.0  # noqa: PLR2004
+    assert header.cards["GAIN"] == 100  # noqa: PLR2004
+
+
+def test_image_from_bytes(tmp_path: Path) -> None:
+    data = np.arange(12, dtype=np.uint16).reshape(3, 4) * 1000
+    fp = tmp_path / "frame.fits"
+    fits.write_image(fp, data)
+
+    header, raw = fits.image_from_bytes(fp.read_bytes())
+
+    np.testing.assert_array_equal(fits.to_physical(raw, header), data)
+
+
+def test_image_from_truncated_bytes_raises(tmp_path: Path) -> None:
+    fp = tmp_path / "frame.fits"
+    fits.write_image(fp, np.ones((100, 100), dtype=np.float32))
+
+    with pytest.raises(ValueError, match="Unexpected end of file"):
+        fits.image_from_bytes(fp.read_bytes()[: fits.BLOCK_SIZE * 2])
+
+
+def test_not_a_fits_file_raises(tmp_path: Path) -> None:
+    fp = tmp_path / "frame.fits"
+    fp.write_bytes(b"PK" + b"\0" * fits.BLOCK_SIZE)
+
+    with pytest.raises(ValueError, match="Not a FITS file"):
+        fits.read_header_from_path(fp)
+
+
+def test_create_image_preallocates_writable_memmap(tmp_path: Path) -> None:
+    fp = tmp_path / "output.fits"
+    output = fits.create_image(fp, (10, 20), {"NCOMBINE": 5})
+    output[2:4] = 1.5
+    output.flush()
+    del output
+
+    image = fits.read_image(fp)
+    assert image.shape == (10, 20)
+    assert fits.read_header_from_path(fp).cards["NCOMBINE"] == 5  # noqa: PLR2004
+    np.testing.assert_array_equal(image[2:4], 1.5)
+    np.testing.assert_array_equal(image[4:], 0.0)
@@ -0,0 +1,91 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+
+from __future__ import annotations
+
+import struct
+import zipfile
+import zlib
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from astro_tools.core import consts
+from astro_tools.imaging import fits
+from astro_tools.imaging.preview import cached_preview, decimated_frame, encode_png, stretch
+from astro_tools.imaging.sources import FrameSource, archive_frame_sources
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def _frame(tmp_path: Path, shape: tuple[int, int] = (300, 200)) -> Path:
+    rng = np.random.default_rng(consts.reproducibility.SEED)
+    fp = tmp_path / "m31_ha_001.fits"
+    fits.write_image(fp, rng.normal(1000.0, 10.0, size=shape).astype(np.uint16))
+    return fp
+
+
+def test_decimated_frame_respects_max_size(tmp_path: Path) -> None:
+    preview = decimated_frame(FrameSource(path=_frame(tmp_path)), max_size=64)
+
+    assert preview.shape == (60, 40)
+
+
+def test_stretch_maps_background_to_quarter_range() -> None:
+    rng = np.random.default_rng(consts.reproducibility.SEED)
+    data = rng.normal(1000.0, 10.0, size=(100, 100))
+    data[50, 50] = 60000.0
+
+    stretched = stretch(data)
+
+    assert stretched.dtype == np.uint8
+    assert stretched[50, 50] == 255  # noqa: PLR2004
+    assert abs(int(np.median(stretched)) - 64) <= 2  # noqa: PLR2004
+
+
+def test_stretch_of_flat_image() -> None:
+    np.testing.assert_array_equal(stretch(np.ones((4, 4))), 0)
+
+
+def test_encode_png() -> None:
+    image = np.arange(12, dtype=np.uint8).reshape(3, 4)
+
+    png = encode_png(image)
+
+    assert png.startswith(b"\x89PNG\r\n\x1a\n")
+    width, height = struct.unpack(">II", png[16:24])
+    assert (width, height) == (4, 3)
+    idat_length = struct.unpack(">I", png[33:37])[0]
+    scanlines = np.frombuffer(zlib.decompress(png[41 : 41 + idat_length]), dtype=np.uint8).reshape(3, 5)
+    np.testing.assert_array_equal(scanlines[:, 1:], image)
+
+
+def test_cached_preview_is_reused_for_renamed_archive(tmp_path: Path) -> None:
+    fp = _frame(tmp_path)
+    archive = tmp_path / "M31_T1_10_1.zip"
+    with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.write(fp, fp.name)
+    cache_dir = tmp_path / "cache"
+
+    first, file_hash, rendered = cached_preview(archive_frame_sources(archive)[0], cache_dir)
+    renamed = archive.rename(tmp_path / "M31_T1_H_10.zip")
+    second, _, rendered_again = cached_preview(archive_frame_sources(renamed)[0], cache_dir)
+
+    assert file_hash is None
+    assert rendered
+    assert not rendered_again
+    assert first == second
+
+
+def test_cached_preview_of_file_on_disk(tmp_path: Path) -> None:
+    fp = _frame(tmp_path)
+    cache_dir = tmp_path / "cache"
+
+    path, file_hash, rendered = cached_preview(FrameSource(path=fp), cache_dir, max_size=64)
+    _, _, rendered_again = cached_preview(FrameSource(path=fp), cache_dir, max_size=64, file_hash=file_hash)
+
+    assert rendered
+    assert not rendered_again
+    assert file_hash is not None
+    assert path.read_bytes().startswith(b"\x89PNG")
@@ -0,0 +1,105 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+
+from __future__ import annotations
+
+import math
+import zipfile
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pytest
+
+from astro_tools.core import consts
+from astro_tools.imaging import fits
+from astro_tools.imaging.quality import bin_blocks, bin_image, score_frame, score_image
+from astro_tools.imaging.sources import FrameSource
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+_SIZE = 256
+_BACKGROUND = 1000.0
+_NOISE = 10.0
+_STARS = 25
+
+
+def _star_field(sigma: float, n_stars: int = _STARS) -> np.ndarray:
+    rng = np.random.default_rng(consts.reproducibility.SEED)
+    image = rng.normal(_BACKGROUND, _NOISE, size=(_SIZE, _SIZE))
+    yy, xx = np.mgrid[:_SIZE, :_SIZE]
+    for y, x in rng.uniform(16, _SIZE - 16, size=(n_stars, 2)):
+        image += 5000.0 * np.exp(-((yy - y) ** 2 + (xx - x) ** 2) / (2 * sigma**2))
+    return image.astype(np.float32)
+
+
+def test_bin_image() -> None:
+    data = np.arange(25, dtype=np.float32).reshape(5, 5)
+
+    binned = bin_image(data, 2)
+
+    np.testing.assert_array_equal(binned, [[3.0, 5.0], [13.0, 15.0]])
+
+
+def test_bin_blocks_matches_bin_image() -> None:
+    data = _star_field(sigma=2.0)[:101, :99]
+
+    binned = bin_blocks((data[start : start + 8] for start in range(0, data.shape[0], 8)), data.shape, 2)
+
+    np.testing.assert_allclose(binned, bin_image(data, 2), rtol=1e-6)
+
+
+def test_bin_blocks_rejects_unaligned_blocks() -> None:
+    data = np.zeros((12, 12), dtype=np.float32)
+
+    with pytest.raises(ValueError, match="not aligned"):
+        bin_blocks((data[start : start + 3] for start in range(0, 12, 3)), data.shape, 2)
+
+
+def test_bin_image_rejects_non_2d_data() -> None:
+    with pytest.raises(ValueError, match="Expected 2D image"):
+        bin_image(np.zeros((3, 4, 4)), 2)
+
+
+@pytest.mark.parametrize("sigma", [1.5, 3.0])
+def test_score_image(sigma: float) -> None:
+    quality = score_image(_star_field(sigma), downsample=2)
+
+    assert quality.background == pytest.approx(_BACKGROUND, abs=2.0)
+    assert quality.noise == pytest.approx(_NOISE, rel=0.2)
+    assert quality.star_count == pytest.approx(_STARS, abs=3)
+    assert quality.fwhm == pytest.approx(2.3548 * sigma, rel=0.25)
+
+
+def test_score_image_without_stars() -> None:
+    quality = score_image(_star_field(sigma=2.0, n_stars=0), downsample=1)
+
+    assert quality.star_count == 0
+    assert math.isnan(quality.fwhm)
+
+
+def test_score_frame_from_archive_member(tmp_path: Path) -> None:
+    fp = tmp_path / "frame.fits"
+    fits.write_image(fp, _star_field(sigma=2.0).astype(np.uint16))
+    archive = tmp_path / "m31.zip"
+    with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.write(fp, "m31_ha_001.fits")
+
+    row = score_frame(FrameSource(path=archive, member="m31_ha_001.fits"))
+
+    assert row["error"] is None
+    assert row["channel"] == "H"
+    assert (row["height"], row["width"]) == (_SIZE, _SIZE)
+    assert row["star_count"] > 0
+    # BSCALE and BZERO of unsigned data are applied to the binned image
+    assert row["background"] == pytest.approx(score_image(_star_field(sigma=2.0).astype(np.uint16)).background)
+
+
+def test_score_frame_reports_errors(tmp_path: Path) -> None:
+    fp = tmp_path / "broken.fits"
+    fp.write_bytes(b"garbage")
+
+    row = score_frame(FrameSource(path=fp))
+
+    assert row["error"].startswith("ValueError")
+    assert row["background"] is None
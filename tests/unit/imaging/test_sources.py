@@ -0,0 +1,59 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+
+from __future__ import annotations
+
+import zipfile
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pytest
+
+from astro_tools.imaging import fits
+from astro_tools.imaging.sources import FrameSource, iter_frame_sources, read_frame, read_frame_blocks
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_iter_frame_sources_finds_files_and_archive_members(tmp_path: Path) -> None:
+    data = np.arange(20, dtype=np.uint16).reshape(4, 5)
+    fits.write_image(tmp_path / "loose_ha_001.fits", data)
+    (tmp_path / "notes.txt").write_text("not a frame")
+    with zipfile.ZipFile(tmp_path / "m31.zip", "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.write(tmp_path / "loose_ha_001.fits", "lights/m31_oiii_001.fit")
+        zf.writestr("readme.txt", "not a frame")
+
+    sources = list(iter_frame_sources(tmp_path))
+
+    assert [str(source) for source in sources] == [
+        (tmp_path / "loose_ha_001.fits").as_posix(),
+        f"{(tmp_path / 'm31.zip').as_posix()}::lights/m31_oiii_001.fit",
+    ]
+    assert sources[1].name == "m31_oiii_001.fit"
+    assert sources[1].crc is not None
+    for source in sources:
+        header, raw = read_frame(source)
+        np.testing.assert_array_equal(fits.to_physical(raw, header), data)
+        header, blocks = read_frame_blocks(source, rows=3)
+        np.testing.assert_array_equal(fits.to_physical(np.concatenate(list(blocks)), header), data)
+
+
+def test_read_frame_from_disk_is_memory_mapped(tmp_path: Path) -> None:
+    fp = tmp_path / "frame.fits"
+    fits.write_image(fp, np.ones((3, 3), dtype=np.float32))
+
+    _, raw = read_frame(FrameSource(path=fp))
+
+    assert isinstance(raw, np.memmap)
+
+
+def test_read_frame_blocks_rejects_truncated_member(tmp_path: Path) -> None:
+    content = fits.encode_image(np.ones((64, 64), dtype=np.float32))
+    with zipfile.ZipFile(tmp_path / "m31.zip", "w") as zf:
+        zf.writestr("frame.fits", content[: len(content) // 2])
+
+    _, blocks = read_frame_blocks(FrameSource(path=tmp_path / "m31.zip", member="frame.fits"), rows=8)
+
+    with pytest.raises(ValueError, match="Unexpected end of file"):
+        list(blocks)
@@ -0,0 +1,165 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from astro_tools.core import consts
+from astro_tools.imaging import fits
+from astro_tools.imaging.stacking import (
+    CalibrationMasters,
+    StackingConfig,
+    group_frames_by_channel,
+    plan_tile_rows,
+    sigma_clipped_mean,
+    stack_channels,
+    stack_frames,
+    winsorized_sigma_clipped_mean,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+_SHAPE = (32, 24)
+_SIGNAL = 1000.0
+
+
+@pytest.fixture
+def light_frames(tmp_path: Path) -> list[Path]:
+    rng = np.random.default_rng(consts.reproducibility.SEED)
+    frames = []
+    for i in range(8):
+        data = rng.normal(_SIGNAL + 100.0, 5.0, size=_SHAPE)
+        if i == 3:  # noqa: PLR2004
+            data[10, :] = 60000.0  # satellite trail
+        fp = tmp_path / f"m31_ha_{i:03d}.fits"
+        fits.write_image(fp, data.astype(np.uint16))
+        frames.append(fp)
+    return frames
+
+
+@pytest.mark.parametrize("func", [sigma_clipped_mean, winsorized_sigma_clipped_mean])
+def test_clipped_mean_rejects_outliers(func: object) -> None:
+    rng = np.random.default_rng(consts.reproducibility.SEED)
+    stack = rng.normal(100.0, 1.0, size=(10, 4, 4)).astype(np.float32)
+    stack[0, 0, 0] = 10_000.0
+
+    result = func(stack.copy())  # type: ignore[operator]
+
+    assert result.shape == (4, 4)
+    assert abs(result[0, 0] - 100.0) < 2.0  # noqa: PLR2004
+
+
+def test_group_frames_by_channel(tmp_path: Path) -> None:
+    paths = [tmp_path / "a_Ha_1.fits", tmp_path / "a_oiii_1.fits", tmp_path / "a_ha_2.fits", tmp_path / "dark.fits"]
+
+    groups = group_frames_by_channel(paths)
+
+    assert groups == {
+        "H": [tmp_path / "a_Ha_1.fits", tmp_path / "a_ha_2.fits"],
+        "O": [tmp_path / "a_oiii_1.fits"],
+        "unknown": [tmp_path / "dark.fits"],
+    }
+
+
+def test_plan_tile_rows_respects_memory_budget() -> None:
+    tile_rows, workers = plan_tile_rows(n_frames=100, shape=(4000, 6000), memory_limit_mb=512, workers=8)
+
+    assert workers == 8  # noqa: PLR2004
+    assert tile_rows * 100 * 6000 * 4 * 4 * workers <= 512 * 1024 * 1024
+
+
+def test_plan_tile_rows_reduces_workers_when_budget_is_too_small() -> None:
+    tile_rows, workers = plan_tile_rows(n_frames=1000, shape=(4000, 6000), memory_limit_mb=256, workers=8)
+
+    assert tile_rows == 1
+    assert workers == 2  # noqa: PLR2004
+
+
+def test_plan_tile_rows_rejects_budget_below_a_single_row() -> None:
+    with pytest.raises(ValueError, match="needs at least 92 MB"):
+        plan_tile_rows(n_frames=1000, shape=(4000, 6000), memory_limit_mb=64, workers=8)
+
+
+@pytest.mark.parametrize("rejection", ["sigma", "winsorized"])
+def test_stack_frames_with_masters(tmp_path: Path, light_frames: list[Path], rejection: str) -> None:
+    bias = tmp_path / "bias.fits"
+    flat = tmp_path / "flat.fits"
+    fits.write_image(bias, np.full(_SHAPE, 100, dtype=np.uint16))
+    fits.write_image(flat, np.full(_SHAPE, 20000, dtype=np.uint16))
+    output = tmp_path / "stack.fits"
+
+    stack_frames(
+        light_frames,
+        output,
+        masters=CalibrationMasters(bias=bias, flat=flat),
+        config=StackingConfig(rejection=rejection, workers=2, memory_limit_mb=1),  # type: ignore[arg-type]
+    )
+
+    result = fits.read_image(output)
+    assert result.shape == _SHAPE
+    assert abs(float(result.mean()) - _SIGNAL) < 5.0  # noqa: PLR2004
+    assert float(result[10].max()) < _SIGNAL + 50.0
+    assert fits.read_header_from_path(output).cards["NCOMBINE"] == len(light_frames)
+    assert not (tmp_path / "stack.fits.tiles").exists()
+
+
+def test_stack_frames_resumes_from_journal(tmp_path: Path, light_frames: list[Path]) -> None:
+    output = tmp_path / "stack.fits"
+    journal = tmp_path / "stack.fits.tiles"
+    config = StackingConfig(workers=1, memory_limit_mb=1)
+    with patch("pathlib.Path.unlink"):  # keep the journal of a finished run
+        stack_frames(light_frames, output, config=config)
+    expected = fits.read_image(output)
+
+    # Simulate an interrupted run - only the first tile is marked as done
+    meta, *_ = journal.read_text().splitlines()
+    journal.write_text(f"{meta}\n0\n")
+    tile_rows = json.loads(meta)["tile_rows"]
+    data = fits.open_memmap(output, mode="r+")
+    data[:tile_rows] = -1.0
+    data[tile_rows:] = 0.0
+    data.flush()
+    del data
+
+    stack_frames(light_frames, output, config=config)
+
+    result = fits.read_image(output)
+    np.testing.assert_array_equal(result[:tile_rows], -1.0)  # finished tile was not recomputed
+    np.testing.assert_allclose(result[tile_rows:], expected[tile_rows:])
+    assert not journal.exists()
+
+
+def test_stack_frames_rejects_resume_over_memory_budget(tmp_path: Path, light_frames: list[Path]) -> None:
+    output = tmp_path / "stack.fits"
+    journal = tmp_path / "stack.fits.tiles"
+    config = StackingConfig(workers=1, memory_limit_mb=1)
+    with patch("pathlib.Path.unlink"):  # keep the journal of a finished run
+        stack_frames(light_frames, output, config=config)
+    # Tiles of the interrupted run need more memory than the current budget allows
+    meta = json.loads(journal.read_text().splitlines()[0])
+    journal.write_text(json.dumps({**meta, "tile_rows": 1000}) + "\n")
+
+    with pytest.raises(ValueError, match="too small to resume"):
+        stack_frames(light_frames, output, config=config)
+
+
+def test_stack_channels(tmp_path: Path, light_frames: list[Path]) -> None:
+    oiii = tmp_path / "m31_oiii_001.fits"
+    fits.write_image(oiii, np.ones(_SHAPE, dtype=np.float32))
+
+    results = stack_channels(
+        group_frames_by_channel([*light_frames, oiii]),
+        tmp_path / "stacks",
+        config=StackingConfig(workers=1),
+    )
+
+    assert set(results) == {"H", "O"}
+    assert fits.read_header_from_path(results["O"]).cards["CHANNEL"] == "O"
+    np.testing.assert_array_equal(fits.read_image(results["O"]), 1.0)
@@ -0,0 +1,2 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
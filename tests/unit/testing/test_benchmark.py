@@ -0,0 +1,49 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING
+
+from astro_tools.testing.benchmark import BenchmarkResult, compare_to_baseline, load_baseline, measure, save_results
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def _allocate(size_mb: int) -> None:
+    data = b"x" * (size_mb * 1024 * 1024)
+    time.sleep(0.1)
+    del data
+
+
+def test_measure_reports_throughput_and_memory_growth() -> None:
+    size_mb = 64
+    ballast = b"x" * (size_mb * 1024 * 1024)
+
+    result = measure("allocate", lambda: _allocate(size_mb), files=10, size=10 * 1024 * 1024)
+
+    assert result.seconds > 0
+    # Memory allocated before the benchmark does not count
+    assert size_mb / 2 < result.peak_rss_delta_mb < size_mb * 1.5
+    assert ballast
+    assert result.files_per_s == result.files / result.seconds
+    assert result.mb_per_s == 10 / result.seconds
+
+
+def test_compare_to_baseline(tmp_path: Path) -> None:
+    baseline_path = tmp_path / "baseline.json"
+    save_results(baseline_path, [BenchmarkResult("a", files=100, size=0, seconds=1.0, peak_rss_delta_mb=100.0)])
+    baseline = load_baseline(baseline_path)
+
+    ok = BenchmarkResult("a", files=80, size=0, seconds=1.0, peak_rss_delta_mb=120.0)
+    slow = BenchmarkResult("a", files=40, size=0, seconds=1.0, peak_rss_delta_mb=100.0)
+    hungry = BenchmarkResult("a", files=100, size=0, seconds=1.0, peak_rss_delta_mb=200.0)
+    unknown = BenchmarkResult("b", files=1, size=0, seconds=100.0, peak_rss_delta_mb=1000.0)
+    save_results(tmp_path / "small.json", [BenchmarkResult("c", files=1, size=0, seconds=1.0, peak_rss_delta_mb=1.0)])
+    noise = BenchmarkResult("c", files=1, size=0, seconds=1.0, peak_rss_delta_mb=10.0)
+
+    assert compare_to_baseline([ok, unknown], baseline) == []
+    assert compare_to_baseline([noise], load_baseline(tmp_path / "small.json")) == []
+    assert len(compare_to_baseline([slow, hungry], baseline)) == 2  # noqa: PLR2004
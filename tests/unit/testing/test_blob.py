@@ -0,0 +1,76 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+
+from __future__ import annotations
+
+import io
+import time
+from typing import TYPE_CHECKING
+
+import pytest
+from azure.core import MatchConditions
+from azure.core.exceptions import HttpResponseError, ResourceExistsError, ResourceNotFoundError
+
+from astro_tools.testing.blob import LocalContainerClient, NetworkProfile
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+@pytest.mark.parametrize("on_disk", [False, True])
+def test_local_container_client_round_trip(tmp_path: Path, *, on_disk: bool) -> None:
+    container_client = LocalContainerClient(root=tmp_path if on_disk else None)
+    blob_client = container_client.get_blob_client("data/a.bin")
+
+    blob_client.upload_blob(io.BytesIO(b"0123456789"), metadata={"codec": "none"})
+    container_client.get_blob_client("other/b.bin").upload_blob(b"x")
+
+    assert blob_client.exists()
+    assert blob_client.get_blob_properties().size == 10  # noqa: PLR2004
+    assert blob_client.get_blob_properties().metadata == {"codec": "none"}
+    assert blob_client.download_blob().readall() == b"0123456789"
+    assert blob_client.download_blob(offset=2, length=3).readall() == b"234"
+    assert [blob.name for blob in container_client.list_blobs(name_starts_with="data/")] == ["data/a.bin"]
+    assert container_client.bytes_uploaded == 11  # noqa: PLR2004
+    assert container_client.bytes_downloaded == 13  # noqa: PLR2004
+
+
+def test_local_container_client_errors() -> None:
+    container_client = LocalContainerClient()
+    blob_client = container_client.get_blob_client("a.bin")
+
+    with pytest.raises(ResourceNotFoundError):
+        blob_client.get_blob_properties()
+    blob_client.upload_blob(b"a")
+    with pytest.raises(ResourceExistsError):
+        blob_client.upload_blob(b"b")
+    blob_client.upload_blob(b"b", overwrite=True)
+    assert blob_client.download_blob().readall() == b"b"
+
+
+def test_local_container_client_simulates_latency_and_bandwidth() -> None:
+    container_client = LocalContainerClient(profile=NetworkProfile(latency=0.01, bandwidth_mbps=10.0))
+
+    t0 = time.perf_counter()
+    container_client.get_blob_client("a.bin").upload_blob(b"\0" * 1024 * 1024)
+
+    assert time.perf_counter() - t0 >= 0.1  # noqa: PLR2004
+    assert container_client.requests == 1
+
+
+def test_local_container_client_commits_staged_blocks() -> None:
+    container_client = LocalContainerClient()
+    blob_client = container_client.get_blob_client("a.bin")
+
+    blob_client.stage_block("00000001", b"world")
+    blob_client.stage_block("00000000", b"hello ")
+    blob_client.commit_block_list(["00000000", "00000001"], metadata={"codec": "none"})
+
+    assert blob_client.download_blob().readall() == b"hello world"
+    assert blob_client.get_blob_properties().metadata == {"codec": "none"}
+    assert container_client.bytes_uploaded == 11  # noqa: PLR2004
+    blob_client.stage_block("00000000", b"x")
+    with pytest.raises(ResourceExistsError):
+        blob_client.commit_block_list(["00000000"], match_condition=MatchConditions.IfMissing)
+    with pytest.raises(HttpResponseError):
+        blob_client.commit_block_list(["00000002"])
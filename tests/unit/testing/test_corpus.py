@@ -0,0 +1,45 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+
+from __future__ import annotations
+
+import zipfile
+from typing import TYPE_CHECKING
+
+import pytest
+
+from astro_tools.core.consts.channels import UNKNOWN_CHANNEL, detect_channel
+from astro_tools.imaging import fits
+from astro_tools.testing.corpus import CorpusSpec, generate_corpus
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+_SPEC = CorpusSpec(archives=2, frames_per_archive=3, frame_shape=(32, 32), small_files=25, small_files_per_dir=10)
+
+
+def test_generate_corpus_is_reproducible(tmp_path: Path) -> None:
+    first = generate_corpus(tmp_path / "first", _SPEC)
+    second = generate_corpus(tmp_path / "second", _SPEC)
+
+    assert [path.name for path in first.all_archives] == [path.name for path in second.all_archives]
+    for a, b in zip(first.all_archives + first.small_files, second.all_archives + second.small_files, strict=True):
+        assert a.read_bytes() == b.read_bytes()
+
+
+def test_generate_corpus_variants(tmp_path: Path) -> None:
+    corpus = generate_corpus(tmp_path, _SPEC)
+
+    assert len(corpus.all_archives) == 4  # noqa: PLR2004
+    assert len(corpus.small_files) == 25  # noqa: PLR2004
+    with zipfile.ZipFile(corpus.archives[0]) as zf:
+        assert zf.testzip() is None
+        names = zf.namelist()
+        header, data = fits.image_from_bytes(zf.read(names[0]))
+    assert len(names) == 3  # noqa: PLR2004
+    assert detect_channel(names[0]) != UNKNOWN_CHANNEL
+    assert header.shape == data.shape == (32, 32)
+    with zipfile.ZipFile(corpus.corrupted[0]) as zf:
+        assert zf.testzip() is not None
+    with pytest.raises(zipfile.BadZipFile):
+        zipfile.ZipFile(corpus.truncated[0])
@@ -0,0 +1,64 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+
+from __future__ import annotations
+
+import gzip
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pytest
+
+from astro_tools.utils.compression import iter_compressed_chunks, iter_decompressed
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+@pytest.fixture
+def data() -> bytes:
+    rng = np.random.default_rng(42)
+    return rng.integers(0, 16, size=100_000, dtype=np.uint8).tobytes()
+
+
+def test_compressed_chunks_form_a_gzip_stream(tmp_path: Path, data: bytes) -> None:
+    path = tmp_path / "frame.fits"
+    path.write_bytes(data)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        chunks = list(iter_compressed_chunks(path, executor, level=1, chunk_size=30_000, max_pending=2))
+
+    assert [size for _, size, _ in chunks] == [30_000, 30_000, 30_000, 10_000]
+    assert chunks[-1][2] == zlib.crc32(data)
+    stream = b"".join(chunk for chunk, _, _ in chunks)
+    assert gzip.decompress(stream) == data
+    assert len(stream) < len(data)
+
+
+def test_empty_file_is_a_valid_gzip_stream(tmp_path: Path) -> None:
+    path = tmp_path / "empty.fits"
+    path.touch()
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        chunks = list(iter_compressed_chunks(path, executor))
+
+    assert len(chunks) == 1
+    assert gzip.decompress(chunks[0][0]) == b""
+
+
+@pytest.mark.parametrize("split", [1, 7, 4096, 1_000_000])
+def test_iter_decompressed_handles_multiple_members(data: bytes, split: int) -> None:
+    stream = gzip.compress(data[:50_000]) + gzip.compress(b"") + gzip.compress(data[50_000:])
+
+    chunks = (stream[offset : offset + split] for offset in range(0, len(stream), split))
+
+    assert b"".join(iter_decompressed(chunks)) == data
+
+
+def test_iter_decompressed_detects_truncated_stream(data: bytes) -> None:
+    stream = gzip.compress(data)
+
+    with pytest.raises(ValueError, match="truncated"):
+        b"".join(iter_decompressed([stream[:-10]]))
@@ -4,12 +4,19 @@
 from __future__ import annotations
 
 import logging
+import logging.handlers
+import threading
+import time
+from typing import TYPE_CHECKING
 from unittest.mock import MagicMock, patch
 
 import pytest
 
 from astro_tools.core import consts
-from astro_tools.utils.logging import get_logger, timing_context
+from astro_tools.utils.logging import BufferedFileHandler, add_file_handler, get_logger, queue_logging, timing_context
+
+if TYPE_CHECKING:
+    from pathlib import Path
 
 _NAME_TO_LEVEL = {
     "CRITICAL": logging.CRITICAL,
@@ -61,6 +68,16 @@ def test_formatter_configuration() -> None:
     assert formatter._fmt == expected_format  # type: ignore[union-attr] # noqa: SLF001
 
 
+def test_formatter_shows_logger_name_instead_of_path() -> None:
+    formatter = get_logger(_LOGGER_NAME).handlers[0].formatter
+    record = logging.LogRecord(_LOGGER_NAME, logging.INFO, "/deep/path/to/module.py", 42, "message", None, None)
+
+    line = formatter.format(record)  # type: ignore[union-attr]
+
+    assert f":{_LOGGER_NAME}:INFO:42:message" in line
+    assert "/deep/path" not in line
+
+
 def test_timed_decorator_functionality() -> None:
     @timing_context("testing")
     def test_func(x: int, y: int) -> int:
@@ -83,3 +100,106 @@ def test_timed_decorator_logging(mock_info: MagicMock) -> None:
     start_call, end_call = mock_info.call_args_list
     assert "is running" in start_call[0][0]
     assert "ran in" in end_call[0][0]
+
+
+class _ThreadRecorder(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.records: list[tuple[str, str]] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append((threading.current_thread().name, self.format(record)))
+
+
+def test_add_file_handler_is_idempotent(tmp_path: Path) -> None:
+    logger = logging.getLogger("test_add_file_handler")
+    log_file = tmp_path / "test.log"
+    try:
+        first = add_file_handler(logger, log_file)
+        second = add_file_handler(logger, tmp_path / "." / "test.log")
+        assert first is second
+        assert sum(isinstance(handler, BufferedFileHandler) for handler in logger.handlers) == 1
+    finally:
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            handler.close()
+
+
+def test_buffered_file_handler_writes_in_batches(tmp_path: Path) -> None:
+    logger = logging.getLogger("test_buffered_file_handler")
+    logger.setLevel(logging.INFO)
+    log_file = tmp_path / "test.log"
+    handler = BufferedFileHandler(log_file, capacity=100, flush_interval=3600.0)
+    logger.addHandler(handler)
+    try:
+        logger.info("first")
+        assert not log_file.read_text()
+        logger.error("failure")
+        content = log_file.read_text()
+        assert "first" in content
+        assert "failure" in content
+        logger.info("last")
+    finally:
+        logger.removeHandler(handler)
+        handler.close()
+    assert "last" in log_file.read_text()
+
+
+def test_buffered_file_handler_flushes_idle_buffer_after_interval(tmp_path: Path) -> None:
+    logger = logging.getLogger("test_buffered_file_handler_idle")
+    logger.setLevel(logging.INFO)
+    log_file = tmp_path / "test.log"
+    handler = BufferedFileHandler(log_file, capacity=100, flush_interval=0.1)
+    logger.addHandler(handler)
+    try:
+        logger.info("lonely")
+        assert not log_file.read_text()
+        deadline = time.monotonic() + 5.0
+        while "lonely" not in log_file.read_text() and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert "lonely" in log_file.read_text()
+        assert not handler.buffer
+    finally:
+        logger.removeHandler(handler)
+        handler.close()
+
+
+def test_queue_logging_moves_handlers_to_listener_thread() -> None:
+    logger = logging.getLogger("test_queue_logging")
+    logger.setLevel(logging.INFO)
+    recorder = _ThreadRecorder()
+    logger.addHandler(recorder)
+    items = ["a"]
+    try:
+        with queue_logging(logger):
+            assert isinstance(logger.handlers[0], logging.handlers.QueueHandler)
+            logger.info("items: %s", items)
+            items.append("b")
+            try:
+                msg = "boom"
+                raise ValueError(msg)  # noqa: TRY301
+            except ValueError:
+                logger.exception("failed")
+        assert logger.handlers == [recorder]
+    finally:
+        logger.removeHandler(recorder)
+
+    assert len(recorder.records) == 2  # noqa: PLR2004
+    assert all(thread != threading.current_thread().name for thread, _ in recorder.records)
+    assert recorder.records[0][1] == "items: ['a']"
+    assert "ValueError: boom" in recorder.records[1][1]
+
+
+def test_queue_logging_respects_handler_level() -> None:
+    logger = logging.getLogger("test_queue_logging_level")
+    logger.setLevel(logging.DEBUG)
+    recorder = _ThreadRecorder()
+    recorder.setLevel(logging.WARNING)
+    logger.addHandler(recorder)
+    try:
+        with queue_logging(logger), queue_logging(logger):
+            logger.info("ignored")
+            logger.warning("kept")
+    finally:
+        logger.removeHandler(recorder)
+    assert [message for _, message in recorder.records] == ["kept"]
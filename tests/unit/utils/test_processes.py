@@ -0,0 +1,17 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+
+from __future__ import annotations
+
+import multiprocessing
+
+from astro_tools.utils.processes import process_pool
+
+
+def _start_method() -> str:
+    return multiprocessing.get_start_method()
+
+
+def test_process_pool_spawns_workers() -> None:
+    with process_pool(max_workers=1) as executor:
+        assert executor.submit(_start_method).result() == "spawn"
@@ -0,0 +1,211 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+
+from __future__ import annotations
+
+import json
+import sys
+import threading
+from typing import TYPE_CHECKING
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from astro_tools.utils import profiling
+from astro_tools.utils.logging import timing_context
+from astro_tools.utils.processes import process_pool
+from astro_tools.utils.profiling import PROFILER, Histogram, Profiler
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+    from pathlib import Path
+
+
+@pytest.fixture
+def profiler() -> Profiler:
+    profiler = Profiler()
+    profiler.enabled = True
+    return profiler
+
+
+@pytest.fixture
+def global_profiler() -> Generator[Profiler]:
+    PROFILER.enabled = True
+    yield PROFILER
+    PROFILER.enabled = False
+    PROFILER.reset()
+
+
+def test_disabled_profiler_records_nothing() -> None:
+    profiler = Profiler()
+
+    with profiler.span("work") as span:
+        profiler.increment("items")
+        profiler.observe("sizes", 1024)
+
+    assert span is None
+    assert profiler.snapshot() == {
+        "spans": [],
+        "dropped_spans": {},
+        "span_summary": {},
+        "counters": {},
+        "histograms": {},
+    }
+
+
+def test_nested_spans_have_parent_child_relationship(profiler: Profiler) -> None:
+    with profiler.span("outer", job="test") as outer, profiler.span("inner") as inner:
+        pass
+
+    assert outer is not None
+    assert inner is not None
+    assert outer.parent_id is None
+    assert inner.parent_id == outer.span_id
+    assert outer.attributes == {"job": "test"}
+    assert outer.duration is not None
+    assert inner.duration is not None
+    assert outer.duration >= inner.duration
+
+
+def test_worker_thread_spans_use_explicit_parent(profiler: Profiler) -> None:
+    with profiler.span("outer") as outer:
+
+        def work() -> None:
+            with profiler.span("worker", parent=outer):
+                pass
+
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+
+    worker = next(span for span in profiler.spans if span.name == "worker")
+    assert outer is not None
+    assert worker.parent_id == outer.span_id
+    assert worker.thread != outer.thread
+
+
+def test_counters_and_histograms(profiler: Profiler) -> None:
+    for size in (100, 2000, 5000, 10**9):
+        profiler.increment("upload.bytes", size)
+        profiler.observe("upload.file_size_bytes", size)
+
+    metrics = profiler.metrics()
+
+    assert metrics["counter.upload.bytes"] == 100 + 2000 + 5000 + 10**9
+    assert metrics["histogram.upload.file_size_bytes.count"] == 4  # noqa: PLR2004
+    assert metrics["histogram.upload.file_size_bytes.max"] == 10**9
+    assert metrics["histogram.upload.file_size_bytes.p50"] == 4096  # noqa: PLR2004
+
+
+def test_histogram_quantile() -> None:
+    histogram = Histogram(bounds=(1.0, 10.0, 100.0))
+    for value in (0.5, 5.0, 6.0, 50.0, 500.0):
+        histogram.observe(value)
+
+    assert histogram.counts == [1, 2, 1, 1]
+    assert histogram.quantile(0.0) == 1.0
+    assert histogram.quantile(0.5) == 10.0  # noqa: PLR2004
+    assert histogram.quantile(1.0) == 500.0  # noqa: PLR2004
+    assert Histogram(bounds=(1.0,)).quantile(0.5) is None
+
+
+def test_export_json(profiler: Profiler, tmp_path: Path) -> None:
+    with profiler.span("work"):
+        profiler.increment("items", 3)
+    output = tmp_path / "trace.json"
+
+    profiler.export_json(output)
+
+    data = json.loads(output.read_text())
+    assert data["spans"][0]["name"] == "work"
+    assert data["span_summary"]["work"]["count"] == 1
+    assert data["counters"] == {"items": 3}
+
+
+def test_log_to_mlflow(profiler: Profiler) -> None:
+    mlflow = MagicMock()
+    with profiler.span("work"):
+        profiler.increment("items")
+
+    with patch.dict(sys.modules, {"mlflow": mlflow}), patch.dict("os.environ", {}, clear=True):
+        profiler.log_to_mlflow("test-experiment")
+
+    mlflow.set_experiment.assert_called_once_with("test-experiment")
+    mlflow.start_run.assert_called_once_with(run_id=None)
+    logged = mlflow.log_metrics.call_args[0][0]
+    assert logged["counter.items"] == 1
+    assert logged["span.work.count"] == 1
+
+
+def test_timing_context_records_span(global_profiler: Profiler) -> None:
+    with timing_context("timed-block"):
+        pass
+
+    assert [span.name for span in global_profiler.spans] == ["timed-block"]
+
+
+def _recorded_task(value: int) -> int:
+    with profiling.span("task", value=value):
+        profiling.increment("task.values", value)
+    return value * 2
+
+
+def test_spans_with_the_same_name_are_capped() -> None:
+    profiler = Profiler(max_spans_per_name=2)
+    profiler.enabled = True
+    files = 5
+
+    with profiler.span("batch"):
+        for _ in range(files):
+            with profiler.span("file"):
+                pass
+
+    assert [span.name for span in profiler.spans] == ["file", "file", "batch"]
+    assert profiler.dropped_spans == {"file": files - 2}
+    assert profiler.span_summary()["file"]["count"] == files
+
+
+def test_merge_reparents_spans_and_sums_data(profiler: Profiler) -> None:
+    worker = Profiler()
+    worker.enabled = True
+    with worker.span("task"), worker.span("step"):
+        worker.increment("items", 2)
+        worker.observe("sizes", 100)
+    profiler.increment("items", 1)
+    profiler.observe("sizes", 10**6)
+
+    with profiler.span("batch") as batch:
+        profiler.merge(worker.recording(), batch)
+
+    assert batch is not None
+    spans = {span.name: span for span in profiler.spans}
+    assert spans["task"].parent_id == batch.span_id
+    assert spans["step"].parent_id == spans["task"].span_id
+    assert len({span.span_id for span in profiler.spans}) == len(profiler.spans)
+    assert profiler.counters == {"items": 3}
+    assert profiler.histograms["sizes"].count == 2  # noqa: PLR2004
+    assert profiler.histograms["sizes"].min == 100  # noqa: PLR2004
+    assert profiler.span_summary()["step"]["count"] == 1
+
+
+def test_histogram_merge_rejects_different_bounds() -> None:
+    with pytest.raises(ValueError, match="different bucket bounds"):
+        Histogram(bounds=(1.0,)).merge(Histogram(bounds=(2.0,)))
+
+
+def test_process_pool_data_is_merged(global_profiler: Profiler) -> None:
+    values = [1, 2, 3]
+    with (
+        global_profiler.span("batch") as batch,
+        process_pool(max_workers=2) as executor,
+    ):
+        mapped = list(profiling.map_tasks(executor, _recorded_task, values))
+        submitted = profiling.submit(executor, _recorded_task, 4).result()
+
+    assert batch is not None
+    assert mapped == [2, 4, 6]
+    assert submitted == 8  # noqa: PLR2004
+    assert global_profiler.counters == {"task.values": 1 + 2 + 3 + 4}
+    tasks = [span for span in global_profiler.spans if span.name == "task"]
+    assert sorted(span.attributes["value"] for span in tasks) == [1, 2, 3, 4]
+    assert {span.parent_id for span in tasks} == {batch.span_id}
@@ -0,0 +1,142 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+
+from __future__ import annotations
+
+import io
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+import pytest
+
+from astro_tools.utils.progress import ByteProgress, ProgressReader, TokenBucket
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_snapshot_reports_bytes_files_and_eta(tmp_path: Path) -> None:
+    snapshot_file = tmp_path / "progress.json"
+    total, files, half = 1000, 2, 500
+    with ByteProgress(total, files=files, desc="test", snapshot_file=snapshot_file, disable=True) as progress:
+        progress.update(half // 2)
+        time.sleep(0.05)
+        progress.update(half // 2)
+        progress.file_done()
+        snapshot = progress.snapshot()
+
+        assert snapshot.bytes_done == half
+        assert snapshot.files_done == 1
+        assert snapshot.fraction == pytest.approx(0.5)
+        assert snapshot.mb_per_s > 0
+        assert snapshot.eta is not None
+        assert snapshot.eta > 0
+
+        progress.file_done(remaining=half)
+
+    data = json.loads(snapshot_file.read_text())
+    assert data["desc"] == "test"
+    assert data["bytes_done"] == total
+    assert data["files_done"] == files
+    assert data["fraction"] == 1.0
+    assert data["eta"] == 0.0
+
+
+def test_token_bucket_limits_aggregate_rate() -> None:
+    rate, tokens = 10_000, [500] * 8
+    bucket = TokenBucket(rate=rate, burst=0)
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(bucket.acquire, tokens))
+
+    # The last caller waits for all tokens but its own
+    assert time.monotonic() - start >= (sum(tokens) - tokens[-1]) / rate
+
+
+def test_unlimited_token_bucket_does_not_wait() -> None:
+    bucket = TokenBucket.from_mbps(None)
+    start = time.monotonic()
+    bucket.acquire(10**12)
+
+    assert time.monotonic() - start < 1
+
+
+def test_progress_reader_accounts_read_bytes() -> None:
+    data = b"0123456789"
+    with ByteProgress(len(data), disable=True) as progress:
+        reader = ProgressReader(io.BytesIO(data), progress)
+        buffer = bytearray(4)
+
+        assert reader.read(3) == data[:3]
+        assert reader.readinto(buffer) == len(buffer)
+        assert reader.tell() == 3 + len(buffer)
+        assert reader.read() == data[3 + len(buffer) :]
+        assert reader.bytes_read == len(data)
+        assert progress.bytes_done == len(data)
+
+
+class _RecordingBucket(TokenBucket):
+    def __init__(self) -> None:
+        super().__init__(rate=None)
+        self.acquired = 0.0
+
+    def acquire(self, tokens: float) -> None:
+        self.acquired += tokens
+
+
+def test_progress_reader_reports_bytes_read_again_once() -> None:
+    data = b"0123456789"
+    half = len(data) // 2
+    bucket = _RecordingBucket()
+    with ByteProgress(len(data), disable=True) as progress:
+        reader = ProgressReader(io.BytesIO(data), progress, bucket)
+
+        # Blocks uploaded in parallel are read out of order
+        reader.seek(half)
+        assert reader.read() == data[half:]
+        reader.seek(0)
+        assert reader.read(half) == data[:half]
+        # Retried request - the data is read again from its start
+        reader.seek(0)
+        assert reader.read() == data
+
+        assert reader.bytes_read == len(data)
+        assert progress.bytes_done == len(data)
+        # Pacing follows the bytes actually read
+        assert bucket.acquired == 2 * len(data)
+
+
+def test_progress_reader_paces_parallel_out_of_order_reads() -> None:
+    block_size, blocks, rate = 1000, 8, 40_000
+    data = bytes(block_size * blocks)
+    bucket = TokenBucket(rate=rate, burst=0)
+    lock = threading.Lock()
+    durations = []
+
+    with ByteProgress(len(data), disable=True) as progress:
+        reader = ProgressReader(io.BytesIO(data), progress, bucket)
+
+        def read_block(index: int) -> bytes:
+            # Like the Azure SDK, seek and read of a block happen under a lock shared by the upload threads
+            with lock:
+                start = time.monotonic()
+                reader.seek(index * block_size)
+                chunk = reader.read(block_size)
+                durations.append(time.monotonic() - start)
+            return chunk
+
+        # Blocks are read from the end and every block is read twice, as if each request was retried
+        order = [index for index in reversed(range(blocks)) for _ in range(2)]
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            chunks = list(executor.map(read_block, order))
+        elapsed = time.monotonic() - start
+
+        assert all(len(chunk) == block_size for chunk in chunks)
+        assert progress.bytes_done == len(data)
+    # All read bytes are paced, one block at a time - not the whole gap up to the furthest offset at once
+    assert elapsed >= (len(order) - 1) * block_size / rate
+    assert max(durations) < 4 * block_size / rate
@@ -0,0 +1,107 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+
+from __future__ import annotations
+
+import itertools
+import zipfile
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pytest
+import pyzipper
+
+from astro_tools.testing.blob import LocalContainerClient
+from astro_tools.utils.remote_zip import BlobRangeFile, ByteRange, coalesce_ranges, extract_members, member_ranges
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+@pytest.fixture
+def archive(tmp_path: Path) -> Path:
+    rng = np.random.default_rng(42)
+    path = tmp_path / "archive.zip"
+    with zipfile.ZipFile(path, "w") as zf:
+        for index in range(12):
+            channel = ("ha", "oiii", "sii")[index % 3]
+            compression = (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED, zipfile.ZIP_BZIP2)[index % 3]
+            data = rng.integers(0, 8, size=20_000, dtype=np.uint8).tobytes()
+            zf.writestr(f"M31/{channel}/M31_{channel}_300s_{index:04d}.fits", data, compress_type=compression)
+    return path
+
+
+def _upload(path: Path) -> LocalContainerClient:
+    container_client = LocalContainerClient()
+    container_client.get_blob_client("raw/archive.zip").upload_blob(path.read_bytes())
+    return container_client
+
+
+def test_coalesce_ranges() -> None:
+    ranges = [ByteRange(0, 10, ("a",)), ByteRange(10, 20, ("b",)), ByteRange(25, 30, ("c",)), ByteRange(50, 60, ("d",))]
+
+    assert coalesce_ranges(ranges, max_gap=5, max_size=100) == [
+        ByteRange(0, 30, ("a", "b", "c")),
+        ByteRange(50, 60, ("d",)),
+    ]
+    assert coalesce_ranges(ranges, max_gap=5, max_size=20) == [
+        ByteRange(0, 20, ("a", "b")),
+        ByteRange(25, 30, ("c",)),
+        ByteRange(50, 60, ("d",)),
+    ]
+
+
+def test_remote_central_directory_is_read_from_the_tail(archive: Path) -> None:
+    container_client = _upload(archive)
+    file = BlobRangeFile(container_client.get_blob_client("raw/archive.zip"), tail_size=4096)  # type: ignore[arg-type]
+
+    with zipfile.ZipFile(file) as zf, zipfile.ZipFile(archive) as local:
+        assert zf.namelist() == local.namelist()
+        ranges = member_ranges(zf, zf.infolist())
+
+    assert file.requests == 1
+    assert ranges[0].start == 0
+    assert all(a.end == b.start for a, b in itertools.pairwise(ranges))
+
+
+def test_extract_members_fetches_only_selected_ranges(archive: Path, tmp_path: Path) -> None:
+    container_client = _upload(archive)
+    output_dir = tmp_path / "out"
+    requests = container_client.requests
+
+    extracted = extract_members(
+        container_client.get_blob_client("raw/archive.zip"),  # type: ignore[arg-type]
+        output_dir,
+        lambda info: "_oiii_" in info.filename,
+        workers=2,
+        max_gap=0,
+        tail_size=4096,
+    )
+
+    with zipfile.ZipFile(archive) as zf:
+        expected = [name for name in zf.namelist() if "_oiii_" in name]
+        assert sorted(p.relative_to(output_dir).as_posix() for p in extracted) == expected
+        for name in expected:
+            assert (output_dir / name).read_bytes() == zf.read(name)
+    # Properties, tail and 4 members that are not adjacent - roughly a third of the archive
+    assert container_client.requests - requests == 6  # noqa: PLR2004
+    assert container_client.bytes_downloaded < archive.stat().st_size / 2
+
+
+def test_extract_members_from_encrypted_archive(tmp_path: Path) -> None:
+    path = tmp_path / "secret.zip"
+    with pyzipper.AESZipFile(path, "w", compression=pyzipper.ZIP_DEFLATED, encryption=pyzipper.WZ_AES) as zf:
+        zf.setpassword(b"secret")
+        zf.writestr("a.fits", b"a" * 1000)
+        zf.writestr("b.fits", b"b" * 1000)
+    container_client = LocalContainerClient()
+    container_client.get_blob_client("secret.zip").upload_blob(path.read_bytes())
+
+    extracted = extract_members(
+        container_client.get_blob_client("secret.zip"),  # type: ignore[arg-type]
+        tmp_path / "out",
+        lambda info: info.filename == "b.fits",
+        password="secret",  # noqa: S106
+    )
+
+    assert [p.read_bytes() for p in extracted] == [b"b" * 1000]
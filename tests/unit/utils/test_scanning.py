@@ -0,0 +1,105 @@
+#  Copyright (c) xultaeculcis. All rights reserved.
+#  Licensed under MIT License.
+
+from __future__ import annotations
+
+import os
+import time
+from typing import TYPE_CHECKING
+
+from astro_tools.utils.scanning import incremental_scan, load_manifest, scan_tree
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+_HOUR_NS = 3600 * 1_000_000_000
+
+
+def _age(*paths: Path) -> None:
+    """Moves modification times an hour back, so that they are outside the racy window."""
+    mtime_ns = time.time_ns() - _HOUR_NS
+    for path in paths:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def _make_tree(root: Path) -> None:
+    (root / "a" / "b").mkdir(parents=True)
+    (root / "c").mkdir()
+    (root / "top.zip").write_bytes(b"1")
+    (root / "a" / "one.zip").write_bytes(b"22")
+    (root / "a" / "b" / "two.fits").write_bytes(b"333")
+    (root / "c" / "three.ZIP").write_bytes(b"4444")
+    _age(root, root / "a", root / "a" / "b", root / "c")
+
+
+def test_scan_tree_lists_all_files(tmp_path: Path) -> None:
+    _make_tree(tmp_path)
+
+    result = scan_tree(tmp_path)
+
+    assert result.added == {"top.zip", "a/one.zip", "a/b/two.fits", "c/three.ZIP"}
+    assert not result.changed
+    assert not result.removed
+    assert result.dirs_scanned == 4  # noqa: PLR2004
+    assert result.paths(suffix=".zip") == [
+        tmp_path / "a" / "one.zip",
+        tmp_path / "c" / "three.ZIP",
+        tmp_path / "top.zip",
+    ]
+
+
+def test_incremental_scan_reuses_unchanged_directories(tmp_path: Path) -> None:
+    root = tmp_path / "data"
+    root.mkdir()
+    _make_tree(root)
+    manifest_path = tmp_path / "manifest.json.gz"
+    incremental_scan(root, manifest_path)
+
+    (root / "a" / "b" / "new.fits").write_bytes(b"5")
+    (root / "c" / "three.ZIP").unlink()
+    result = incremental_scan(root, manifest_path)
+
+    assert result.dirs_scanned == 2  # noqa: PLR2004
+    assert result.dirs_reused == 2  # noqa: PLR2004
+    assert result.added == {"a/b/new.fits"}
+    assert result.removed == {"c/three.ZIP"}
+    assert len(list(result.iter_files())) == 4  # noqa: PLR2004
+
+
+def test_incremental_scan_detects_changed_and_removed_directories(tmp_path: Path) -> None:
+    root = tmp_path / "data"
+    root.mkdir()
+    _make_tree(root)
+    manifest_path = tmp_path / "manifest.json.gz"
+    incremental_scan(root, manifest_path)
+
+    (root / "a" / "one.zip").write_bytes(b"changed")
+    (root / "a" / "extra.txt").write_bytes(b"")
+    for path in (root / "a" / "b").iterdir():
+        path.unlink()
+    (root / "a" / "b").rmdir()
+    result = incremental_scan(root, manifest_path)
+
+    assert result.added == {"a/extra.txt"}
+    assert result.changed == {"a/one.zip"}
+    assert result.removed == {"a/b/two.fits"}
+    assert "a/b" not in load_manifest(manifest_path, root)
+
+
+def test_recent_directory_mtime_is_not_trusted(tmp_path: Path) -> None:
+    (tmp_path / "file.txt").write_bytes(b"")
+
+    result = scan_tree(tmp_path)
+
+    assert result.dirs[""].mtime_ns is None
+    assert scan_tree(tmp_path, result.dirs).dirs_scanned == 1
+
+
+def test_manifest_of_other_root_is_ignored(tmp_path: Path) -> None:
+    root = tmp_path / "data"
+    root.mkdir()
+    _make_tree(root)
+    manifest_path = tmp_path / "manifest.json.gz"
+    incremental_scan(root, manifest_path)
+
+    assert load_manifest(manifest_path, tmp_path) == {}